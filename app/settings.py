@@ -9,9 +9,12 @@ https://docs.djangoproject.com/en/5.1/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
+import os
 from datetime import timedelta
 from pathlib import Path
 
+from app.database import database_from_url, sqlite_database
+
 # Build paths inside the project like this: BASE_DIR / "subdir".
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -49,11 +52,13 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = "user.User"
 
 MIDDLEWARE = [
+    "station.profiling.RequestProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "station.replicas.ReplicaPinMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -82,13 +87,58 @@ WSGI_APPLICATION = "app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+# DATABASE_URL selects the primary (SQLite in BASE_DIR when unset) and
+# DATABASE_REPLICA_URLS, comma separated, its read replicas.
+
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 0))
+
+if os.environ.get("DATABASE_URL"):
+    DATABASES = {
+        "default": database_from_url(
+            os.environ["DATABASE_URL"], DB_CONN_MAX_AGE, DB_POOL_SIZE
+        ),
+    }
+else:
+    DATABASES = {
+        "default": sqlite_database(BASE_DIR / "db.sqlite3"),
+    }
+
+DATABASE_REPLICAS = []
+for index, url in enumerate(filter(None, os.environ.get("DATABASE_REPLICA_URLS", "").split(","))):
+    alias = f"replica_{index + 1}"
+    DATABASES[alias] = {
+        **database_from_url(url.strip(), DB_CONN_MAX_AGE, DB_POOL_SIZE),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+# Safe requests of station.replicas.ReplicaReadMixin views read from a
+# replica, except for users who wrote within DATABASE_REPLICA_PIN.
+DATABASE_ROUTERS = ["station.replicas.ReplicaRouter"]
+DATABASE_REPLICA_PIN = timedelta(seconds=10)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
 
+if os.environ.get("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+    }
+
+# Serialized responses of read-mostly endpoints, see station.cache.
+# A timeout of 0 disables the response cache.
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -143,6 +193,16 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # orjson with DRF's output, see station.renderers
+    "DEFAULT_RENDERER_CLASSES": [
+        "station.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "station.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_THROTTLE_CLASSES": [
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle"
@@ -166,6 +226,82 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# How long a seat stays reserved for a user before checkout
+SEAT_HOLD_TTL = timedelta(minutes=10)
+
+# Seats per request of the batch booking endpoint, /orders/batch/
+BATCH_BOOKING_MAX_SEATS = 1000
+
+# Responses replayed to retries with the same Idempotency-Key, deleted by
+# `manage.py sweep_idempotency_keys` after the TTL, see station.idempotency
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+IDEMPOTENCY_KEY_LOCK_TIMEOUT = timedelta(minutes=1)
+
+# Journey planner, see station.journeys
+JOURNEY_MIN_TRANSFER = timedelta(minutes=15)
+JOURNEY_INDEX_MAX_AGE = timedelta(minutes=5)
+
+# Trips of a TripSchedule are created this far ahead by
+# `manage.py materialize_schedules`, and on lookup up to the lookahead,
+# see station.schedules
+TRIP_SCHEDULE_HORIZON = timedelta(days=14)
+TRIP_SCHEDULE_LOOKAHEAD = timedelta(days=365)
+
+# Trips departed this long ago are moved to the archive tables by
+# `manage.py archive_trips`, see station.archive
+ARCHIVE_TRIPS_AFTER = timedelta(days=30)
+
+# Rows fetched per round trip by the streaming exports, see station.exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Trips written per bulk_create by timetable imports, see station.timetable
+TIMETABLE_IMPORT_BATCH_SIZE = 5000
+
+# Seat availability push, see station.realtime
+SEAT_EVENTS_BACKEND = "station.realtime.LocalBackend"
+SEAT_EVENTS_OPTIONS = {}
+SEAT_EVENTS_QUEUE_SIZE = 100
+SEAT_EVENTS_HEARTBEAT = 15
+
+if os.environ.get("REDIS_URL"):
+    SEAT_EVENTS_BACKEND = "station.realtime.RedisBackend"
+    SEAT_EVENTS_OPTIONS = {"url": os.environ["REDIS_URL"]}
+
+# Bus image variants, rendered off the request by BUS_IMAGE_WORKERS
+# threads (0 renders them inline), see station.images
+BUS_IMAGE_VARIANTS = {
+    "thumbnail": (160, 120),
+    "card": (480, 360),
+    "full": (1600, 1200),
+}
+BUS_IMAGE_FORMATS = ["avif", "webp", "jpeg"]
+BUS_IMAGE_WORKERS = int(os.environ.get("BUS_IMAGE_WORKERS", 2))
+
+# Background tasks, run by `manage.py run_workers`, see station.tasks
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_BACKOFF = timedelta(seconds=10)
+TASK_RETRY_BACKOFF_MAX = timedelta(hours=1)
+TASK_LOCK_TIMEOUT = timedelta(minutes=10)
+TASK_BATCH_SIZE = 20
+TASK_POLL_INTERVAL = 1
+
+# Order confirmations, sent by the task workers, see station.notifications
+EMAIL_BACKEND = os.environ.get(
+    "EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend"
+)
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "localhost")
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "webmaster@localhost")
+
+# Server-Timing headers and /api/metrics/, see station.profiling
+REQUEST_PROFILING = os.environ.get("REQUEST_PROFILING", "") == "1"
+REQUEST_PROFILE_SAMPLE_RATE = float(os.environ.get("REQUEST_PROFILE_SAMPLE_RATE", 0))
+REQUEST_PROFILE_SLOW_MS = 500
+REQUEST_PROFILE_DIR = BASE_DIR / "profiles"
+REQUEST_PROFILER = os.environ.get("REQUEST_PROFILER", "cprofile")
+
+# Allowed to scrape /api/metrics/ without logging in
+INTERNAL_IPS = os.environ.get("INTERNAL_IPS", "127.0.0.1").split(",")
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=3),
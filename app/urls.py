@@ -24,10 +24,13 @@ from drf_spectacular.views import (
     SpectacularRedocView
 )
 
+from station.views import MetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/station/", include("station.urls", namespace="station")),
     path("api/user/", include("user.urls", namespace="user")),
+    path("api/metrics/", MetricsView.as_view(), name="metrics"),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
@@ -1,6 +1,17 @@
 from django.contrib import admin
 
-from station.models import Bus, Ticket, Trip, Order, Facility
+from station.models import (
+    Bus,
+    Ticket,
+    Trip,
+    Order,
+    Facility,
+    SeatHold,
+    Station,
+    Route,
+    TripSchedule,
+    Task,
+)
 
 
 class TicketInline(admin.TabularInline):
@@ -13,7 +24,17 @@ class OrderAdmin(admin.ModelAdmin):
     inlines = [TicketInline]
 
 
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_at", "locked_by")
+    list_filter = ("status", "name")
+
+
 admin.site.register(Bus)
 admin.site.register(Ticket)
 admin.site.register(Trip)
 admin.site.register(Facility)
+admin.site.register(SeatHold)
+admin.site.register(Station)
+admin.site.register(Route)
+admin.site.register(TripSchedule)
@@ -0,0 +1,95 @@
+"""
+Archival of departed trips.
+
+Trips that departed before a cutoff are moved, with their tickets, into
+ArchivedTrip and ArchivedTicket in short transactions of ``batch_size``
+trips, so the live tables and their indexes only hold the current
+schedule. Orders stay where they are and show their archived tickets
+next to the live ones (see OrderSerializer).
+
+Archived rows keep their ids, partitioning by month is done with the
+indexed ``ArchivedTrip.month`` column.
+"""
+import time as time_module
+from contextvars import ContextVar
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from station.cache import invalidate
+from station.journeys import connection_index
+from station.models import ArchivedTicket, ArchivedTrip, Ticket, Trip
+
+# Set while archived rows are deleted from the live tables, the per-row
+# seat and cache signals have nothing to do for them (see station.signals).
+archiving = ContextVar("archiving", default=False)
+
+
+def _month(departure: datetime):
+    return timezone.localtime(departure).date().replace(day=1)
+
+
+def archive_batch(cutoff: datetime, batch_size: int) -> tuple[int, int]:
+    """
+    Archives up to ``batch_size`` trips departed before ``cutoff``, returns
+    the number of trips and tickets moved.
+    """
+    with transaction.atomic():
+        trips = list(
+            Trip.objects
+            .select_for_update()
+            .filter(departure__lt=cutoff)
+            .order_by("id")
+            .values_list("id", "route_id", "departure", "arrival", "bus_id", "seats_taken")
+            [:batch_size]
+        )
+        if not trips:
+            return 0, 0
+        trip_ids = [trip[0] for trip in trips]
+
+        ArchivedTrip.objects.bulk_create(
+            ArchivedTrip(
+                id=trip_id,
+                route_id=route_id,
+                departure=departure,
+                arrival=arrival,
+                bus_id=bus_id,
+                seats_taken=seats_taken,
+                month=_month(departure),
+            )
+            for trip_id, route_id, departure, arrival, bus_id, seats_taken in trips
+        )
+        tickets = Ticket.objects.filter(trip_id__in=trip_ids)
+        archived_tickets = ArchivedTicket.objects.bulk_create(
+            ArchivedTicket(id=ticket_id, seat=seat, trip_id=trip_id, order_id=order_id)
+            for ticket_id, seat, trip_id, order_id in tickets.values_list(
+                "id", "seat", "trip_id", "order_id"
+            )
+        )
+
+        token = archiving.set(True)
+        try:
+            tickets.delete()
+            # also drops leftover seat holds
+            Trip.objects.filter(id__in=trip_ids).delete()
+        finally:
+            archiving.reset(token)
+
+    invalidate("trip")
+    connection_index.invalidate()
+    return len(trips), len(archived_tickets)
+
+
+def archive_trips(cutoff: datetime, batch_size: int = 500, pause: float = 0):
+    """
+    Archives every trip departed before ``cutoff`` batch by batch, sleeping
+    ``pause`` seconds in between. Yields the (trips, tickets) of each batch.
+    """
+    while True:
+        trips, tickets = archive_batch(cutoff, batch_size)
+        if not trips:
+            return
+        yield trips, tickets
+        if pause:
+            time_module.sleep(pause)
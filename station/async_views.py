@@ -0,0 +1,213 @@
+"""
+Async read endpoints for trips and seat availability.
+
+DRF views are synchronous and hold a worker thread for the whole request
+under an ASGI server. These plain Django async views serve the hottest
+reads with the async ORM instead, and reuse the DRF serializers, the
+authentication and the throttling configured in REST_FRAMEWORK. The trip
+list is built by station.fast_serializers.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from station.fast_serializers import trip_list_data, trip_list_values
+from station.models import Trip
+from station.pagination import TripCursorPagination
+from station.profiling import serialized
+from station.realtime import seat_events, seat_map_snapshot, stream_seat_events
+from station.schedules import materialize_date
+from station.serializers import (
+    TripRetrieveSerializer,
+    TripSearchSerializer,
+)
+from station.views import TripViewSet, _with_availability
+
+
+def _check_access(request):
+    """
+    Authenticates and throttles like a DRF view would, returns an error
+    response or None.
+    """
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    try:
+        user = drf_request.user
+    except exceptions.APIException as error:
+        return JsonResponse({"detail": str(error.detail)}, status=error.status_code)
+
+    if not (user and user.is_authenticated):
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        if not throttle_class().allow_request(drf_request, None):
+            return JsonResponse(
+                {"detail": "Request was throttled."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+
+    request.user = user
+    return None
+
+
+def _error(detail, status_code=status.HTTP_400_BAD_REQUEST):
+    return JsonResponse(detail, status=status_code, safe=False)
+
+
+def _parse_after(value: str):
+    """Parses the ``after=<departure>,<id>`` keyset cursor"""
+    departure, _, trip_id = value.rpartition(",")
+    departure = parse_datetime(departure)
+    if departure is None or not trip_id.isdigit():
+        raise ValueError(value)
+    return departure, int(trip_id)
+
+
+async def trip_list(request):
+    """
+    Trips sorted by (departure, id), optionally filtered like /trips/search/.
+
+    Pages are continued with ``?after=`` set to the ``next`` value of the
+    previous page.
+    """
+    error = await sync_to_async(_check_access)(request)
+    if error:
+        return error
+
+    params = {
+        "source": request.GET.get("from"),
+        "destination": request.GET.get("to"),
+        "date": request.GET.get("date"),
+        "min_seats": request.GET.get("min_seats"),
+        "facilities": request.GET.get("facilities"),
+    }
+    params = {key: value for key, value in params.items() if value}
+    if "facilities" in params:
+        params["facilities"] = params["facilities"].split(",")
+    search = TripSearchSerializer(data=params)
+    if not search.is_valid():
+        return _error(search.errors)
+
+    try:
+        page_size = int(request.GET.get("page_size", TripCursorPagination.page_size))
+        page_size = max(1, min(page_size, TripCursorPagination.max_page_size))
+    except ValueError:
+        return _error({"page_size": "Expected an integer"})
+
+    if "date" in search.validated_data:
+        await sync_to_async(materialize_date)(
+            search.validated_data["date"],
+            search.validated_data.get("source"),
+            search.validated_data.get("destination"),
+        )
+    queryset = TripViewSet._search(
+        _with_availability(Trip.objects.all()), **search.validated_data
+    )
+    if "after" in request.GET:
+        try:
+            departure, trip_id = _parse_after(request.GET["after"])
+        except ValueError:
+            return _error({"after": "Invalid cursor"})
+        queryset = queryset.filter(
+            Q(departure__gt=departure) | Q(departure=departure, id__gt=trip_id)
+        )
+
+    queryset = trip_list_values(queryset.order_by("departure", "id"))[:page_size + 1]
+    trips = [trip async for trip in queryset.aiterator()]
+
+    next_cursor = None
+    if len(trips) > page_size:
+        trips = trips[:page_size]
+        last = trips[-1]
+        next_cursor = f"{last['departure'].isoformat()},{last['id']}"
+
+    return JsonResponse({
+        "next": next_cursor,
+        "results": trip_list_data(trips),
+    })
+
+
+async def _get_trip(queryset, pk):
+    try:
+        return await queryset.aget(pk=pk)
+    except Trip.DoesNotExist:
+        return None
+
+
+def _not_found():
+    return _error(
+        {"detail": "No Trip matches the given query."}, status.HTTP_404_NOT_FOUND
+    )
+
+
+async def trip_detail(request, pk):
+    error = await sync_to_async(_check_access)(request)
+    if error:
+        return error
+
+    trip = await _get_trip(
+        Trip.objects
+        .select_related("bus", "route__source", "route__destination")
+        .prefetch_related("bus__facilities"),
+        pk,
+    )
+    if trip is None:
+        return _not_found()
+    return JsonResponse(serialized(TripRetrieveSerializer(trip)))
+
+
+async def trip_seat_map(request, pk):
+    error = await sync_to_async(_check_access)(request)
+    if error:
+        return error
+
+    seat_map = await seat_map_snapshot(pk)
+    if seat_map is None:
+        return _not_found()
+    return JsonResponse(seat_map)
+
+
+async def trip_seat_events(request, pk):
+    """
+    Server-Sent Events stream of a trip's seat availability: a ``snapshot``
+    event with the seat map, then a ``seats`` event with the ``taken`` and
+    ``released`` seats of every booking or cancellation. Needs an ASGI
+    server, each open stream is one coroutine rather than one thread.
+    """
+    error = await sync_to_async(_check_access)(request)
+    if error:
+        return error
+
+    subscription = seat_events.subscribe(pk)
+    snapshot = await seat_map_snapshot(pk)
+    if snapshot is None:
+        seat_events.unsubscribe(subscription)
+        return _not_found()
+
+    async def stream():
+        events = stream_seat_events(
+            subscription, snapshot, heartbeat=settings.SEAT_EVENTS_HEARTBEAT
+        )
+        async for event_type, data in events:
+            if event_type is None:
+                # keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,187 @@
+"""
+Synthetic timetable data for the benchmark commands.
+
+Everything is written with ``bulk_create`` in batches, so the generators
+scale to millions of rows. Seed ``random`` for a reproducible data set.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from station.models import Bus, Facility, Order, Route, Ticket, Trip
+from station.seat_map import SeatMap
+
+CITIES = [
+    "Kyiv", "Lviv", "Odesa", "Kharkiv", "Dnipro", "Zhytomyr", "Vinnytsia",
+    "Poltava", "Chernihiv", "Uzhhorod", "Ivano-Frankivsk", "Ternopil",
+]
+
+
+def make_user(email="bench@station.com", **extra):
+    return get_user_model().objects.create_user(
+        email=email, password="benchmark", **extra
+    )
+
+
+def make_users(count: int, batch_size: int = 10_000) -> list[int]:
+    """Customers sharing the password "benchmark", returns their ids"""
+    user_model = get_user_model()
+    password = make_password("benchmark")
+    users = user_model.objects.bulk_create(
+        (
+            user_model(email=f"customer{i}@station.com", password=password)
+            for i in range(count)
+        ),
+        batch_size=batch_size,
+    )
+    return [user.pk for user in users]
+
+
+def make_buses(count: int, num_seats: int = 50) -> list[Bus]:
+    facilities = [
+        Facility.objects.get_or_create(name=name)[0]
+        for name in ("WiFi", "WC", "Air conditioning")
+    ]
+    buses = Bus.objects.bulk_create(
+        Bus(info=f"BN {i:06}", num_seats=num_seats) for i in range(count)
+    )
+    through = Bus.facilities.through
+    through.objects.bulk_create(
+        through(bus_id=bus.id, facility_id=facility.id)
+        for bus in buses
+        for facility in random.sample(facilities, k=2)
+    )
+    return buses
+
+
+def make_routes() -> list[Route]:
+    return [
+        Route.intern(source, destination)
+        for source in CITIES
+        for destination in CITIES
+        if source != destination
+    ]
+
+
+def make_trips(count: int, buses, routes, days: int = 30, batch_size: int = 10_000) -> None:
+    start = timezone.now().replace(minute=0, second=0, microsecond=0)
+    for offset in range(0, count, batch_size):
+        batch = []
+        for _ in range(min(batch_size, count - offset)):
+            departure = start + timedelta(minutes=random.randrange(days * 24 * 60))
+            batch.append(
+                Trip(
+                    route=random.choice(routes),
+                    bus=random.choice(buses),
+                    departure=departure,
+                    arrival=departure + timedelta(minutes=random.randrange(60, 600)),
+                )
+            )
+        Trip.objects.bulk_create(batch)
+
+
+@contextmanager
+def _explicit_created_at():
+    # auto_now_add would overwrite the spread out order dates
+    field = Order._meta.get_field("created_at")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def make_orders(
+    tickets: int,
+    user_ids: list[int],
+    per_order: int = 2,
+    occupancy: float = 0.6,
+    days: int = 90,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Sells about ``tickets`` tickets on the existing trips, in orders of
+    ``per_order`` tickets placed over the last ``days`` days by random
+    users. Each trip is filled up to ``occupancy`` of its seats, and its
+    seat map and counter are set accordingly. Returns the tickets sold.
+    """
+    now = timezone.now()
+    sold = 0
+    last_id = 0
+
+    while sold < tickets:
+        trips = list(
+            Trip.objects
+            .filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("id", "bus__num_seats")[:batch_size]
+        )
+        if not trips:
+            break
+        last_id = trips[-1][0]
+
+        orders = []
+        seat_maps = []
+        for trip_id, num_seats in trips:
+            count = min(
+                random.randint(1, max(1, int(num_seats * occupancy))), tickets - sold
+            )
+            if count <= 0:
+                break
+            seats = random.sample(range(1, num_seats + 1), count)
+            sold += count
+            seat_maps.append(
+                Trip(
+                    pk=trip_id,
+                    seat_map=SeatMap.from_seats(num_seats, seats).to_bytes(),
+                    seats_taken=count,
+                )
+            )
+            for start in range(0, count, per_order):
+                order = Order(
+                    user_id=random.choice(user_ids),
+                    created_at=now - timedelta(minutes=random.randrange(days * 24 * 60)),
+                )
+                orders.append((order, seats[start:start + per_order], trip_id))
+
+        with transaction.atomic(), _explicit_created_at():
+            Order.objects.bulk_create([order for order, _, _ in orders])
+            Ticket.objects.bulk_create(
+                Ticket(order_id=order.pk, trip_id=trip_id, seat=seat)
+                for order, seats, trip_id in orders
+                for seat in seats
+            )
+            Trip.objects.bulk_update(seat_maps, ["seat_map", "seats_taken"])
+
+    return sold
+
+
+def populate(
+    trips: int,
+    buses: int | None = None,
+    users: int | None = None,
+    tickets: int | None = None,
+) -> dict:
+    """
+    A full data set for ``trips`` trips, the other counts default to
+    proportions of it. Returns the number of rows created per model.
+    """
+    buses = buses or max(20, trips // 100)
+    users = users or max(10, trips // 50)
+    tickets = trips if tickets is None else tickets
+
+    bus_objects = make_buses(buses)
+    make_trips(trips, bus_objects, make_routes())
+    user_ids = make_users(users)
+    return {
+        "buses": buses,
+        "trips": trips,
+        "users": users,
+        "tickets": make_orders(tickets, user_ids),
+        "orders": Order.objects.count(),
+    }
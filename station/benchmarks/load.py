@@ -0,0 +1,115 @@
+"""
+Concurrent request runners on the Django test clients.
+
+Requests go through the full middleware and view stack in-process, so
+the numbers exclude the network and the application server.
+"""
+import asyncio
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import AsyncClient, Client, override_settings
+from rest_framework.views import APIView
+
+from station.benchmarks.timing import summarize
+
+
+@contextmanager
+def benchmark_settings():
+    """No throttling, which would reject most of the traffic, and no DEBUG"""
+    rest_framework = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_CLASSES": []}
+    with (
+        override_settings(
+            REST_FRAMEWORK=rest_framework, ALLOWED_HOSTS=["testserver"], DEBUG=False
+        ),
+        # views copy the throttle classes when APIView is imported
+        mock.patch.object(APIView, "throttle_classes", []),
+    ):
+        yield
+
+
+@dataclass
+class Call:
+    method: str
+    path: str
+    headers: dict = field(default_factory=dict)
+    data: dict | None = None
+
+    def send(self, client):
+        """The response, or a coroutine of it for an AsyncClient"""
+        kwargs = {"headers": self.headers}
+        if self.data is not None:
+            kwargs.update(data=self.data, content_type="application/json")
+        return getattr(client, self.method.lower())(self.path, **kwargs)
+
+
+def send(call: Call, asynchronous: bool = False):
+    """
+    Sends one call from this thread. Thread sensitive ORM calls of async
+    views run on this thread too, so they share its connection.
+    """
+    if asynchronous:
+        async def send_async():
+            return await call.send(AsyncClient(raise_request_exception=False))
+
+        return async_to_sync(send_async)()
+
+    response = call.send(Client(raise_request_exception=False))
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def _result(latencies, statuses, elapsed) -> dict:
+    summary = summarize(latencies, elapsed)
+    summary["errors"] = sum(1 for code in statuses if code >= 400)
+    summary["statuses"] = dict(sorted(Counter(statuses).items()))
+    return summary
+
+
+def run_sync(calls: list[Call], concurrency: int) -> dict:
+    """Sends ``calls`` from ``concurrency`` threads"""
+    # errors are counted rather than raised
+    client = Client(raise_request_exception=False)
+
+    def send(call):
+        started = time.perf_counter()
+        response = call.send(client)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return time.perf_counter() - started, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, calls))
+    elapsed = time.perf_counter() - started
+    return _result([latency for latency, _ in results], [code for _, code in results], elapsed)
+
+
+async def _run_async(calls, concurrency):
+    client = AsyncClient(raise_request_exception=False)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(call):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await call.send(client)
+            return time.perf_counter() - started, response.status_code
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(send(call) for call in calls))
+    elapsed = time.perf_counter() - started
+    return _result([latency for latency, _ in results], [code for _, code in results], elapsed)
+
+
+def run_async(calls: list[Call], concurrency: int) -> dict:
+    """Sends ``calls`` as up to ``concurrency`` concurrent tasks"""
+    return asyncio.run(_run_async(calls, concurrency))
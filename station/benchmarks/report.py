@@ -0,0 +1,73 @@
+"""
+Run metadata and comparison of two benchmark result files.
+"""
+import os
+import platform
+import subprocess
+import sys
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+# metric: True when higher is better
+METRICS = {
+    "throughput": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "queries": False,
+}
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(**extra) -> dict:
+    return {
+        "commit": _commit(),
+        "created_at": timezone.now().isoformat(),
+        "python": sys.version.split()[0],
+        "django": django.get_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "database": connection.vendor,
+        **extra,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> tuple[list, list]:
+    """
+    Rows of (scenario, metric, before, after, change %) for the scenarios
+    in both results, and the subset that regressed by more than
+    ``threshold`` percent. Any increase in the query count is a regression.
+    """
+    rows = []
+    regressions = []
+    for name, after in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = before.get(metric), after.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            row = (name, metric, old, new, round(change, 1))
+            rows.append(row)
+
+            worse = -change if higher_is_better else change
+            if (metric == "queries" and new > old) or worse > threshold:
+                regressions.append(row)
+    return rows, regressions
@@ -0,0 +1,187 @@
+"""
+One benchmark scenario per station endpoint.
+
+A scenario builds a fresh ``Call`` for every request from a ``Fixture``,
+which picks random trips, buses, routes and orders of the generated data
+and hands out free seats, so concurrent bookings never collide.
+"""
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.db.models import Max, Min
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from station.benchmarks.load import Call
+from station.models import Bus, Order, Route, Trip
+from station.seat_map import SeatMap
+
+
+def _headers(user) -> dict:
+    return {"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+
+class Fixture:
+    def __init__(self, customer, admin):
+        self.customer = _headers(customer)
+        self.admin = _headers(admin)
+        # ids come from bulk_create and are contiguous, no need to load them
+        self.trip_range = Trip.objects.aggregate(low=Min("id"), high=Max("id"))
+        self.bus_range = Bus.objects.aggregate(low=Min("id"), high=Max("id"))
+        self.order_ids = list(
+            Order.objects.filter(user=customer).values_list("id", flat=True)
+        )
+        self.routes = list(
+            Route.objects.values_list("source__name", "destination__name")
+        )
+        self.today = timezone.localdate()
+        self._free_seats = self._iter_free_seats()
+
+    def trip_id(self) -> int:
+        return random.randint(self.trip_range["low"], self.trip_range["high"])
+
+    def bus_id(self) -> int:
+        return random.randint(self.bus_range["low"], self.bus_range["high"])
+
+    def order_id(self) -> int:
+        return random.choice(self.order_ids or [0])
+
+    def route(self) -> tuple[str, str]:
+        return random.choice(self.routes)
+
+    def day(self, start: int = 0, days: int = 30) -> str:
+        """A random date ``start`` to ``start + days`` days from today"""
+        offset = start + random.randrange(days)
+        return (self.today + timedelta(days=offset)).isoformat()
+
+    def _iter_free_seats(self, batch_size: int = 100):
+        # fetched in batches rather than with .iterator(), an open cursor
+        # would hold a lock on the shared in-memory test database
+        last_id = self.trip_id() - 1
+        while True:
+            trips = list(
+                Trip.objects
+                .filter(pk__gt=last_id, departure__gt=timezone.now())
+                .order_by("pk")
+                .values_list("id", "bus__num_seats", "seat_map")[:batch_size]
+            )
+            if not trips:
+                return
+            last_id = trips[-1][0]
+            for trip_id, num_seats, seat_map in trips:
+                seat_map = SeatMap(num_seats, bytes(seat_map))
+                for seat in range(1, num_seats + 1):
+                    if not seat_map.is_taken(seat):
+                        yield trip_id, seat
+
+    def free_seats(self, count: int) -> list[tuple[int, int]]:
+        """``count`` seats not sold or handed out before, on one trip"""
+        seats = [next(self._free_seats)]
+        while len(seats) < count:
+            trip_id, seat = next(self._free_seats)
+            if trip_id != seats[0][0]:
+                seats = [(trip_id, seat)]
+                continue
+            seats.append((trip_id, seat))
+        return seats
+
+    def get(self, name, args=None, admin=False, **params) -> Call:
+        path = reverse(f"station:{name}", args=args)
+        if params:
+            path += "?" + urlencode(params)
+        return Call("GET", path, self.admin if admin else self.customer)
+
+    def post(self, name, data, admin=False) -> Call:
+        return Call(
+            "POST", reverse(f"station:{name}"), self.admin if admin else self.customer, data
+        )
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[Fixture], Call]
+    asynchronous: bool = False
+
+
+def _order(fixture: Fixture) -> Call:
+    # orders fall under the default IsAdminOrIfAuthenticatedReadOnly
+    return fixture.post(
+        "order-list",
+        {"tickets": [{"trip": trip, "seat": seat} for trip, seat in fixture.free_seats(2)]},
+        admin=True,
+    )
+
+
+def _hold(fixture: Fixture) -> Call:
+    seats = fixture.free_seats(2)
+    return fixture.post(
+        "hold-list", {"trip": seats[0][0], "seats": [seat for _, seat in seats]}
+    )
+
+
+def _export(fixture: Fixture) -> Call:
+    day = fixture.day(start=-30)
+    return fixture.get("order-export", admin=True, **{"from": day, "to": day})
+
+
+def _search(fixture: Fixture, name: str) -> Call:
+    source, destination = fixture.route()
+    return fixture.get(name, **{"from": source, "to": destination, "date": fixture.day()})
+
+
+SCENARIOS = [
+    Scenario("facility-list", lambda f: f.get("facility-list")),
+    Scenario("bus-list", lambda f: f.get("bus-list")),
+    Scenario("bus-detail", lambda f: f.get("bus-detail", [f.bus_id()])),
+    Scenario("trip-list", lambda f: f.get("trip-list")),
+    Scenario("trip-detail", lambda f: f.get("trip-detail", [f.trip_id()])),
+    Scenario("trip-search", lambda f: _search(f, "trip-search")),
+    Scenario("trip-seat-map", lambda f: f.get("trip-seat-map", [f.trip_id()])),
+    Scenario(
+        "trip-seat-maps",
+        lambda f: f.get(
+            "trip-seat-maps", ids=",".join(str(f.trip_id()) for _ in range(20))
+        ),
+    ),
+    Scenario("route-list", lambda f: f.get("route-list")),
+    Scenario("route-list-by-day", lambda f: _search(f, "route-list")),
+    Scenario("schedule-list", lambda f: f.get("schedule-list")),
+    Scenario(
+        "journey-list",
+        lambda f: f.get("journey-list", **dict(zip(("from", "to"), f.route()))),
+    ),
+    Scenario("order-list", lambda f: f.get("order-list")),
+    Scenario("order-detail", lambda f: f.get("order-detail", [f.order_id()])),
+    # OrderSerializer.create
+    Scenario("order-create", _order),
+    Scenario("hold-create", _hold),
+    Scenario("order-export", _export),
+    Scenario("async-trip-list", lambda f: f.get("async-trip-list"), asynchronous=True),
+    Scenario(
+        "async-trip-detail",
+        lambda f: f.get("async-trip-detail", [f.trip_id()]),
+        asynchronous=True,
+    ),
+    Scenario(
+        "async-trip-seat-map",
+        lambda f: f.get("async-trip-seat-map", [f.trip_id()]),
+        asynchronous=True,
+    ),
+]
+
+
+def fixture_users():
+    """The customer the scenarios act as (one with orders) and an admin"""
+    user_model = get_user_model()
+    customers = user_model.objects.filter(is_staff=False).order_by("pk")
+    customer = customers.filter(order__isnull=False).first() or customers.first()
+    admin, _ = user_model.objects.get_or_create(
+        email="bench-admin@station.com", defaults={"is_staff": True}
+    )
+    return customer, admin
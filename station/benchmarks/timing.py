@@ -0,0 +1,15 @@
+import statistics
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    """Latency percentiles in milliseconds and throughput in requests/s"""
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "throughput": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p95_ms": round(quantiles[94] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
@@ -0,0 +1,149 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from station.models import Order, SeatHold, Ticket, Trip
+from station.seat_map import seats_changed
+
+
+BOOKED = "booked"
+CONFLICT = "conflict"
+INVALID = "invalid"
+# free, but not booked because other seats of an all-or-nothing batch failed
+AVAILABLE = "available"
+
+
+def _seats_by_trip(tickets_data) -> dict[int, list[int]]:
+    seats_by_trip = defaultdict(list)
+    for ticket_data in tickets_data:
+        trip = ticket_data["trip"]
+        seats_by_trip[getattr(trip, "pk", trip)].append(ticket_data["seat"])
+    return seats_by_trip
+
+
+def check_seats(user_id, seats_by_trip) -> tuple[dict[int, Trip], list[dict]]:
+    """
+    Lock the trips with their buses and check every requested seat.
+
+    Returns the locked trips and a result per seat, with its ``status``
+    (BOOKED, CONFLICT or INVALID) and a ``detail`` for the failures. Seats
+    held by other users count as taken. The seats that can be booked are
+    taken in the seat maps of the returned trips, which are not saved.
+    Must be called inside a transaction.
+    """
+    trips = Trip.lock_for_seats(seats_by_trip)
+    held = set(
+        SeatHold.objects
+        .filter(trip_id__in=seats_by_trip, expires_at__gt=timezone.now())
+        .exclude(user_id=user_id)
+        .values_list("trip_id", "seat")
+    )
+
+    results = []
+    for trip_id, seats in seats_by_trip.items():
+        trip = trips.get(trip_id)
+        seat_map = trip.get_seat_map() if trip is not None else None
+        for seat in seats:
+            result = {"trip": trip_id, "seat": seat, "status": BOOKED}
+            results.append(result)
+            if trip is None:
+                result.update(status=INVALID, detail=f"Trip {trip_id} does not exist")
+                continue
+            try:
+                Ticket.validate_seat(seat, trip.bus.num_seats, serializers.ValidationError)
+            except serializers.ValidationError as error:
+                result.update(status=INVALID, detail=str(error.detail["seat"][0]))
+                continue
+            if seat_map.is_taken(seat) or (trip_id, seat) in held:
+                result.update(
+                    status=CONFLICT,
+                    detail=f"seat {seat} on trip {trip_id} is already taken",
+                )
+                continue
+            seat_map.take(seat)
+
+        if trip is not None:
+            trip.set_seat_map(seat_map)
+
+    return trips, results
+
+
+def _insert_tickets(order, trips, booked) -> list[Ticket]:
+    tickets = [
+        Ticket(order=order, trip_id=result["trip"], seat=result["seat"])
+        for result in booked
+    ]
+    try:
+        with transaction.atomic():
+            tickets = Ticket.objects.bulk_create(tickets)
+    except IntegrityError:
+        # seat maps out of sync with the ticket table, the
+        # unique_ticket_seat_trip constraint still holds the line
+        raise serializers.ValidationError(
+            {"seat": "One of the requested seats is already taken"}
+        )
+
+    booked_trips = {result["trip"] for result in booked}
+    Trip.objects.bulk_update(
+        [trip for trip_id, trip in trips.items() if trip_id in booked_trips],
+        ["seat_map", "seats_taken"],
+    )
+    return tickets
+
+
+def _seats_changed(booked) -> None:
+    for trip_id, seats in _seats_by_trip(booked).items():
+        seats_changed.send(sender=Trip, trip_id=trip_id, taken=seats, released=[])
+
+
+def book_tickets(order: Order, tickets_data) -> list[Ticket]:
+    """
+    Create the tickets of an order with a single INSERT.
+
+    ``tickets_data`` is a list of dicts with ``trip`` (Trip or id) and
+    ``seat``. All trips are locked and validated together, so the cost
+    does not grow with the number of seats per trip. Seats held by other
+    users are treated as taken.
+    """
+    with transaction.atomic():
+        trips, results = check_seats(order.user_id, _seats_by_trip(tickets_data))
+        for result in results:
+            if result["status"] != BOOKED:
+                field = "seat" if result["trip"] in trips else "trip"
+                raise serializers.ValidationError({field: result["detail"]})
+
+        tickets = _insert_tickets(order, trips, results)
+
+    _seats_changed(results)
+    return tickets
+
+
+def book_batch(user, bookings, partial: bool = False) -> tuple[Order | None, list[dict]]:
+    """
+    Book the ``seats`` of many ``trip`` ids in one order.
+
+    Returns the order, or None if nothing was booked, and the result of
+    every seat, see ``check_seats``. Unless ``partial``, one failed seat
+    fails the whole batch and the free seats are reported as AVAILABLE.
+    The queries do not depend on the number of trips or seats.
+    """
+    seats_by_trip = defaultdict(list)
+    for booking in bookings:
+        seats_by_trip[booking["trip"]].extend(booking["seats"])
+
+    with transaction.atomic():
+        trips, results = check_seats(user.pk, seats_by_trip)
+        booked = [result for result in results if result["status"] == BOOKED]
+
+        if not booked or (not partial and len(booked) < len(results)):
+            for result in booked:
+                result["status"] = AVAILABLE
+            return None, results
+
+        order = Order.objects.create(user=user)
+        _insert_tickets(order, trips, booked)
+
+    _seats_changed(booked)
+    return order, results
@@ -0,0 +1,113 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from station.profiling import record_cache
+
+GENERATION_KEY = "station:generation:{}"
+RESPONSE_KEY = "station:response:{}:{}"
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    """Weak comparison, which RFC 9110 asks for with If-None-Match"""
+    etags = parse_etags(if_none_match)
+    if "*" in etags:
+        return True
+    return etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in etags}
+
+
+def response_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _bump(namespaces) -> None:
+    cache = response_cache()
+    for namespace in namespaces:
+        key = GENERATION_KEY.format(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def invalidate(*namespaces: str) -> None:
+    """
+    Drop every cached response that depends on one of ``namespaces``.
+
+    Entries are not deleted, the namespace generation that is part of their
+    key moves on. It is bumped again on commit, so a response cached from a
+    concurrent read of the old rows does not survive the transaction.
+    """
+    _bump(namespaces)
+    transaction.on_commit(lambda: _bump(namespaces))
+
+
+def _generations(namespaces) -> str:
+    keys = [GENERATION_KEY.format(namespace) for namespace in namespaces]
+    stored = response_cache().get_many(keys)
+    return ".".join(str(stored.get(key, 0)) for key in keys)
+
+
+class CachedResponseMixin:
+    """
+    Cache the serialized data of ``cached_actions`` and answer
+    conditional requests with 304 Not Modified.
+
+    ``get_cache_namespaces`` lists what a response depends on, see
+    station.signals for the writes that invalidate each namespace.
+    """
+    cached_actions = ("list", "retrieve")
+    cache_namespaces = ()
+
+    def get_cache_namespaces(self):
+        return self.cache_namespaces
+
+    def _cache_key(self, request) -> str:
+        params = sorted(request.query_params.lists())
+        fingerprint = hashlib.sha1(
+            json.dumps([request.path, params]).encode()
+        ).hexdigest()
+        return RESPONSE_KEY.format(
+            _generations(self.get_cache_namespaces()), fingerprint
+        )
+
+    def _cached(self, handler, request, *args, **kwargs):
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+        if not timeout or self.action not in self.cached_actions:
+            return handler(request, *args, **kwargs)
+
+        key = self._cache_key(request)
+        cached = response_cache().get(key)
+        record_cache(hit=cached is not None)
+
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            body = json.dumps(response.data, sort_keys=True, default=str)
+            etag = quote_etag(hashlib.sha1(body.encode()).hexdigest())
+            cached = (etag, response.data)
+            response_cache().set(key, cached, timeout)
+
+        etag, data = cached
+        if _etag_matches(etag, request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(super().retrieve, request, *args, **kwargs)
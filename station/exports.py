@@ -0,0 +1,104 @@
+"""
+Streaming export of sold tickets for reconciliation.
+
+Rows are read with a server-side cursor and written one at a time as CSV
+or NDJSON, so memory use does not depend on the size of the export. Rows
+are plain tuples from ``values_list``, no models or serializers are built.
+"""
+import csv
+import itertools
+import json
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from station.models import ArchivedTicket, Ticket
+
+COLUMNS = (
+    "ticket_id",
+    "order_id",
+    "order_created_at",
+    "user_email",
+    "trip_id",
+    "source",
+    "destination",
+    "departure",
+    "seat",
+)
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _rows(queryset, date_from, date_to):
+    if date_from:
+        queryset = queryset.filter(
+            order__created_at__gte=timezone.make_aware(datetime.combine(date_from, time.min))
+        )
+    if date_to:
+        queryset = queryset.filter(
+            order__created_at__lt=timezone.make_aware(
+                datetime.combine(date_to + timedelta(days=1), time.min)
+            )
+        )
+
+    return (
+        queryset
+        .order_by("order__created_at", "order_id", "id")
+        .values_list(
+            "id",
+            "order_id",
+            "order__created_at",
+            "order__user__email",
+            "trip_id",
+            "trip__route__source__name",
+            "trip__route__destination__name",
+            "trip__departure",
+            "seat",
+        )
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+
+
+def ticket_rows(date_from: date | None = None, date_to: date | None = None):
+    """
+    Tickets of the orders created between ``date_from`` and ``date_to``
+    (both inclusive): archived tickets first (see station.archive), then
+    the live ones, each in order creation order.
+    """
+    return itertools.chain(
+        _rows(ArchivedTicket.objects.all(), date_from, date_to),
+        _rows(Ticket.objects.all(), date_from, date_to),
+    )
+
+
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class _Line:
+    """File-like target for csv.writer that returns the written line"""
+
+    def write(self, value):
+        return value
+
+
+def to_csv(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow([_isoformat(value) for value in row])
+
+
+def to_ndjson(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(COLUMNS, map(_isoformat, row)))) + "\n"
+
+
+def export(file_format: str, rows):
+    if file_format == "csv":
+        return to_csv(rows)
+    return to_ndjson(rows)
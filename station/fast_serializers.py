@@ -0,0 +1,111 @@
+"""
+Lean serializers for the hottest list endpoints.
+
+Each function builds, from ``values()`` rows, exactly the data the
+matching DRF serializer returns for model instances, without creating
+models or serializer fields per row. Queries are shaped like the ones
+the serializers' querysets run, so rows come back in the same order.
+``manage.py bench_serializers`` checks the output is identical.
+"""
+from collections import defaultdict
+
+from django.db.models import F
+from django.utils import timezone
+
+from station.images import variant_urls
+from station.models import Facility
+from station.profiling import timed
+from station.seat_map import SeatMap
+
+
+def _datetime(value, zone):
+    """A datetime as serializers.DateTimeField represents it in ``zone``"""
+    if value is None:
+        return None
+    value = value.astimezone(zone).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def trip_list_values(queryset):
+    """
+    Rows for ``trip_list_data`` of trips annotated with
+    ``tickets_available``, see station.views._with_availability.
+    """
+    return queryset.values(
+        "id",
+        "departure",
+        "arrival",
+        "tickets_available",
+        source=F("route__source__name"),
+        destination=F("route__destination__name"),
+        bus_info=F("bus__info"),
+        bus_num_seats=F("bus__num_seats"),
+    )
+
+
+@timed("serializer")
+def trip_list_data(rows) -> list[dict]:
+    """TripListSerializer(many=True).data of ``trip_list_values`` rows"""
+    # looked up once, it's a thread/task local
+    zone = timezone.get_current_timezone()
+    return [
+        {
+            "id": row["id"],
+            "source": row["source"],
+            "destination": row["destination"],
+            "departure": _datetime(row["departure"], zone),
+            "arrival": _datetime(row["arrival"], zone),
+            "bus_info": row["bus_info"],
+            "bus_num_seats": row["bus_num_seats"],
+            "tickets_available": row["tickets_available"],
+        }
+        for row in rows
+    ]
+
+
+@timed("serializer")
+def bus_list_data(queryset) -> list[dict]:
+    """BusListSerializer(many=True).data of a Bus queryset"""
+    buses = list(
+        queryset.prefetch_related(None).values_list(
+            "id", "info", "num_seats", "image_variants"
+        )
+    )
+
+    facilities = defaultdict(list)
+    if buses:
+        for bus_id, name in Facility.objects.filter(
+            buses__in=[bus_id for bus_id, *_ in buses]
+        ).values_list("buses", "name"):
+            facilities[bus_id].append(name)
+
+    return [
+        {
+            "id": bus_id,
+            "is_small": num_seats <= 20,
+            "info": info,
+            "num_seats": num_seats,
+            "facilities": facilities[bus_id],
+            "images": variant_urls(image_variants),
+        }
+        for bus_id, info, num_seats, image_variants in buses
+    ]
+
+
+def seat_map_values(queryset):
+    """Rows for ``seat_map_data``"""
+    return queryset.values_list("id", "bus__num_seats", "seats_taken", "seat_map")
+
+
+@timed("serializer")
+def seat_map_data(row) -> dict:
+    """TripSeatMapSerializer(trip).data of a ``seat_map_values`` row"""
+    trip_id, num_seats, seats_taken, seat_map = row
+    return {
+        "id": trip_id,
+        "num_seats": num_seats,
+        "seats_taken": seats_taken,
+        "seat_map": SeatMap(num_seats, bytes(seat_map)).to_base64(),
+    }
@@ -0,0 +1,146 @@
+"""
+Safe retries of the POSTs that book orders.
+
+A client sends an ``Idempotency-Key`` header with a value that is unique
+per operation, and sends the same value again when it retries. The first
+request stores the key with a fingerprint of the request before the view
+runs. The view's response is stored in the same transaction as the
+view's writes. A retry gets the stored response back, marked with
+``Idempotent-Replayed: true``, and the view does not run again.
+
+Keys are scoped to the user. A key reused with a different request gets
+422. While the first request is running, a retry gets 409. If the view
+raises, the key is released so a retry runs it again.
+
+A key left without a response after ``IDEMPOTENCY_KEY_LOCK_TIMEOUT``
+belongs to a request that died before its commit, and a new request may
+take it over. Keys expire after ``IDEMPOTENCY_KEY_TTL`` and are deleted
+by `manage.py sweep_idempotency_keys`.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from station.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    HEADER,
+    location=OpenApiParameter.HEADER,
+    description="Unique per order, a retry with the same key returns the "
+    "original response instead of booking again",
+)
+
+
+def fingerprint(request) -> str:
+    body = json.dumps(
+        [request.method, request.path, request.data], sort_keys=True, default=str
+    )
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def claim(user, key: str, request_fingerprint: str) -> tuple[bool, IdempotencyKey]:
+    """
+    Stores the key, returns (True, key), or (False, stored key) when a
+    request with it was made already.
+    """
+    while True:
+        now = timezone.now()
+        # retries are answered with this one query
+        stored = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if stored is None:
+            try:
+                with transaction.atomic():
+                    return True, IdempotencyKey.objects.create(
+                        user=user,
+                        key=key,
+                        fingerprint=request_fingerprint,
+                        expires_at=now + settings.IDEMPOTENCY_KEY_TTL,
+                    )
+            except IntegrityError:
+                # a concurrent request got it first
+                continue
+
+        abandoned = (
+            stored.status_code is None
+            and stored.created_at <= now - settings.IDEMPOTENCY_KEY_LOCK_TIMEOUT
+        )
+        if stored.expires_at <= now or abandoned:
+            IdempotencyKey.objects.filter(pk=stored.pk).delete()
+            continue
+        return False, stored
+
+
+def replay(stored: IdempotencyKey, request_fingerprint: str) -> Response:
+    if stored.fingerprint != request_fingerprint:
+        return Response(
+            {"detail": f"{HEADER} was already used for a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if stored.status_code is None:
+        return Response(
+            {"detail": f"A request with this {HEADER} is in progress"},
+            status=status.HTTP_409_CONFLICT,
+        )
+    return Response(
+        stored.response,
+        status=stored.status_code,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+class IdempotentMixin:
+    """
+    Lets the handlers passed to ``_idempotent`` be retried safely with an
+    ``Idempotency-Key`` header, requests without one are not affected.
+    """
+
+    def _idempotent(self, handler, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return handler(request, *args, **kwargs)
+        if not 0 < len(key) <= 255:
+            raise ValidationError({HEADER: "Must be 1 to 255 characters long."})
+
+        request_fingerprint = fingerprint(request)
+        claimed, stored = claim(request.user, key, request_fingerprint)
+        if not claimed:
+            return replay(stored, request_fingerprint)
+
+        try:
+            with transaction.atomic():
+                response = handler(request, *args, **kwargs)
+                if status.is_server_error(response.status_code):
+                    stored.delete()
+                else:
+                    stored.status_code = response.status_code
+                    stored.response = response.data
+                    stored.save(update_fields=["status_code", "response"])
+        except Exception:
+            stored.delete()
+            raise
+        return response
+
+
+def sweep_expired_keys(batch_size: int = 10_000) -> int:
+    """
+    Delete expired keys in short batches, returns the number removed.
+    """
+    removed = 0
+    while True:
+        expired = list(
+            IdempotencyKey.objects
+            .filter(expires_at__lte=timezone.now())
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not expired:
+            return removed
+        removed += IdempotencyKey.objects.filter(pk__in=expired).delete()[0]
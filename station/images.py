@@ -0,0 +1,171 @@
+"""
+Resized and re-encoded variants of bus images.
+
+An upload only stores the original, ``process_bus_image`` then runs on
+``image_pipeline``, a pool of worker threads (Pillow releases the GIL
+while it resizes and encodes), and writes every ``BUS_IMAGE_VARIANTS``
+size in each ``BUS_IMAGE_FORMATS`` encoding next to the original. Files
+are named after a hash of their content, so they never change and can be
+served with a far-future, immutable Cache-Control.
+
+``Bus.image_variants`` maps each variant to its size and the storage
+names of its encodings, it stays empty until the worker is done.
+"""
+import hashlib
+import logging
+import pathlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connections
+from PIL import Image, ImageOps, features
+
+from station.cache import invalidate
+from station.models import Bus
+
+logger = logging.getLogger(__name__)
+
+# format: (Pillow format name, extension, save options)
+ENCODINGS = {
+    "avif": ("AVIF", "avif", {"quality": 60}),
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+
+def available_formats() -> list[str]:
+    """``BUS_IMAGE_FORMATS`` this Pillow build can encode"""
+    return [
+        name
+        for name in settings.BUS_IMAGE_FORMATS
+        if name == "jpeg" or features.check(name)
+    ]
+
+
+def _encode(image: Image.Image, name: str) -> bytes:
+    format_name, _, options = ENCODINGS[name]
+    if name == "jpeg" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, format_name, **options)
+    return buffer.getvalue()
+
+
+def _save(original: str, variant: str, name: str, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    path = pathlib.PurePosixPath(original)
+    target = str(path.with_name(f"{path.stem}-{variant}-{digest}.{ENCODINGS[name][1]}"))
+    if not default_storage.exists(target):
+        target = default_storage.save(target, ContentFile(content))
+    return target
+
+
+def render_variants(original: str) -> dict:
+    """Writes the variants of the image at ``original`` in storage"""
+    with default_storage.open(original) as file:
+        source = ImageOps.exif_transpose(Image.open(file))
+        source.load()
+    if source.mode not in ("RGB", "RGBA"):
+        source = source.convert("RGBA" if "transparency" in source.info else "RGB")
+
+    formats = available_formats()
+    variants = {}
+    for variant, size in settings.BUS_IMAGE_VARIANTS.items():
+        image = source.copy()
+        # keeps the aspect ratio and never upscales
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        variants[variant] = {"width": image.width, "height": image.height}
+        for name in formats:
+            variants[variant][name] = _save(original, variant, name, _encode(image, name))
+    return variants
+
+
+def delete_variants(variants: dict) -> None:
+    for variant in variants.values():
+        for name in ENCODINGS:
+            if variant.get(name):
+                default_storage.delete(variant[name])
+
+
+def process_bus_image(bus_id: int) -> dict | None:
+    """
+    Renders the variants of the current image of a bus. They are dropped
+    if the image was replaced meanwhile, its own job renders the new one.
+    """
+    original = Bus.objects.filter(pk=bus_id).values_list("image", flat=True).first()
+    if not original:
+        return None
+
+    variants = render_variants(original)
+    updated = Bus.objects.filter(pk=bus_id, image=original).update(
+        image_variants=variants
+    )
+    if not updated:
+        delete_variants(variants)
+        return None
+    # update() skips the signals
+    invalidate("bus")
+    return variants
+
+
+def variant_urls(variants: dict) -> dict:
+    """``Bus.image_variants`` with URLs in place of the storage names"""
+    return {
+        variant: {
+            key: value if key in ("width", "height") else default_storage.url(value)
+            for key, value in files.items()
+        }
+        for variant, files in variants.items()
+    }
+
+
+class ImagePipeline:
+    """
+    Runs ``process_bus_image`` on ``BUS_IMAGE_WORKERS`` threads, or inline
+    when it is 0.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, bus_id: int) -> None:
+        workers = settings.BUS_IMAGE_WORKERS
+        if not workers:
+            self._run(bus_id)
+            return
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="bus-images"
+                )
+        self._executor.submit(self._run_in_worker, bus_id)
+
+    @staticmethod
+    def _run(bus_id):
+        try:
+            process_bus_image(bus_id)
+        except Exception:
+            logger.exception("Could not process the image of bus %s", bus_id)
+
+    def _run_in_worker(self, bus_id):
+        close_old_connections()
+        try:
+            self._run(bus_id)
+        finally:
+            # the worker threads outlive the jobs
+            connections.close_all()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+image_pipeline = ImagePipeline()
@@ -0,0 +1,207 @@
+"""
+Earliest-arrival journey planning over the trip timetable.
+
+Every trip with a known arrival is a *connection* (departure, arrival,
+from station, to station). Connections are kept in memory sorted by
+departure, and a journey is found with the Connection Scan Algorithm:
+one pass over the connections departing after the requested time, which
+stops as soon as nothing can improve the arrival at the target.
+"""
+import bisect
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from station.models import Trip
+
+
+@dataclass(frozen=True, order=True)
+class Connection:
+    departure: float
+    arrival: float
+    source_id: int
+    destination_id: int
+    trip_id: int
+
+
+def _timestamp(value: datetime) -> float:
+    return value.timestamp()
+
+
+class ConnectionIndex:
+    """
+    Process-local, sorted index of upcoming connections.
+
+    Trip writes in this process are applied incrementally (see
+    station.signals); the whole index is reloaded once it is older than
+    ``JOURNEY_INDEX_MAX_AGE`` to pick up writes made by other processes.
+    Writers replace the connection list instead of mutating it, so
+    searches scan a consistent snapshot without holding the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._connections: list[Connection] = []
+        self._by_trip: dict[int, Connection] = {}
+        self._free_seats: dict[int, int] = {}
+        self._loaded_at = None
+
+    def _connection_for(self, trip_id, departure, arrival, source_id, destination_id):
+        return Connection(
+            _timestamp(departure),
+            _timestamp(arrival),
+            source_id,
+            destination_id,
+            trip_id,
+        )
+
+    def load(self) -> None:
+        horizon = timezone.now() - timedelta(days=1)
+        rows = (
+            Trip.objects
+            .filter(arrival__isnull=False, departure__gte=horizon)
+            .annotate(free=F("bus__num_seats") - F("seats_taken"))
+            .values_list(
+                "id",
+                "departure",
+                "arrival",
+                "route__source_id",
+                "route__destination_id",
+                "free",
+            )
+            .iterator(chunk_size=10_000)
+        )
+
+        connections = []
+        free_seats = {}
+        for trip_id, departure, arrival, source_id, destination_id, free in rows:
+            connections.append(
+                self._connection_for(trip_id, departure, arrival, source_id, destination_id)
+            )
+            free_seats[trip_id] = free
+        connections.sort()
+
+        with self._lock:
+            self._connections = connections
+            self._by_trip = {connection.trip_id: connection for connection in connections}
+            self._free_seats = free_seats
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def ensure_loaded(self) -> None:
+        max_age = settings.JOURNEY_INDEX_MAX_AGE.total_seconds()
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > max_age:
+            self.load()
+
+    def _remove(self, connections: list, trip_id: int) -> None:
+        connection = self._by_trip.pop(trip_id, None)
+        if connection is not None:
+            del connections[bisect.bisect_left(connections, connection)]
+        self._free_seats.pop(trip_id, None)
+
+    def update_trip(self, trip_id: int) -> None:
+        """Re-reads a committed trip, one that is gone is removed"""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            trip = (
+                Trip.objects
+                .select_related("route", "bus")
+                .filter(pk=trip_id)
+                .first()
+            )
+            connections = self._connections.copy()
+            self._remove(connections, trip_id)
+
+            if trip is not None and trip.arrival is not None:
+                connection = self._connection_for(
+                    trip.pk,
+                    trip.departure,
+                    trip.arrival,
+                    trip.route.source_id,
+                    trip.route.destination_id,
+                )
+                bisect.insort(connections, connection)
+                self._by_trip[trip.pk] = connection
+                self._free_seats[trip.pk] = trip.bus.num_seats - trip.seats_taken
+
+            self._connections = connections
+
+    def remove_trip(self, trip_id: int) -> None:
+        with self._lock:
+            if self._loaded_at is not None and trip_id in self._by_trip:
+                connections = self._connections.copy()
+                self._remove(connections, trip_id)
+                self._connections = connections
+
+    def seats_changed(self, trip_id: int, delta: int) -> None:
+        with self._lock:
+            if trip_id in self._free_seats:
+                self._free_seats[trip_id] -= delta
+
+    def earliest_arrival(
+        self,
+        source_id: int,
+        destination_id: int,
+        departure: datetime,
+        min_transfer: timedelta,
+        seats: int = 1,
+        horizon: timedelta = timedelta(days=2),
+    ) -> list[int] | None:
+        """
+        Trip ids of the journey reaching ``destination_id`` the earliest,
+        or None when it can't be reached within ``horizon``.
+        """
+        self.ensure_loaded()
+
+        start = _timestamp(departure)
+        end = _timestamp(departure + horizon)
+        transfer = min_transfer.total_seconds()
+
+        connections = self._connections
+        free_seats = self._free_seats
+        first = bisect.bisect_left(connections, Connection(start, 0, 0, 0, 0))
+
+        # the transfer time is not needed before the first leg
+        earliest = {source_id: start - transfer}
+        reached_by = {}
+        for index in range(first, len(connections)):
+            connection = connections[index]
+            if connection.departure > end:
+                break
+            if connection.departure >= earliest.get(destination_id, math.inf):
+                break
+
+            ready = earliest.get(connection.source_id)
+            if ready is None or connection.departure < ready + transfer:
+                continue
+            if free_seats.get(connection.trip_id, 0) < seats:
+                continue
+            if connection.arrival < earliest.get(connection.destination_id, math.inf):
+                earliest[connection.destination_id] = connection.arrival
+                reached_by[connection.destination_id] = connection
+
+        if destination_id not in reached_by:
+            return None
+
+        legs = []
+        station_id = destination_id
+        while station_id != source_id:
+            connection = reached_by[station_id]
+            legs.append(connection.trip_id)
+            station_id = connection.source_id
+        legs.reverse()
+        return legs
+
+
+connection_index = ConnectionIndex()
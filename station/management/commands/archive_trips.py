@@ -0,0 +1,58 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from station.archive import archive_trips
+
+
+def _date(value: str):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+class Command(BaseCommand):
+    help = (
+        "Move trips that departed before a cutoff, with their tickets, to "
+        "the archive tables in small batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            type=_date,
+            help="Archive trips departed before this date (YYYY-MM-DD), "
+                 "ARCHIVE_TRIPS_AFTER ago by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of trips moved per transaction.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to sleep between batches.",
+        )
+
+    def handle(self, *args, **options):
+        if options["before"]:
+            cutoff = timezone.make_aware(datetime.combine(options["before"], time.min))
+        else:
+            cutoff = timezone.now() - settings.ARCHIVE_TRIPS_AFTER
+
+        total_trips = total_tickets = 0
+        for trips, tickets in archive_trips(cutoff, options["batch_size"], options["pause"]):
+            total_trips += trips
+            total_tickets += tickets
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Archived {trips} trip(s), {tickets} ticket(s)")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {total_trips} trip(s) and {total_tickets} ticket(s) "
+                f"departed before {cutoff:%Y-%m-%d %H:%M}"
+            )
+        )
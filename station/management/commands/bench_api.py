@@ -0,0 +1,172 @@
+import contextlib
+import json
+import os
+import random
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from station.benchmarks import data, load, report
+from station.benchmarks.scenarios import SCENARIOS, Fixture, fixture_users
+from station.models import Bus, Order, Ticket, Trip
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every station endpoint under concurrent load on a "
+        "generated data set: latency percentiles, throughput and query "
+        "counts, written as JSON and optionally compared with a baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--trips", type=int, default=10_000,
+            help="Data set scale, the other counts default to proportions of it.",
+        )
+        parser.add_argument("--buses", type=int)
+        parser.add_argument("--users", type=int)
+        parser.add_argument("--tickets", type=int)
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Requests per scenario."
+        )
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--scenarios",
+            help="Comma separated scenario names, all by default: "
+            + ", ".join(scenario.name for scenario in SCENARIOS),
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--db",
+            default=os.path.join(tempfile.gettempdir(), "station-bench.sqlite3"),
+            help="SQLite file for the benchmark database, the shared in-memory "
+            "test database can't take concurrent writes.",
+        )
+        parser.add_argument(
+            "--keep-db",
+            action="store_true",
+            help="Keep the benchmark database and its data for the next run.",
+        )
+        parser.add_argument("-o", "--output", help="Write the results to this file.")
+        parser.add_argument(
+            "--compare", help="Results file of a previous run to compare with."
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=10,
+            help="Percent change counted as a regression by --compare.",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = SCENARIOS
+        if options["scenarios"]:
+            names = options["scenarios"].split(",")
+            unknown = set(names) - {scenario.name for scenario in SCENARIOS}
+            if unknown:
+                raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in SCENARIOS if scenario.name in names]
+
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                baseline = json.load(file)
+
+        random.seed(options["seed"])
+        old_name = connection.settings_dict["NAME"]
+        if connection.vendor == "sqlite":
+            connection.settings_dict["TEST"]["NAME"] = options["db"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keep_db"]
+        )
+        try:
+            with load.benchmark_settings():
+                results = self.run(scenarios, options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keep_db"]
+            )
+            if connection.vendor == "sqlite" and not options["keep_db"]:
+                for suffix in ("-wal", "-shm"):
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(options["db"] + suffix)
+
+        content = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(content + "\n")
+        else:
+            self.stdout.write(content)
+
+        for name, summary in results["scenarios"].items():
+            self.stderr.write(
+                f"{name:<20} {summary['throughput']:>8} req/s  "
+                f"p50 {summary['p50_ms']:>8} ms  p95 {summary['p95_ms']:>8} ms  "
+                f"{summary['queries']:>3} queries  {summary['errors']} errors"
+            )
+
+        if baseline:
+            self.report_comparison(baseline, results, options["threshold"])
+
+    def populate(self, options) -> dict:
+        if not Trip.objects.exists():
+            self.stderr.write("Generating data...")
+            data.populate(
+                options["trips"],
+                buses=options["buses"],
+                users=options["users"],
+                tickets=options["tickets"],
+            )
+        return {
+            "buses": Bus.objects.count(),
+            "trips": Trip.objects.count(),
+            "orders": Order.objects.count(),
+            "tickets": Ticket.objects.count(),
+        }
+
+    def run(self, scenarios, options) -> dict:
+        rows = self.populate(options)
+        fixture = Fixture(*fixture_users())
+
+        results = {}
+        for scenario in scenarios:
+            calls = [scenario.build(fixture) for _ in range(options["requests"] + 1)]
+            queries = self.count_queries(calls.pop(), scenario.asynchronous)
+            runner = load.run_async if scenario.asynchronous else load.run_sync
+            results[scenario.name] = {
+                **runner(calls, options["concurrency"]),
+                "queries": queries,
+            }
+
+        return {
+            "meta": report.metadata(
+                rows=rows,
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+                seed=options["seed"],
+            ),
+            "scenarios": results,
+        }
+
+    @staticmethod
+    def count_queries(call, asynchronous) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            load.send(call, asynchronous)
+        return len(queries)
+
+    def report_comparison(self, baseline, results, threshold):
+        rows, regressions = report.compare(baseline, results, threshold)
+        self.stderr.write(
+            f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}:"
+        )
+        for name, metric, before, after, change in rows:
+            self.stderr.write(
+                f"{name:<20} {metric:<11} {before:>10} -> {after:>10}  {change:+.1f}%"
+            )
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regression(s) over {threshold}%: "
+                + ", ".join(f"{name} {metric}" for name, metric, *_ in regressions)
+            )
@@ -0,0 +1,84 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from station.benchmarks import data, load
+from station.models import Trip
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync DRF trip endpoints with the async ones under "
+        "concurrent load, on a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--trips", type=int, default=10_000)
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument(
+            "--json", action="store_true", help="Print the results as JSON."
+        )
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with load.benchmark_settings():
+                results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for name, summary in results.items():
+            self.stdout.write(
+                f"{name:<24} {summary['throughput']:>8} req/s  "
+                f"p50 {summary['p50_ms']:>7} ms  p95 {summary['p95_ms']:>7} ms  "
+                f"p99 {summary['p99_ms']:>7} ms"
+            )
+
+    def run(self, options):
+        user = data.make_user()
+        data.make_trips(
+            options["trips"], data.make_buses(50), data.make_routes()
+        )
+        headers = {
+            "Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"
+        }
+        trip_ids = list(Trip.objects.values_list("id", flat=True))
+
+        def urls(list_name, detail_name, seat_map_name):
+            for _ in range(options["requests"]):
+                kind = random.random()
+                if kind < 0.2:
+                    yield reverse(list_name)
+                else:
+                    name = detail_name if kind < 0.6 else seat_map_name
+                    yield reverse(name, args=[random.choice(trip_ids)])
+
+        sync_urls = list(
+            urls("station:trip-list", "station:trip-detail", "station:trip-seat-map")
+        )
+        async_urls = list(
+            urls(
+                "station:async-trip-list",
+                "station:async-trip-detail",
+                "station:async-trip-seat-map",
+            )
+        )
+        return {
+            "sync (DRF, threads)": load.run_sync(
+                [load.Call("GET", url, headers) for url in sync_urls],
+                options["concurrency"],
+            ),
+            "async (asyncio)": load.run_async(
+                [load.Call("GET", url, headers) for url in async_urls],
+                options["concurrency"],
+            ),
+        }
@@ -0,0 +1,119 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+
+from station import fast_serializers
+from station.benchmarks import data
+from station.benchmarks.timing import summarize
+from station.models import Bus, Trip
+from station.renderers import ORJSONRenderer
+from station.serializers import (
+    BusListSerializer,
+    TripListSerializer,
+    TripSeatMapSerializer,
+)
+from station.views import _with_availability
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that the fast serializers and the orjson renderer write the "
+        "same bytes as the DRF serializers and JSONRenderer, and compare "
+        "their throughput on a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--trips", type=int, default=1000)
+        parser.add_argument("--buses", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument(
+            "--json", action="store_true", help="Print the results as JSON."
+        )
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for endpoint, paths in results.items():
+            baseline = paths["drf"]["throughput"]
+            for path, summary in paths.items():
+                self.stdout.write(
+                    f"{endpoint:<10} {path:<14} {summary['throughput']:>8} ops/s  "
+                    f"p50 {summary['p50_ms']:>7} ms  "
+                    f"x{summary['throughput'] / baseline:.1f}"
+                )
+
+    def run(self, options):
+        buses = data.make_buses(options["buses"])
+        data.make_trips(options["trips"], buses, data.make_routes())
+        trips = _with_availability(Trip.objects.all()).order_by("departure", "id")
+        seat_maps = Trip.objects.select_related("bus").order_by("id")
+
+        drf = JSONRenderer()
+        fast = ORJSONRenderer()
+        endpoints = {
+            "trips": {
+                "drf": lambda: drf.render(TripListSerializer(trips, many=True).data),
+                "orjson": lambda: fast.render(TripListSerializer(trips, many=True).data),
+                "fast+orjson": lambda: fast.render(
+                    fast_serializers.trip_list_data(fast_serializers.trip_list_values(trips))
+                ),
+            },
+            "buses": {
+                "drf": lambda: drf.render(
+                    BusListSerializer(
+                        Bus.objects.prefetch_related("facilities"), many=True
+                    ).data
+                ),
+                "orjson": lambda: fast.render(
+                    BusListSerializer(
+                        Bus.objects.prefetch_related("facilities"), many=True
+                    ).data
+                ),
+                "fast+orjson": lambda: fast.render(
+                    fast_serializers.bus_list_data(Bus.objects.all())
+                ),
+            },
+            "seat-maps": {
+                "drf": lambda: drf.render(TripSeatMapSerializer(seat_maps, many=True).data),
+                "orjson": lambda: fast.render(
+                    TripSeatMapSerializer(seat_maps, many=True).data
+                ),
+                "fast+orjson": lambda: fast.render([
+                    fast_serializers.seat_map_data(row)
+                    for row in fast_serializers.seat_map_values(seat_maps)
+                ]),
+            },
+        }
+
+        results = {}
+        for endpoint, paths in endpoints.items():
+            expected = paths["drf"]()
+            for path, render in paths.items():
+                if render() != expected:
+                    raise CommandError(f"{endpoint}: {path} output differs from DRF")
+            results[endpoint] = {
+                path: self.measure(render, options["repeat"])
+                for path, render in paths.items()
+            }
+        return results
+
+    @staticmethod
+    def measure(render, repeat):
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(repeat):
+            call_started = time.perf_counter()
+            render()
+            latencies.append(time.perf_counter() - call_started)
+        return summarize(latencies, time.perf_counter() - started)
@@ -0,0 +1,48 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from station import exports
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the tickets of the orders created in a date range as CSV "
+        "or NDJSON, to stdout or a file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="date_from",
+            type=date.fromisoformat,
+            help="First order date (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--to",
+            dest="date_to",
+            type=date.fromisoformat,
+            help="Last order date, inclusive (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=list(exports.FORMATS),
+            default="csv",
+        )
+        parser.add_argument(
+            "--output",
+            "-o",
+            help="File to write to, stdout when omitted.",
+        )
+
+    def handle(self, *args, **options):
+        rows = exports.ticket_rows(options["date_from"], options["date_to"])
+        lines = exports.export(options["file_format"], rows)
+
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as file:
+                file.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from station import timetable
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import trips from a CSV, JSON or NDJSON timetable. Rows that "
+        "can't be imported are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Timetable file to import.")
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=timetable.FORMATS,
+            help="Taken from the file extension when omitted.",
+        )
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Update the arrival of existing trips instead of reporting them.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Number of trips written per bulk insert.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            file_format = options["file_format"] or timetable.format_for(options["path"])
+        except timetable.TimetableError as error:
+            raise CommandError(error)
+
+        with open(options["path"], encoding="utf-8-sig", newline="") as file:
+            report = timetable.import_timetable(
+                file,
+                file_format,
+                upsert=options["upsert"],
+                batch_size=options["batch_size"],
+            )
+
+        for error in report.errors:
+            self.stderr.write(f"Row {error.row}: {error.error}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(f"... {report.error_count - len(report.errors)} more error(s)")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {report.created} and updated {report.updated} trip(s), "
+                f"{report.error_count} row(s) skipped"
+            )
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from station.schedules import roll_horizon
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the trips of every TripSchedule up to TRIP_SCHEDULE_HORIZON "
+        "ahead. Meant to run daily."
+    )
+
+    def handle(self, *args, **options):
+        created = roll_horizon()
+        self.stdout.write(self.style.SUCCESS(f"Materialized {created} trip(s)"))
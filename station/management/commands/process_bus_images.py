@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from station.images import delete_variants, process_bus_image
+from station.models import Bus
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the resized variants of bus images that have none yet, "
+        "e.g. uploaded before the image pipeline, or of every image with --all."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Render the variants of every bus image again.",
+        )
+
+    def handle(self, *args, **options):
+        buses = Bus.objects.exclude(image="").exclude(image__isnull=True)
+        if not options["all"]:
+            buses = buses.filter(image_variants={})
+
+        processed = 0
+        for bus_id, previous in buses.values_list("id", "image_variants").iterator():
+            variants = process_bus_image(bus_id)
+            if variants is None:
+                continue
+            # unchanged variants keep their content hashed names
+            names = {name for variant in variants.values() for name in variant.values()}
+            delete_variants({
+                variant: {key: name for key, name in files.items() if name not in names}
+                for variant, files in previous.items()
+            })
+            processed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rendered the image variants of {processed} bus(es)")
+        )
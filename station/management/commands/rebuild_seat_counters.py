@@ -0,0 +1,99 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from station.journeys import connection_index
+from station.models import Ticket, Trip
+from station.seat_map import SeatMap, seats_changed
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild (or verify with --check) the Trip.seats_taken counters "
+        "and seat maps from the ticket table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report trips whose seat data is out of sync.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of trips processed per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        check = options["check"]
+        batch_size = options["batch_size"]
+        drifted = 0
+        last_id = 0
+
+        while True:
+            with transaction.atomic():
+                # locked like Trip.lock_for_seats, so bookings can't
+                # change the tickets between reading and writing them
+                trips = list(
+                    Trip.objects
+                    .select_for_update(of=("self",))
+                    .select_related("bus")
+                    .only("seats_taken", "seat_map", "bus__num_seats")
+                    .filter(pk__gt=last_id)
+                    .order_by("pk")[:batch_size]
+                )
+                if not trips:
+                    break
+                last_id = trips[-1].pk
+
+                seats = defaultdict(list)
+                tickets = Ticket.objects.filter(trip__in=trips).values_list("trip_id", "seat")
+                for trip_id, seat in tickets:
+                    seats[trip_id].append(seat)
+
+                changed = []
+                events = []
+                for trip in trips:
+                    seat_map = SeatMap.from_seats(trip.bus.num_seats, seats[trip.pk])
+                    if (
+                        trip.seats_taken == seat_map.count()
+                        and bytes(trip.seat_map) == seat_map.to_bytes()
+                    ):
+                        continue
+
+                    if check:
+                        self.stdout.write(
+                            f"Trip {trip.pk}: seats_taken={trip.seats_taken}, "
+                            f"tickets={len(seats[trip.pk])}"
+                        )
+                    before = set(trip.get_seat_map().taken_seats())
+                    after = set(seat_map.taken_seats())
+                    events.append((trip.pk, sorted(after - before), sorted(before - after)))
+                    trip.set_seat_map(seat_map)
+                    changed.append(trip)
+
+                drifted += len(changed)
+                if not check:
+                    Trip.objects.bulk_update(changed, Trip.SEAT_FIELDS)
+                    # bulk_update sends no signals, cached seat maps and
+                    # subscribers are told here, on commit
+                    for trip_id, taken, released in events:
+                        seats_changed.send(
+                            sender=Trip, trip_id=trip_id, taken=taken, released=released
+                        )
+
+        if check:
+            if drifted:
+                raise CommandError(f"{drifted} trip(s) out of sync")
+            self.stdout.write(self.style.SUCCESS("All seat counters are in sync"))
+        else:
+            if drifted:
+                # its free seat counts came from the counters, other
+                # processes reload theirs after JOURNEY_INDEX_MAX_AGE
+                connection_index.invalidate()
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt seat data for {drifted} trip(s)")
+            )
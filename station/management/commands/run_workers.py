@@ -0,0 +1,82 @@
+import multiprocessing
+import signal
+
+import django
+from django.core.management.base import BaseCommand
+
+
+def work(options):
+    """Entry point of a worker process, which imports this module before Django is set up"""
+    django.setup()
+    run(options)
+
+
+def run(options):
+    from station.tasks import Worker
+
+    worker = Worker(batch_size=options["batch_size"])
+    if options["once"]:
+        return worker.run_pending()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: worker.stop())
+    worker.run_forever(options["poll_interval"])
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background tasks (see station.tasks) until stopped with "
+        "SIGINT or SIGTERM, which lets the running tasks finish."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of worker processes.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no task is due instead of waiting for more.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Tasks claimed at a time by a worker, TASK_BATCH_SIZE by default.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            help="Seconds between polls of an idle worker, TASK_POLL_INTERVAL by default.",
+        )
+
+    def handle(self, *args, **options):
+        if options["processes"] <= 1:
+            count = run(options)
+            if options["once"]:
+                self.stdout.write(self.style.SUCCESS(f"Ran {count} task(s)"))
+            return
+
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(
+                target=work,
+                args=({key: options[key] for key in ("once", "batch_size", "poll_interval")},),
+                name=f"worker-{index}",
+            )
+            for index in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+
+        def stop(*args):
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, stop)
+        for process in processes:
+            process.join()
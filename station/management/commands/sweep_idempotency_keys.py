@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from station.idempotency import sweep_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Delete expired idempotency keys in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Number of keys deleted per statement.",
+        )
+
+    def handle(self, *args, **options):
+        removed = sweep_expired_keys(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Removed {removed} expired idempotency key(s)")
+        )
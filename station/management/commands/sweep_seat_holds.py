@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from station.reservations import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Delete expired seat holds in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Number of holds deleted per statement.",
+        )
+
+    def handle(self, *args, **options):
+        removed = sweep_expired_holds(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired seat hold(s)"))
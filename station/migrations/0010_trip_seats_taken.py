@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:38
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_seats_taken(apps, schema_editor):
+    Trip = apps.get_model("station", "Trip")
+    Ticket = apps.get_model("station", "Ticket")
+    tickets_per_trip = (
+        Ticket.objects
+        .filter(trip=OuterRef("pk"))
+        .order_by()
+        .values("trip")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    Trip.objects.update(
+        seats_taken=Coalesce(Subquery(tickets_per_trip), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0009_alter_bus_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='bus',
+            name='facilities',
+            field=models.ManyToManyField(blank=True, related_name='buses', to='station.facility'),
+        ),
+        migrations.RunPython(populate_seats_taken, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def seat_map_bytes(num_seats, seats):
+    # station.seat_map.SeatMap as of this migration: seat n is bit
+    # (n - 1) % 8, most significant first, of byte (n - 1) // 8
+    size = (num_seats + 7) // 8
+    bits = bytearray(size)
+    for seat in seats:
+        index = (seat - 1) // 8
+        if index >= len(bits):
+            bits.extend(bytes(index + 1 - len(bits)))
+        bits[index] |= 0x80 >> ((seat - 1) % 8)
+    return bytes(bits).rstrip(b"\x00").ljust(size, b"\x00")
+
+
+def populate_seat_map(apps, schema_editor):
+    Trip = apps.get_model("station", "Trip")
+    Ticket = apps.get_model("station", "Ticket")
+
+    seats = defaultdict(list)
+    for trip_id, seat in Ticket.objects.values_list("trip_id", "seat").iterator():
+        seats[trip_id].append(seat)
+
+    trips = Trip.objects.filter(pk__in=seats).select_related("bus")
+    for trip in trips.iterator():
+        trip.seat_map = seat_map_bytes(trip.bus.num_seats, seats[trip.pk])
+        trip.seats_taken = int.from_bytes(trip.seat_map, "big").bit_count()
+        trip.save(update_fields=["seat_map", "seats_taken"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0010_trip_seats_taken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='seat_map',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(populate_seat_map, migrations.RunPython.noop),
+    ]
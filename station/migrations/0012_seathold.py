@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0011_trip_seat_map'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seat', models.IntegerField()),
+                ('expires_at', models.DateTimeField()),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='station.trip')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['expires_at', 'seat'],
+                'indexes': [models.Index(fields=['expires_at'], name='station_sea_expires_acc7f2_idx')],
+                'constraints': [models.UniqueConstraint(fields=('seat', 'trip'), name='unique_seat_hold_seat_trip')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0012_seathold'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='trip',
+            name='station_tri_source_1ae98f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['source', 'destination', 'departure'], name='station_tri_source_dfc752_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0013_trip_route_departure_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Station',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=63, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Route',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='arriving_routes', to='station.station')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='departing_routes', to='station.station')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'destination'), name='unique_route_source_destination')],
+            },
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='route',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='trips', to='station.route'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+def intern_routes(apps, schema_editor):
+    Station = apps.get_model("station", "Station")
+    Route = apps.get_model("station", "Route")
+    Trip = apps.get_model("station", "Trip")
+
+    pairs = Trip.objects.values_list("source", "destination").distinct()
+    stations = {}
+    for source, destination in pairs:
+        for name in (source, destination):
+            if name.strip() not in stations:
+                stations[name.strip()], _ = Station.objects.get_or_create(
+                    name=name.strip()
+                )
+
+        route, _ = Route.objects.get_or_create(
+            source=stations[source.strip()],
+            destination=stations[destination.strip()],
+        )
+        Trip.objects.filter(source=source, destination=destination).update(route=route)
+
+
+def restore_city_names(apps, schema_editor):
+    Route = apps.get_model("station", "Route")
+    Trip = apps.get_model("station", "Trip")
+
+    for route in Route.objects.select_related("source", "destination"):
+        Trip.objects.filter(route=route).update(
+            source=route.source.name, destination=route.destination.name
+        )
+
+
+class Migration(migrations.Migration):
+    # on its own, PostgreSQL can't alter the trip table in the transaction
+    # that updated its rows ("pending trigger events")
+
+    dependencies = [
+        ('station', '0014_station_route'),
+    ]
+
+    operations = [
+        migrations.RunPython(intern_routes, restore_city_names),
+    ]
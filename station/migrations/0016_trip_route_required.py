@@ -0,0 +1,44 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0015_trip_route_data'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='trip',
+            name='station_tri_source_dfc752_idx',
+        ),
+        # defaults only let the city columns be re-added when unapplying
+        migrations.AlterField(
+            model_name='trip',
+            name='source',
+            field=models.CharField(default='', max_length=63),
+        ),
+        migrations.AlterField(
+            model_name='trip',
+            name='destination',
+            field=models.CharField(default='', max_length=63),
+        ),
+        migrations.RemoveField(
+            model_name='trip',
+            name='source',
+        ),
+        migrations.RemoveField(
+            model_name='trip',
+            name='destination',
+        ),
+        migrations.AlterField(
+            model_name='trip',
+            name='route',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='trips', to='station.route'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['route', 'departure'], name='station_tri_route_i_bec200_idx'),
+        ),
+    ]
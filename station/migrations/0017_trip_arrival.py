@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0016_trip_route_required'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trip',
+            name='arrival',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0017_trip_arrival'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at'], name='station_ord_created_51ec24_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0018_order_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('departure_time', models.TimeField()),
+                ('duration', models.DurationField(blank=True, null=True)),
+                ('weekdays', models.PositiveSmallIntegerField(default=127, help_text='Bitmask of the weekdays it runs on, Monday is 1 and Sunday 64')),
+                ('valid_from', models.DateField()),
+                ('valid_until', models.DateField(blank=True, null=True)),
+                ('materialized_until', models.DateField(blank=True, editable=False, null=True)),
+                ('bus', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='station.bus')),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='schedules', to='station.route')),
+            ],
+            options={
+                'ordering': ['route', 'departure_time'],
+            },
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='schedule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trips', to='station.tripschedule'),
+        ),
+        migrations.AddConstraint(
+            model_name='trip',
+            constraint=models.UniqueConstraint(condition=models.Q(('schedule__isnull', False)), fields=('schedule', 'departure'), name='unique_trip_schedule_departure'),
+        ),
+    ]
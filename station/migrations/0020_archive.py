@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0019_tripschedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTrip',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('departure', models.DateTimeField()),
+                ('arrival', models.DateTimeField(blank=True, null=True)),
+                ('seats_taken', models.PositiveIntegerField(default=0)),
+                ('month', models.DateField()),
+                ('bus', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_trips', to='station.bus')),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_trips', to='station.route')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedTicket',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('seat', models.IntegerField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tickets', to='station.order')),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tickets', to='station.archivedtrip')),
+            ],
+            options={
+                'ordering': ['seat'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedtrip',
+            index=models.Index(fields=['month'], name='station_arc_month_194d06_idx'),
+        ),
+    ]
@@ -1,11 +1,16 @@
 import pathlib
 import uuid
+from datetime import date, datetime, timedelta
 
 from django.conf import settings
-from django.db import models
-from django.db.models import UniqueConstraint
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import F, Q, UniqueConstraint
+from django.utils import timezone
 from django.utils.text import slugify
 
+from station.seat_map import SeatMap, seats_changed
+
 
 class Facility(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -33,6 +38,8 @@ class Bus(models.Model):
     num_seats = models.IntegerField()
     facilities = models.ManyToManyField(Facility, related_name="buses", blank=True)
     image = models.ImageField(null=True, upload_to=bus_image_path)
+    # resized encodings of the image, see station.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         verbose_name = "buses"
@@ -45,20 +52,206 @@ class Bus(models.Model):
         return f"Bus {self.info} (id= {self.id})"
 
 
+class Station(models.Model):
+    name = models.CharField(max_length=63, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class Route(models.Model):
+    source = models.ForeignKey(
+        Station, on_delete=models.PROTECT, related_name="departing_routes"
+    )
+    destination = models.ForeignKey(
+        Station, on_delete=models.PROTECT, related_name="arriving_routes"
+    )
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["source", "destination"], name="unique_route_source_destination"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source} - {self.destination}"
+
+    @staticmethod
+    def intern(source: str, destination: str) -> "Route":
+        """
+        Returns the route between two city names, creating it if needed.
+        """
+        source, _ = Station.objects.get_or_create(name=source.strip())
+        destination, _ = Station.objects.get_or_create(name=destination.strip())
+        route, _ = Route.objects.get_or_create(source=source, destination=destination)
+        return route
+
+
+class TripScheduleQuerySet(models.QuerySet):
+    def running_on(self, day: date):
+        return (
+            self
+            .filter(valid_from__lte=day)
+            .filter(Q(valid_until__isnull=True) | Q(valid_until__gte=day))
+            .alias(runs_on_day=F("weekdays").bitand(1 << day.weekday()))
+            .filter(runs_on_day__gt=0)
+        )
+
+
+class TripSchedule(models.Model):
+    """
+    A departure repeated on some weekdays, its trips are created lazily
+    by station.schedules.
+    """
+    EVERY_DAY = 0b1111111
+
+    route = models.ForeignKey(Route, on_delete=models.PROTECT, related_name="schedules")
+    bus = models.ForeignKey(Bus, on_delete=models.CASCADE, related_name="schedules")
+    departure_time = models.TimeField()
+    duration = models.DurationField(null=True, blank=True)
+    weekdays = models.PositiveSmallIntegerField(
+        default=EVERY_DAY,
+        help_text="Bitmask of the weekdays it runs on, Monday is 1 and Sunday 64",
+    )
+    valid_from = models.DateField()
+    valid_until = models.DateField(null=True, blank=True)
+    # Trips exist for every date up to here, see station.schedules.roll_horizon
+    materialized_until = models.DateField(null=True, blank=True, editable=False)
+
+    objects = TripScheduleQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["route", "departure_time"]
+
+    def __str__(self):
+        return f"{self.route} ({self.departure_time:%H:%M})"
+
+    def runs_on(self, day: date) -> bool:
+        return (
+            self.valid_from <= day
+            and (self.valid_until is None or day <= self.valid_until)
+            and bool(self.weekdays & (1 << day.weekday()))
+        )
+
+    def dates(self, start: date, end: date):
+        """The dates from ``start`` to ``end`` (inclusive) it runs on"""
+        day = start
+        while day <= end:
+            if self.runs_on(day):
+                yield day
+            day += timedelta(days=1)
+
+    def trip_on(self, day: date) -> "Trip":
+        departure = timezone.make_aware(datetime.combine(day, self.departure_time))
+        return Trip(
+            schedule=self,
+            route_id=self.route_id,
+            bus_id=self.bus_id,
+            departure=departure,
+            arrival=departure + self.duration if self.duration else None,
+        )
+
+
 class Trip(models.Model):
-    source = models.CharField(max_length=63)
-    destination = models.CharField(max_length=63)
+    route = models.ForeignKey(Route, on_delete=models.PROTECT, related_name="trips")
     departure = models.DateTimeField()
+    arrival = models.DateTimeField(null=True, blank=True)
     bus = models.ForeignKey(Bus, on_delete=models.CASCADE)
+    # Denormalized seat occupancy, maintained by station.signals
+    # and rebuilt by `manage.py rebuild_seat_counters`. Saves without
+    # update_fields leave both out, so a stale instance can't reset them.
+    seats_taken = models.PositiveIntegerField(default=0, editable=False)
+    seat_map = models.BinaryField(default=b"")
+    schedule = models.ForeignKey(
+        TripSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="trips",
+    )
+
+    SEAT_FIELDS = ("seat_map", "seats_taken")
 
     class Meta:
         indexes = [
-            models.Index(fields=["source", "destination"]),
+            models.Index(fields=["route", "departure"]),
             models.Index(fields=["departure"])
         ]
+        constraints = [
+            # lets schedules be materialized with ignore_conflicts
+            UniqueConstraint(
+                fields=["schedule", "departure"],
+                condition=Q(schedule__isnull=False),
+                name="unique_trip_schedule_departure",
+            ),
+        ]
 
     def __str__(self):
-        return f"{self.source} - {self.destination} ({self.departure})"
+        return f"{self.route} ({self.departure})"
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None and not self._state.adding and not kwargs.get("force_insert"):
+            # seats are written by update_seats and station.booking under
+            # a lock, a full save would put back the seats loaded with the
+            # trip and drop the bookings made since
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.SEAT_FIELDS
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+    def get_seat_map(self) -> SeatMap:
+        return SeatMap(self.bus.num_seats, bytes(self.seat_map))
+
+    def set_seat_map(self, seat_map: SeatMap) -> None:
+        self.seat_map = seat_map.to_bytes()
+        self.seats_taken = seat_map.count()
+
+    @staticmethod
+    def lock_for_seats(trip_ids) -> dict[int, "Trip"]:
+        """
+        Lock the given trips for a seat map read-modify-write.
+
+        Must be called inside a transaction.
+        """
+        return (
+            Trip.objects
+            .select_for_update(of=("self",))
+            .select_related("bus")
+            .only("seat_map", "seats_taken", "bus__num_seats")
+            .in_bulk(trip_ids)
+        )
+
+    @staticmethod
+    def update_seats(trip_id: int, taken=(), released=()) -> None:
+        """
+        Mark seats as taken/released in the trip's seat map and counter.
+        """
+        with transaction.atomic():
+            trip = Trip.lock_for_seats([trip_id]).get(trip_id)
+            if trip is None:
+                # the trip itself is being deleted
+                return
+
+            seat_map = trip.get_seat_map()
+            for seat in released:
+                seat_map.release(seat)
+            for seat in taken:
+                seat_map.take(seat)
+
+            trip.set_seat_map(seat_map)
+            trip.save(update_fields=["seat_map", "seats_taken"])
+
+        seats_changed.send(
+            sender=Trip, trip_id=trip_id, taken=list(taken), released=list(released)
+        )
 
 
 class Ticket(models.Model):
@@ -75,6 +268,13 @@ class Ticket(models.Model):
     def __str__(self):
         return f"{self.trip} - {self.seat}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored seat so a reassignment can move it
+        instance._loaded_seat = (instance.__dict__.get("trip_id"), instance.__dict__.get("seat"))
+        return instance
+
     @staticmethod
     def validate_seat(seat:int, num_seats:int, error_to_raise):
         if not (1 <= seat <= num_seats):
@@ -111,6 +311,142 @@ class Order(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["created_at"]),
+            # order list of a user, see station.pagination.OrderCursorPagination
+            models.Index(fields=["user", "-created_at", "-id"]),
+        ]
 
     def __str__(self):
         return f"{self.created_at}"
+
+
+class IdempotencyKey(models.Model):
+    """Outcome of a POST sent with an Idempotency-Key, see station.idempotency"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="idempotency_keys"
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    # both null while the first request is in progress
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=["user", "key"], name="unique_idempotency_key_user_key"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.status_code or 'in progress'})"
+
+
+class SeatHold(models.Model):
+    """Short-lived reservation of a seat that is turned into a Ticket at checkout"""
+    seat = models.IntegerField()
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name="holds")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=["seat", "trip"], name="unique_seat_hold_seat_trip"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"]),
+        ]
+        ordering = ["expires_at", "seat"]
+
+    def __str__(self):
+        return f"{self.trip} - {self.seat} (until {self.expires_at})"
+
+
+# Departed trips and their tickets, moved out of the live tables by
+# station.archive. They keep the ids they had there.
+
+class ArchivedTrip(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    route = models.ForeignKey(
+        Route, on_delete=models.PROTECT, related_name="archived_trips"
+    )
+    departure = models.DateTimeField()
+    arrival = models.DateTimeField(null=True, blank=True)
+    # history survives a bus being removed from the fleet
+    bus = models.ForeignKey(
+        Bus, on_delete=models.SET_NULL, null=True, related_name="archived_trips"
+    )
+    seats_taken = models.PositiveIntegerField(default=0)
+    # first day of the departure month, archives are queried and pruned by month
+    month = models.DateField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["month"]),
+        ]
+
+    def __str__(self):
+        return f"{self.route} ({self.departure})"
+
+    @property
+    def tickets_available(self) -> int | None:
+        if self.bus is None:
+            return None
+        return self.bus.num_seats - self.seats_taken
+
+
+class ArchivedTicket(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    seat = models.IntegerField()
+    trip = models.ForeignKey(
+        ArchivedTrip, on_delete=models.CASCADE, related_name="tickets"
+    )
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name="archived_tickets"
+    )
+
+    class Meta:
+        ordering = ["seat"]
+
+    def __str__(self):
+        return f"{self.trip} - {self.seat}"
+
+
+class Task(models.Model):
+    """
+    Queued side effect, run by `manage.py run_workers`, see station.tasks.
+    Tasks that succeed are deleted, ones out of attempts stay as failed.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        FAILED = "failed"
+
+    name = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=7, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField()
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at"]),
+        ]
+        ordering = ["run_at", "id"]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
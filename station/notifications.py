@@ -0,0 +1,31 @@
+"""
+Messages sent to customers, run as tasks by the workers, see station.tasks.
+"""
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from station.models import Order
+from station.tasks import task
+
+
+@task
+def send_order_confirmation(order_id: int) -> None:
+    order = Order.objects.select_related("user").filter(pk=order_id).first()
+    if order is None:
+        # deleted before the worker got to it
+        return
+
+    tickets = order.tickets.select_related(
+        "trip__route__source", "trip__route__destination"
+    ).order_by("trip__departure", "seat")
+    lines = [
+        f"{ticket.trip.route}, departs "
+        f"{timezone.localtime(ticket.trip.departure):%Y-%m-%d %H:%M}, seat {ticket.seat}"
+        for ticket in tickets
+    ]
+    send_mail(
+        subject=f"Your order #{order.pk}",
+        message="Your tickets:\n\n" + "\n".join(lines) + "\n",
+        from_email=None,
+        recipient_list=[order.user.email],
+    )
@@ -0,0 +1,127 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+def _reversed(ordering):
+    return tuple(
+        field[1:] if field.startswith("-") else f"-{field}" for field in ordering
+    )
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination on every field of ``ordering``, which must end in a
+    unique one.
+
+    DRF's CursorPagination only filters on the first field and steps over
+    rows sharing it with an OFFSET. Here the cursor holds the whole
+    position of the last row, and the next page starts right after it with
+    ``(a, b) > (x, y)``, written as ``a > x OR (a = x AND b > y)``.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = self.cursor.position if self.cursor is not None else None
+
+        ordering = _reversed(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self._after(queryset.model, ordering, current_position)
+            )
+
+        # one more row tells whether there is a following page
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        fields = [field.lstrip("-") for field in ordering]
+        if isinstance(instance, dict):
+            values = [instance[field] for field in fields]
+        else:
+            values = [getattr(instance, field) for field in fields]
+        return json.dumps([str(value) for value in values])
+
+    def _after(self, model, ordering, position) -> Q:
+        """Rows following ``position`` in ``ordering``"""
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError(position)
+            values = [
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        after = Q()
+        equal = {}
+        for field, value in zip(ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            after |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return after
+
+
+class TripCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination over (departure, id).
+
+    The cursor encodes the last seen departure and id, so every page is a
+    range scan on the departure index instead of an OFFSET that grows with
+    depth, even among trips leaving at the same time.
+    """
+    ordering = ("departure", "id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class OrderCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination over a user's orders, newest first.
+
+    Pages are range scans on the (user, -created_at, -id) index, however
+    many orders the user has, including orders created in the same
+    instant.
+    """
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
 
@@ -11,3 +12,12 @@ class IsAdminOrIfAuthenticatedReadOnly(BasePermission):
             )
                 or (request.user and request.user.is_staff)
         )
+
+
+class IsAdminOrInternalIP(BasePermission):
+    """Staff users, or any request from one of the INTERNAL_IPS"""
+    def has_permission(self, request, view):
+        return bool(
+            request.META.get("REMOTE_ADDR") in settings.INTERNAL_IPS
+            or (request.user and request.user.is_staff)
+        )
@@ -0,0 +1,391 @@
+"""
+Per-request timings and process-wide metrics.
+
+With ``REQUEST_PROFILING`` on, ``RequestProfilingMiddleware`` records for
+every request the view (``<ViewSet>.<action>`` for viewsets), the number
+and total time of its queries, the time spent in serializers and in
+rendering, and the response cache hits and misses. They are sent back in
+a ``Server-Timing`` header and added up per view in ``metrics``, served
+in the Prometheus text format at /api/metrics/. Counters are kept per
+process, so the scraper sees each worker separately.
+
+Serializer time is what views spend in ``serializer.data``, timed with
+``timed("serializer")`` by ``TimedSerializerMixin`` for the serializers
+from ``get_serializer`` and by ``serialized()`` for the others. It
+includes the queries the serializers trigger, e.g. for prefetches.
+Rendering is only measured for template responses, which include DRF's.
+
+A ``REQUEST_PROFILE_SAMPLE_RATE`` share of requests is also run under a
+profiler (``REQUEST_PROFILER``, cProfile or pyinstrument), and the
+profile of those slower than ``REQUEST_PROFILE_SLOW_MS`` is written to
+``REQUEST_PROFILE_DIR``. Under ASGI the profiler only sees the event loop
+thread, not sync views.
+"""
+import contextvars
+import cProfile
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import ContextDecorator
+from datetime import datetime
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_stats = contextvars.ContextVar("request_stats", default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class RequestStats:
+    def __init__(self):
+        self.view = ""
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._depth = defaultdict(int)
+
+    def server_timing(self, total: float) -> str:
+        return ", ".join([
+            f'view;desc="{self.view}"',
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+            f"serializer;dur={self.serializer_time * 1000:.2f}",
+            f"render;dur={self.render_time * 1000:.2f}",
+            f'cache;desc="hits={self.cache_hits} misses={self.cache_misses}"',
+            f"total;dur={total * 1000:.2f}",
+        ])
+
+
+class timed(ContextDecorator):
+    """
+    Adds the time spent in the block to the ``<stage>_time`` of the
+    current request. Nested blocks of the same stage are counted once.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def _recreate_cm(self):
+        # a fresh instance per decorated call, calls may overlap
+        return type(self)(self.stage)
+
+    def __enter__(self):
+        self.stats = _stats.get()
+        if self.stats is not None:
+            self.stats._depth[self.stage] += 1
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.stats is not None:
+            self.stats._depth[self.stage] -= 1
+            if not self.stats._depth[self.stage]:
+                attribute = f"{self.stage}_time"
+                setattr(
+                    self.stats,
+                    attribute,
+                    getattr(self.stats, attribute) + time.perf_counter() - self.started,
+                )
+        return False
+
+
+def record_cache(hit: bool) -> None:
+    stats = _stats.get()
+    if stats is not None:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.cache_misses += 1
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def _wrap_connection(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+_installed = False
+
+
+def install() -> None:
+    """Hooks the query timing in, once per process"""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    connection_created.connect(_wrap_connection)
+    for connection in connections.all(initialized_only=True):
+        _wrap_connection(connection)
+
+
+def serialized(serializer):
+    """``serializer.data``, timed as serializer time"""
+    with timed("serializer"):
+        return serializer.data
+
+
+class TimedSerializerMixin:
+    """
+    Times ``serializer.data`` of the serializers a view gets from
+    ``get_serializer``, which covers DRF's own actions.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        # .data serializes through to_representation, looked up on the
+        # instance first
+        serializer.to_representation = timed("serializer")(serializer.to_representation)
+        return serializer
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Prometheus counters and a request duration histogram"""
+
+    COUNTERS = {
+        "station_requests_total": "Requests served.",
+        "station_db_queries_total": "Database queries run.",
+        "station_db_seconds_total": "Time spent in database queries.",
+        "station_serializer_seconds_total": "Time spent in serializers.",
+        "station_render_seconds_total": "Time spent rendering responses.",
+        "station_cache_hits_total": "Response cache hits.",
+        "station_cache_misses_total": "Response cache misses.",
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters = defaultdict(float)
+            self._buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+            self._durations = defaultdict(float)
+            self._requests = defaultdict(int)
+
+    def observe(self, stats: RequestStats, method: str, status: int, duration: float) -> None:
+        view = (("view", stats.view),)
+        with self._lock:
+            self._counters["station_requests_total", view + (
+                ("method", method), ("status", str(status))
+            )] += 1
+            self._counters["station_db_queries_total", view] += stats.queries
+            self._counters["station_db_seconds_total", view] += stats.db_time
+            self._counters["station_serializer_seconds_total", view] += stats.serializer_time
+            self._counters["station_render_seconds_total", view] += stats.render_time
+            self._counters["station_cache_hits_total", view] += stats.cache_hits
+            self._counters["station_cache_misses_total", view] += stats.cache_misses
+
+            buckets = self._buckets[stats.view]
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[index] += 1
+            self._durations[stats.view] += duration
+            self._requests[stats.view] += 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, help_text in self.COUNTERS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (counter, labels), value in sorted(self._counters.items()):
+                    if counter == name:
+                        lines.append(f"{name}{{{self._labels(labels)}}} {_number(value)}")
+
+            name = "station_request_duration_seconds"
+            lines.append(f"# HELP {name} Request duration, up to the response being returned.")
+            lines.append(f"# TYPE {name} histogram")
+            for view, buckets in sorted(self._buckets.items()):
+                labels = self._labels((("view", view),))
+                for bound, count in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self._requests[view]}')
+                lines.append(f"{name}_sum{{{labels}}} {_number(self._durations[view])}")
+                lines.append(f"{name}_count{{{labels}}} {self._requests[view]}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(labels) -> str:
+        return ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+
+
+metrics = Metrics()
+
+
+class CProfiler:
+    suffix = ".prof"
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def dump(self, path: Path):
+        self.profile.dump_stats(path)
+
+
+class PyInstrumentProfiler:
+    suffix = ".html"
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ImproperlyConfigured(
+                'REQUEST_PROFILER = "pyinstrument" needs the pyinstrument package'
+            )
+        self.profiler = Profiler()
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def dump(self, path: Path):
+        path.write_text(self.profiler.output_html())
+
+
+PROFILERS = {
+    "cprofile": CProfiler,
+    "pyinstrument": PyInstrumentProfiler,
+}
+
+
+def _view_name(view_func) -> str:
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return f"{view_func.__module__.rpartition('.')[2]}.{view_func.__qualname__}"
+    return view_class.__name__
+
+
+class RequestProfilingMiddleware:
+    """See the module docstring, goes first in MIDDLEWARE to see everything"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        if settings.REQUEST_PROFILER not in PROFILERS:
+            raise ImproperlyConfigured(
+                f"REQUEST_PROFILER must be one of {', '.join(PROFILERS)}"
+            )
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        install()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, profiler = self._start()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - started
+            self._stop(token, profiler)
+        return self._finish(request, response, stats, profiler, duration)
+
+    async def __acall__(self, request):
+        stats, token, profiler = self._start()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            duration = time.perf_counter() - started
+            self._stop(token, profiler)
+        return self._finish(request, response, stats, profiler, duration)
+
+    @staticmethod
+    def _start():
+        stats = RequestStats()
+        token = _stats.set(stats)
+        profiler = None
+        if random.random() < settings.REQUEST_PROFILE_SAMPLE_RATE:
+            profiler = PROFILERS[settings.REQUEST_PROFILER]()
+            try:
+                profiler.start()
+            except ValueError:
+                # another profiler is already running on this thread
+                profiler = None
+        return stats, token, profiler
+
+    @staticmethod
+    def _stop(token, profiler):
+        if profiler is not None:
+            profiler.stop()
+        _stats.reset(token)
+
+    def _finish(self, request, response, stats, profiler, duration):
+        response["Server-Timing"] = stats.server_timing(duration)
+        metrics.observe(stats, request.method, response.status_code, duration)
+        if profiler is not None and duration * 1000 >= settings.REQUEST_PROFILE_SLOW_MS:
+            self._dump(profiler, stats, duration)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = _stats.get()
+        stats.view = _view_name(view_func)
+        # viewsets map the method to an action
+        action = getattr(view_func, "actions", {}).get(request.method.lower())
+        if action:
+            stats.view += f".{action}"
+
+    def process_template_response(self, request, response):
+        # called right before the response is rendered
+        stats = _stats.get()
+        started = time.perf_counter()
+
+        def rendered(response):
+            stats.render_time += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    @staticmethod
+    def _dump(profiler, stats, duration):
+        directory = Path(settings.REQUEST_PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        name = re.sub(r"[^\w.-]", "_", stats.view or "unresolved")
+        profiler.dump(
+            directory
+            / f"{datetime.now():%Y%m%dT%H%M%S%f}-{name}-{duration * 1000:.0f}ms{profiler.suffix}"
+        )
+
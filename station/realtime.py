@@ -0,0 +1,266 @@
+"""
+Push of seat availability changes to clients.
+
+Every committed ``seats_changed`` signal is published to a broker, which
+fans it out to the subscribers of that trip: Server-Sent Events streams
+(station.async_views.trip_seat_events) and WebSocket connections (see
+``websocket_application``, mounted in app.asgi).
+
+Publishing goes through a pluggable backend. ``LocalBackend`` delivers
+within the process only; ``RedisBackend`` relays events over Redis
+pub/sub so that every node receives the writes of the others.
+
+A subscriber first receives a snapshot of the seat map and then deltas
+(``taken``/``released`` seat numbers). The subscription is made before the
+snapshot is read, so a delta may repeat what the snapshot already shows
+but none is lost. A subscriber that falls too far behind gets a fresh
+snapshot instead of the dropped deltas.
+"""
+import asyncio
+import json
+import re
+import threading
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from station.fast_serializers import seat_map_data, seat_map_values
+from station.models import Trip
+
+# Put into a subscriber's queue in place of the deltas it missed
+RESYNC = object()
+
+
+class Subscription:
+    def __init__(self, trip_id: int, loop, maxsize: int):
+        self.trip_id = trip_id
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize)
+
+    def push(self, event) -> None:
+        """Thread-safe, called by the broker from any thread"""
+        self._loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event) -> None:
+        if self._queue.full():
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            event = RESYNC
+        self._queue.put_nowait(event)
+
+    async def get(self, timeout: float | None = None):
+        """The next event, or None when nothing arrived within ``timeout``"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalBackend:
+    """Delivers events to the subscribers of this process only"""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def start(self) -> None:
+        pass
+
+    def publish(self, trip_id: int, event: dict) -> None:
+        self.broker.deliver(trip_id, event)
+
+
+class RedisBackend:
+    """
+    Relays events through Redis pub/sub, one channel per trip.
+
+    A daemon thread listens on all trip channels and hands the events to
+    the local subscribers, including the ones published by this process.
+    """
+
+    def __init__(self, broker, url: str, prefix: str = "station:seats:"):
+        import redis
+
+        self.broker = broker
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._listen, name="seat-events", daemon=True
+            )
+            self._thread.start()
+
+    def _listen(self) -> None:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f"{self.prefix}*")
+        for message in pubsub.listen():
+            trip_id = int(message["channel"].decode()[len(self.prefix):])
+            self.broker.deliver(trip_id, json.loads(message["data"]))
+
+    def publish(self, trip_id: int, event: dict) -> None:
+        self.client.publish(f"{self.prefix}{trip_id}", json.dumps(event))
+
+
+class SeatEventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    backend_class = import_string(settings.SEAT_EVENTS_BACKEND)
+                    self._backend = backend_class(self, **settings.SEAT_EVENTS_OPTIONS)
+        return self._backend
+
+    def subscribe(self, trip_id: int) -> Subscription:
+        """Must be called from the event loop that will consume the events"""
+        self.backend.start()
+        subscription = Subscription(
+            trip_id, asyncio.get_running_loop(), settings.SEAT_EVENTS_QUEUE_SIZE
+        )
+        with self._lock:
+            self._subscribers.setdefault(trip_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.trip_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.trip_id, None)
+
+    def subscriber_count(self, trip_id: int) -> int:
+        return len(self._subscribers.get(trip_id, ()))
+
+    def publish(self, trip_id: int, event: dict) -> None:
+        self.backend.publish(trip_id, event)
+
+    def deliver(self, trip_id: int, event: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(trip_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.push(event)
+            except RuntimeError:
+                # the subscriber's event loop is closed
+                self.unsubscribe(subscription)
+
+
+seat_events = SeatEventBroker()
+
+
+async def seat_map_snapshot(trip_id: int) -> dict | None:
+    row = await seat_map_values(Trip.objects.filter(pk=trip_id)).afirst()
+    if row is None:
+        return None
+    return seat_map_data(row)
+
+
+async def stream_seat_events(subscription: Subscription, snapshot: dict, heartbeat=None):
+    """
+    Yields the snapshot and then the deltas of ``subscription`` as
+    ``(event_type, data)`` pairs, or ``(None, None)`` once ``heartbeat``
+    seconds passed without any event.
+    """
+    try:
+        yield "snapshot", snapshot
+        while True:
+            event = await subscription.get(heartbeat)
+            if event is RESYNC:
+                snapshot = await seat_map_snapshot(subscription.trip_id)
+                if snapshot is None:
+                    return
+                yield "snapshot", snapshot
+            elif event is None:
+                yield None, None
+            else:
+                yield "seats", event
+    finally:
+        seat_events.unsubscribe(subscription)
+
+
+# WebSocket endpoint
+
+WEBSOCKET_PATH = re.compile(r"^/ws/station/trips/(?P<pk>\d+)/seats/$")
+
+
+def _authenticate(raw_token: str):
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError):
+        return None
+
+
+async def websocket_application(scope, receive, send):
+    """
+    ``/ws/station/trips/<id>/seats/?token=<access token>``
+
+    Browsers can't set headers on a WebSocket handshake, so the JWT access
+    token is passed in the query string. Messages are JSON objects with a
+    ``type`` of ``snapshot`` or ``seats``.
+    """
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+
+    match = WEBSOCKET_PATH.match(scope["path"])
+    if match is None:
+        await send({"type": "websocket.close", "code": 4404})
+        return
+
+    query = parse_qs(scope.get("query_string", b"").decode())
+    token = query.get("token", [""])[0]
+    user = await sync_to_async(_authenticate)(token) if token else None
+    if user is None or not user.is_authenticated:
+        await send({"type": "websocket.close", "code": 4401})
+        return
+
+    trip_id = int(match["pk"])
+    subscription = seat_events.subscribe(trip_id)
+    snapshot = await seat_map_snapshot(trip_id)
+    if snapshot is None:
+        seat_events.unsubscribe(subscription)
+        await send({"type": "websocket.close", "code": 4404})
+        return
+
+    await send({"type": "websocket.accept"})
+    events = stream_seat_events(subscription, snapshot)
+    next_event = asyncio.ensure_future(anext(events))
+    next_message = asyncio.ensure_future(receive())
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {next_event, next_message}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if next_message in done:
+                if next_message.result()["type"] == "websocket.disconnect":
+                    return
+                # clients have nothing to say, incoming messages are ignored
+                next_message = asyncio.ensure_future(receive())
+            if next_event in done:
+                try:
+                    event_type, data = next_event.result()
+                except StopAsyncIteration:
+                    await send({"type": "websocket.close", "code": 1000})
+                    return
+                await send({
+                    "type": "websocket.send",
+                    "text": json.dumps({"type": event_type, **data}),
+                })
+                next_event = asyncio.ensure_future(anext(events))
+    finally:
+        next_event.cancel()
+        next_message.cancel()
+        await asyncio.gather(next_event, next_message, return_exceptions=True)
+        await events.aclose()
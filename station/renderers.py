@@ -0,0 +1,84 @@
+"""
+JSON rendering and parsing with orjson.
+
+The output is byte for byte what DRF's JSONRenderer writes with the
+default settings (compact, unescaped unicode, datetimes ending in "Z"),
+so clients and cached ETags don't notice the switch. Everything orjson
+doesn't know natively, datetimes included, goes through DRF's encoder.
+When orjson isn't installed, or a request asks for something it can't
+do (e.g. ``indent``), both classes fall back to DRF's implementation.
+
+Floats are the one difference: orjson writes exponents as ``1e16``
+where the stdlib writes ``1e+16``. No endpoint here returns floats.
+"""
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+# DRF escapes these so the JSON is also valid JavaScript
+_LINE_SEPARATORS = (
+    ("\u2028".encode(), b"\\u2028"),
+    ("\u2029".encode(), b"\\u2029"),
+)
+
+
+_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+    options = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def _supported(self, accepted_media_type, renderer_context) -> bool:
+        return (
+            orjson is not None
+            and self.encoder_class is JSONEncoder
+            and self.ensure_ascii is False
+            and self.compact
+            and self.strict
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if data is None:
+            return b""
+        if not self._supported(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            content = orjson.dumps(
+                data, default=_encoder.default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            # e.g. integers past 64 bits, which the stdlib encoder writes
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for separator, escaped in _LINE_SEPARATORS:
+            if separator in content:
+                content = content.replace(separator, escaped)
+        return content
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
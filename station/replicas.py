@@ -0,0 +1,121 @@
+"""
+Read-replica routing.
+
+Reads go to the primary unless a view opted in with ReplicaReadMixin,
+the request is safe (GET, HEAD, OPTIONS) and it hasn't written to the
+primary, as searches that create trips on the fly do. Users who wrote
+to the primary in the last ``DATABASE_REPLICA_PIN`` keep reading from
+the primary everywhere, so they see their own orders and taken seats
+even while the replicas lag behind. Nothing changes when
+DATABASE_REPLICAS is empty.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+_read_from_replica = ContextVar("read_from_replica", default=False)
+_wrote_to_primary = ContextVar("wrote_to_primary", default=False)
+
+
+def _pin_key(user) -> str:
+    return f"replica-pin:{user.pk}"
+
+
+def pin_to_primary(user) -> None:
+    cache.set(_pin_key(user), True, settings.DATABASE_REPLICA_PIN.total_seconds())
+
+
+def is_pinned(user) -> bool:
+    return bool(user and user.is_authenticated and cache.get(_pin_key(user)))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # a request that wrote, e.g. materialized trips during a search,
+        # reads the rows back from the primary
+        if (
+            settings.DATABASE_REPLICAS
+            and _read_from_replica.get()
+            and not _wrote_to_primary.get()
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        _wrote_to_primary.set(True)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Pins users to the primary after a request that wrote to it"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _wrote_to_primary.set(False)
+        try:
+            response = self.get_response(request)
+            if settings.DATABASE_REPLICAS and _wrote_to_primary.get():
+                self._pin(request)
+            return response
+        finally:
+            _wrote_to_primary.reset(token)
+
+    async def __acall__(self, request):
+        token = _wrote_to_primary.set(False)
+        try:
+            # sync views run in a thread, their context changes are copied back
+            response = await self.get_response(request)
+            if settings.DATABASE_REPLICAS and _wrote_to_primary.get():
+                await sync_to_async(self._pin)(request)
+            return response
+        finally:
+            _wrote_to_primary.reset(token)
+
+    @staticmethod
+    def _pin(request):
+        # DRF copies the user it authenticated onto the Django request
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user)
+
+
+class ReplicaReadMixin:
+    """Serves the safe requests of a viewset from a read replica"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and not is_pinned(request.user)
+        ):
+            self._replica_token = _read_from_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _read_from_replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
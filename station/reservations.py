@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from station.booking import book_tickets
+from station.models import Order, SeatHold, Ticket, Trip
+
+
+def hold_ttl():
+    return settings.SEAT_HOLD_TTL
+
+
+def hold_seats(user, trip_id: int, seats, ttl=None) -> list[SeatHold]:
+    """
+    Reserve seats on a trip for ``user`` until the hold expires.
+
+    The trip row is locked, so concurrent holds and bookings of the same
+    trip are serialized instead of racing on the unique constraints.
+    Holds the user already has on these seats are extended.
+    """
+    now = timezone.now()
+    expires_at = now + (ttl or hold_ttl())
+    seats = sorted(set(seats))
+
+    with transaction.atomic():
+        trip = Trip.lock_for_seats([trip_id]).get(trip_id)
+        if trip is None:
+            raise serializers.ValidationError({"trip": f"Trip {trip_id} does not exist"})
+
+        SeatHold.objects.filter(trip_id=trip_id, expires_at__lte=now).delete()
+        holders = dict(
+            SeatHold.objects
+            .filter(trip_id=trip_id, seat__in=seats)
+            .values_list("seat", "user_id")
+        )
+
+        seat_map = trip.get_seat_map()
+        for seat in seats:
+            Ticket.validate_seat(seat, trip.bus.num_seats, serializers.ValidationError)
+            if seat_map.is_taken(seat) or holders.get(seat, user.pk) != user.pk:
+                raise serializers.ValidationError(
+                    {"seats": f"seat {seat} on trip {trip_id} is not available"}
+                )
+
+        SeatHold.objects.filter(
+            trip_id=trip_id, seat__in=holders
+        ).update(expires_at=expires_at)
+        SeatHold.objects.bulk_create(
+            SeatHold(trip_id=trip_id, seat=seat, user=user, expires_at=expires_at)
+            for seat in seats if seat not in holders
+        )
+
+    return list(SeatHold.objects.filter(trip_id=trip_id, seat__in=seats, user=user))
+
+
+def checkout(user, hold_ids=None) -> Order:
+    """
+    Turn the user's active holds (all of them or ``hold_ids``) into an Order.
+    """
+    with transaction.atomic():
+        holds = SeatHold.objects.filter(user=user)
+        if hold_ids is not None:
+            holds = holds.filter(pk__in=hold_ids)
+        holds = list(holds)
+
+        # lock the trips before looking at expiry, a sweep cannot race us then
+        Trip.lock_for_seats({hold.trip_id for hold in holds})
+
+        now = timezone.now()
+        if not holds or (hold_ids is not None and len(holds) != len(set(hold_ids))):
+            raise serializers.ValidationError({"holds": "No such seat holds"})
+        if any(hold.expires_at <= now for hold in holds):
+            raise serializers.ValidationError({"holds": "Seat hold has expired"})
+
+        order = Order.objects.create(user=user)
+        book_tickets(order, [{"trip": hold.trip_id, "seat": hold.seat} for hold in holds])
+        SeatHold.objects.filter(pk__in=[hold.pk for hold in holds]).delete()
+
+    return order
+
+
+def sweep_expired_holds(batch_size: int = 10_000) -> int:
+    """
+    Delete expired holds in short batches, returns the number removed.
+    """
+    removed = 0
+    while True:
+        expired = list(
+            SeatHold.objects
+            .filter(expires_at__lte=timezone.now())
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not expired:
+            return removed
+        removed += SeatHold.objects.filter(pk__in=expired).delete()[0]
@@ -0,0 +1,98 @@
+"""
+Lazy materialization of TripSchedule departures into Trip rows.
+
+Trips of a schedule exist only
+
+- up to ``TRIP_SCHEDULE_HORIZON`` ahead, created by ``roll_horizon``
+  (``manage.py materialize_schedules``, run daily), and
+- for dates further ahead once a search asks for them, created by
+  ``materialize_date`` (at most ``TRIP_SCHEDULE_LOOKAHEAD`` ahead).
+
+Everything else (seat maps, bookings, holds) works on the materialized
+Trip, so a departure can be booked as soon as it has been found. Trips
+are created with ``ignore_conflicts`` on the (schedule, departure)
+constraint, so concurrent materializations don't duplicate them.
+
+Editing a schedule doesn't touch its materialized trips, which may
+already have tickets. A deleted trip of a schedule is created again when
+its date is looked up past the horizon; end the schedule or clear the
+weekday to cancel departures.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from station.cache import invalidate
+from station.journeys import connection_index
+from station.models import Trip, TripSchedule
+
+
+def _created(trips: list[Trip]) -> int:
+    if trips:
+        Trip.objects.bulk_create(trips, batch_size=1000, ignore_conflicts=True)
+        # bulk_create doesn't send the signals these rely on
+        invalidate("trip")
+        connection_index.invalidate()
+    return len(trips)
+
+
+def roll_horizon(today: date | None = None) -> int:
+    """
+    Creates the trips of every schedule up to the horizon and returns how
+    many were attempted.
+    """
+    today = today or timezone.localdate()
+    until = today + settings.TRIP_SCHEDULE_HORIZON
+
+    schedules = (
+        TripSchedule.objects
+        .filter(valid_from__lte=until)
+        .filter(Q(valid_until__isnull=True) | Q(valid_until__gte=today))
+        .filter(Q(materialized_until__isnull=True) | Q(materialized_until__lt=until))
+    )
+    trips = []
+    schedule_ids = []
+    for schedule in schedules:
+        schedule_ids.append(schedule.pk)
+        start = max(today, schedule.valid_from)
+        if schedule.materialized_until:
+            start = max(start, schedule.materialized_until + timedelta(days=1))
+        trips.extend(schedule.trip_on(day) for day in schedule.dates(start, until))
+
+    created = _created(trips)
+    TripSchedule.objects.filter(pk__in=schedule_ids).update(materialized_until=until)
+    return created
+
+
+def materialize_date(day: date, source: str = None, destination: str = None) -> int:
+    """
+    Creates the missing trips departing on ``day`` of the schedules on a
+    route between ``source`` and ``destination`` (any when omitted).
+    """
+    today = timezone.localdate()
+    if not today <= day <= today + settings.TRIP_SCHEDULE_LOOKAHEAD:
+        return 0
+
+    day_start = timezone.make_aware(datetime.combine(day, time.min))
+    schedules = (
+        TripSchedule.objects
+        .running_on(day)
+        .filter(Q(materialized_until__isnull=True) | Q(materialized_until__lt=day))
+        .exclude(
+            Exists(
+                Trip.objects.filter(
+                    schedule=OuterRef("pk"),
+                    departure__gte=day_start,
+                    departure__lt=day_start + timedelta(days=1),
+                )
+            )
+        )
+    )
+    if source:
+        schedules = schedules.filter(route__source__name=source)
+    if destination:
+        schedules = schedules.filter(route__destination__name=destination)
+
+    return _created([schedule.trip_on(day) for schedule in schedules])
@@ -0,0 +1,88 @@
+import base64
+
+from django.dispatch import Signal
+
+# Sent after a trip's seat map was written, with ``trip_id``, ``taken`` and
+# ``released`` (lists of seat numbers) as keyword arguments.
+seats_changed = Signal()
+
+
+class SeatMap:
+    """
+    Seat occupancy of a trip packed into a bitset.
+
+    Seat ``n`` is bit ``(n - 1) % 8`` (most significant first) of byte
+    ``(n - 1) // 8``, so a 60-seat coach fits into 8 bytes.
+    """
+
+    def __init__(self, num_seats: int, data: bytes = b""):
+        self.num_seats = num_seats
+        self._bits = bytearray(data or b"")
+        self._grow(num_seats)
+
+    def __len__(self):
+        return self.num_seats
+
+    def __eq__(self, other):
+        if not isinstance(other, SeatMap):
+            return NotImplemented
+        return self.to_bytes() == other.to_bytes()
+
+    @classmethod
+    def from_seats(cls, num_seats: int, seats) -> "SeatMap":
+        seat_map = cls(num_seats)
+        for seat in seats:
+            seat_map.take(seat)
+        return seat_map
+
+    def _grow(self, num_seats: int) -> None:
+        size = (num_seats + 7) // 8
+        if len(self._bits) < size:
+            self._bits.extend(bytes(size - len(self._bits)))
+
+    @staticmethod
+    def _position(seat: int) -> tuple[int, int]:
+        if seat < 1:
+            raise ValueError(f"seat must be positive, not {seat}")
+        return (seat - 1) // 8, 0x80 >> ((seat - 1) % 8)
+
+    def is_taken(self, seat: int) -> bool:
+        index, mask = self._position(seat)
+        return index < len(self._bits) and bool(self._bits[index] & mask)
+
+    def take(self, seat: int) -> None:
+        self._grow(seat)
+        index, mask = self._position(seat)
+        self._bits[index] |= mask
+
+    def release(self, seat: int) -> None:
+        if self.is_taken(seat):
+            index, mask = self._position(seat)
+            self._bits[index] &= ~mask
+
+    def count(self) -> int:
+        return int.from_bytes(self._bits, "big").bit_count()
+
+    def taken_seats(self) -> list[int]:
+        return [
+            index * 8 + bit + 1
+            for index, byte in enumerate(self._bits) if byte
+            for bit in range(8) if byte & (0x80 >> bit)
+        ]
+
+    def first_free(self) -> int | None:
+        for index, byte in enumerate(self._bits):
+            if byte != 0xFF:
+                for bit in range(8):
+                    seat = index * 8 + bit + 1
+                    if seat > self.num_seats:
+                        return None
+                    if not byte & (0x80 >> bit):
+                        return seat
+        return None
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits).rstrip(b"\x00").ljust((self.num_seats + 7) // 8, b"\x00")
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.to_bytes()).decode("ascii")
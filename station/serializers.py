@@ -1,8 +1,23 @@
+from collections import defaultdict
+
+from django.conf import settings
 from django.db import transaction
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
 
-from station.models import Bus, Trip, Facility, Ticket, Order
+from station.booking import book_tickets
+from station.images import variant_urls
+from station.models import (
+    Bus,
+    Trip,
+    Facility,
+    Ticket,
+    Order,
+    SeatHold,
+    Route,
+    TripSchedule,
+    ArchivedTicket,
+    ArchivedTrip,
+)
 
 
 class FacilitySerializer(serializers.ModelSerializer):
@@ -12,6 +27,8 @@ class FacilitySerializer(serializers.ModelSerializer):
 
 
 class BusSerializer(serializers.ModelSerializer):
+    images = serializers.SerializerMethodField()
+
     class Meta:
         model = Bus
         fields = [
@@ -19,14 +36,19 @@ class BusSerializer(serializers.ModelSerializer):
             "is_small",
             "info",
             "num_seats",
-            "facilities"
+            "facilities",
+            "images",
         ]
 
+    def get_images(self, bus) -> dict:
+        # empty until the uploaded image is processed
+        return variant_urls(bus.image_variants)
+
 
 class BusImageSerializer(BusSerializer):
     class Meta:
         model = Bus
-        fields = ["id", "image"]
+        fields = ["id", "image", "images"]
 
 
 class BusListSerializer(BusSerializer):
@@ -41,11 +63,83 @@ class BusRetrieveSerializer(BusSerializer):
     facilities = FacilitySerializer(many=True)
 
 
-class TripSerializer(serializers.ModelSerializer):
+class RouteNamesSerializer(serializers.ModelSerializer):
+    """Writes the ``route`` of a model as source and destination city names"""
+    source = serializers.CharField(source="route.source.name", max_length=63)
+    destination = serializers.CharField(
+        source="route.destination.name", max_length=63
+    )
+
+    def _intern_route(self, validated_data):
+        """Replaces the nested city names with the interned Route"""
+        names = validated_data.pop("route", None)
+        if names is None:
+            return
+
+        current = self.instance.route if self.instance else None
+        source = names.get("source", {}).get("name") or current.source.name
+        destination = (
+            names.get("destination", {}).get("name") or current.destination.name
+        )
+        validated_data["route"] = Route.intern(source, destination)
 
+    def create(self, validated_data):
+        self._intern_route(validated_data)
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        self._intern_route(validated_data)
+        return super().update(instance, validated_data)
+
+
+class TripSerializer(RouteNamesSerializer):
     class Meta:
         model = Trip
-        fields = ["id", "source", "destination", "departure", "bus"]
+        fields = ["id", "source", "destination", "departure", "arrival", "bus"]
+
+    def validate(self, attrs):
+        data = super(TripSerializer, self).validate(attrs)
+        departure = attrs.get("departure", getattr(self.instance, "departure", None))
+        arrival = attrs.get("arrival", getattr(self.instance, "arrival", None))
+        if arrival and departure and arrival <= departure:
+            raise serializers.ValidationError(
+                {"arrival": "arrival must be later than departure"}
+            )
+        return data
+
+
+class TripScheduleSerializer(RouteNamesSerializer):
+    weekdays = serializers.IntegerField(
+        min_value=1,
+        max_value=TripSchedule.EVERY_DAY,
+        default=TripSchedule.EVERY_DAY,
+        help_text="Bitmask of the weekdays it runs on, Monday is 1 and Sunday 64",
+    )
+
+    class Meta:
+        model = TripSchedule
+        fields = [
+            "id",
+            "source",
+            "destination",
+            "bus",
+            "departure_time",
+            "duration",
+            "weekdays",
+            "valid_from",
+            "valid_until",
+            "materialized_until",
+        ]
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        valid_from = attrs.get("valid_from", getattr(self.instance, "valid_from", None))
+        valid_until = attrs.get("valid_until", getattr(self.instance, "valid_until", None))
+        if valid_until and valid_from and valid_until < valid_from:
+            raise serializers.ValidationError(
+                {"valid_until": "valid_until must not be before valid_from"}
+            )
+        return data
 
 
 class TripListSerializer(TripSerializer):
@@ -66,28 +160,111 @@ class TripListSerializer(TripSerializer):
             "source",
             "destination",
             "departure",
+            "arrival",
             "bus_info",
             "bus_num_seats",
             "tickets_available"
         ]
 
 
+class RouteSerializer(serializers.ModelSerializer):
+    source = serializers.CharField(source="source.name", read_only=True)
+    destination = serializers.CharField(source="destination.name", read_only=True)
+    departures = serializers.IntegerField(read_only=True)
+    seats_available = serializers.IntegerField(read_only=True)
+    next_departure = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = Route
+        fields = [
+            "id",
+            "source",
+            "destination",
+            "departures",
+            "seats_available",
+            "next_departure",
+        ]
+
+
+class TripSearchSerializer(serializers.Serializer):
+    source = serializers.CharField(required=False, max_length=63)
+    destination = serializers.CharField(required=False, max_length=63)
+    date = serializers.DateField(required=False)
+    min_seats = serializers.IntegerField(required=False, min_value=1)
+    facilities = serializers.ListField(
+        child=serializers.IntegerField(), required=False
+    )
+
+
+class TimetableImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(
+        choices=["csv", "json", "ndjson"],
+        required=False,
+        help_text="Taken from the file extension when omitted",
+    )
+    upsert = serializers.BooleanField(
+        default=False,
+        help_text="Update the arrival of existing trips instead of reporting them",
+    )
+
+
+class TimetableImportReportSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    updated = serializers.IntegerField()
+    error_count = serializers.IntegerField()
+    errors = serializers.ListField(child=serializers.DictField())
+
+
+class TicketTripField(serializers.PrimaryKeyRelatedField):
+    """Looks trips up in the ones TicketsSerializer fetched for the list"""
+
+    def to_internal_value(self, data):
+        trips = getattr(self.parent, "trips", None)
+        if trips is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return trips[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class TicketsSerializer(serializers.ListSerializer):
+    """Tickets with all their trips fetched in one query"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            trip_ids = set()
+            for ticket in data:
+                try:
+                    trip_ids.add(int(ticket["trip"]))
+                except (KeyError, TypeError, ValueError):
+                    # reported by the ticket's own validation
+                    pass
+            self.child.trips = self.child.fields["trip"].get_queryset().in_bulk(trip_ids)
+        return super().to_internal_value(data)
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    trip = TicketTripField(queryset=Trip.objects.select_related("bus"))
+
     class Meta:
         model = Ticket
         fields = ["id", "seat", "trip"]
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Ticket.objects.all(),
-                fields=["seat", "trip"]
-            )
-        ]
+        list_serializer_class = TicketsSerializer
+        # taken seats are checked against the locked seat maps by
+        # booking.book_tickets, unique_ticket_seat_trip backs it up
+        validators = []
 
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs)
         Ticket.validate_seat(
             attrs["seat"],
-            attrs["trip"].trip.bus.num_seats,
+            attrs["trip"].bus.num_seats,
             serializers.ValidationError
         )
         return data
@@ -102,12 +279,7 @@ class TicketSerializer(serializers.ModelSerializer):
 
 class TripRetrieveSerializer(TripSerializer):
     bus = BusRetrieveSerializer(many=False, read_only=True)
-    taken_seats = serializers.SlugRelatedField(
-        slug_field="seat",
-        source="tickets",
-        many=True,
-        read_only=True
-    )
+    taken_seats = serializers.SerializerMethodField()
 
     class Meta:
         model = Trip
@@ -116,24 +288,83 @@ class TripRetrieveSerializer(TripSerializer):
             "source",
             "destination",
             "departure",
+            "arrival",
             "bus",
             "taken_seats"
         ]
 
+    def get_taken_seats(self, obj) -> list[int]:
+        return obj.get_seat_map().taken_seats()
+
+
+class TripSeatMapSerializer(serializers.ModelSerializer):
+    num_seats = serializers.IntegerField(source="bus.num_seats", read_only=True)
+    seat_map = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Trip
+        fields = ["id", "num_seats", "seats_taken", "seat_map"]
+
+    def get_seat_map(self, obj) -> str:
+        """Base64 of the occupancy bitset, seat 1 is the high bit of byte 0"""
+        return obj.get_seat_map().to_base64()
+
+
+class ArchivedTripListSerializer(serializers.ModelSerializer):
+    """An ArchivedTrip shaped like TripListSerializer"""
+    source = serializers.CharField(source="route.source.name", read_only=True)
+    destination = serializers.CharField(source="route.destination.name", read_only=True)
+    bus_info = serializers.CharField(source="bus.info", read_only=True, default=None)
+    bus_num_seats = serializers.IntegerField(
+        source="bus.num_seats", read_only=True, default=None
+    )
+    tickets_available = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = ArchivedTrip
+        fields = [
+            "id",
+            "source",
+            "destination",
+            "departure",
+            "arrival",
+            "bus_info",
+            "bus_num_seats",
+            "tickets_available"
+        ]
+
+
+class ArchivedTicketSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedTicket
+        fields = ["id", "seat", "trip"]
+
+
+class ArchivedTicketListSerializer(ArchivedTicketSerializer):
+    trip = ArchivedTripListSerializer(many=False, read_only=True)
+
 
 class OrderSerializer(serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
+    archived_ticket_serializer = ArchivedTicketSerializer
 
     class Meta:
         model = Order
         fields = ["id", "created_at", "tickets"]
 
+    def to_representation(self, instance):
+        # tickets of departed trips may have been moved by station.archive
+        data = super().to_representation(instance)
+        data["tickets"] += self.archived_ticket_serializer(
+            instance.archived_tickets.all(), many=True
+        ).data
+        return data
+
     def create(self, validated_data):
         with transaction.atomic():
             tickets_data = validated_data.pop("tickets")
             order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            book_tickets(order, tickets_data)
             return order
 
 
@@ -143,3 +374,130 @@ class TicketListSerializer(TicketSerializer):
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(read_only=True, many=True)
+    archived_ticket_serializer = ArchivedTicketListSerializer
+
+
+class OrderExportSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    file_format = serializers.ChoiceField(choices=["csv", "ndjson"], default="csv")
+
+    def validate(self, attrs):
+        if (
+            "date_from" in attrs
+            and "date_to" in attrs
+            and attrs["date_from"] > attrs["date_to"]
+        ):
+            raise serializers.ValidationError("from must not be after to")
+        return attrs
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ["id", "trip", "seat", "expires_at"]
+
+
+class BatchTripSeatsSerializer(serializers.Serializer):
+    # an id rather than a related field, the trips are loaded together
+    trip = serializers.IntegerField(min_value=1)
+    seats = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+    )
+
+
+class BatchBookingSerializer(serializers.Serializer):
+    bookings = BatchTripSeatsSerializer(many=True, allow_empty=False)
+    partial = serializers.BooleanField(
+        default=False,
+        help_text="Book the seats that are free when others are not, "
+        "instead of nothing",
+    )
+
+    def validate_bookings(self, bookings):
+        seats = sum(len(booking["seats"]) for booking in bookings)
+        if seats > settings.BATCH_BOOKING_MAX_SEATS:
+            raise serializers.ValidationError(
+                f"at most {settings.BATCH_BOOKING_MAX_SEATS} seats per batch, not {seats}"
+            )
+        return bookings
+
+
+class BatchSeatResultSerializer(serializers.Serializer):
+    trip = serializers.IntegerField()
+    seat = serializers.IntegerField()
+    status = serializers.ChoiceField(
+        choices=["booked", "conflict", "invalid", "available"]
+    )
+    detail = serializers.CharField(required=False)
+
+
+class BatchBookingResultSerializer(serializers.Serializer):
+    order = OrderSerializer(allow_null=True)
+    results = BatchSeatResultSerializer(many=True)
+
+
+class SeatHoldCreateSerializer(serializers.Serializer):
+    trip = serializers.PrimaryKeyRelatedField(queryset=Trip.objects.all())
+    seats = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+    )
+
+
+class CheckoutSerializer(serializers.Serializer):
+    holds = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        required=False,
+        help_text="Hold ids to check out, all active holds when omitted",
+    )
+
+
+class JourneySearchSerializer(serializers.Serializer):
+    source = serializers.CharField(max_length=63)
+    destination = serializers.CharField(max_length=63)
+    departure = serializers.DateTimeField(required=False)
+    min_transfer = serializers.IntegerField(
+        required=False, min_value=0, help_text="Minimum transfer time in minutes"
+    )
+    seats = serializers.IntegerField(required=False, min_value=1, default=1)
+
+
+class JourneyTicketSerializer(TicketSerializer):
+    # validate_tickets follows the legs' routes
+    trip = TicketTripField(queryset=Trip.objects.select_related("bus", "route"))
+
+
+class JourneyOrderSerializer(OrderSerializer):
+    """
+    Order of the same number of tickets on every journey leg, one per
+    passenger, the legs must connect
+    """
+    tickets = JourneyTicketSerializer(many=True, read_only=False, allow_empty=False)
+
+    def validate_tickets(self, tickets):
+        min_transfer = settings.JOURNEY_MIN_TRANSFER
+        passengers = defaultdict(int)
+        legs = {}
+        for ticket in tickets:
+            passengers[ticket["trip"].pk] += 1
+            legs[ticket["trip"].pk] = ticket["trip"]
+        if len(set(passengers.values())) > 1:
+            raise serializers.ValidationError(
+                "every leg needs a ticket for each passenger"
+            )
+        legs = sorted(legs.values(), key=lambda trip: trip.departure)
+
+        for previous, leg in zip(legs, legs[1:]):
+            if previous.route.destination_id != leg.route.source_id:
+                raise serializers.ValidationError(
+                    f"trip {leg.id} does not depart where trip {previous.id} arrives"
+                )
+            if previous.arrival is None or previous.arrival + min_transfer > leg.departure:
+                raise serializers.ValidationError(
+                    f"not enough time to transfer from trip {previous.id} to trip {leg.id}"
+                )
+
+        return tickets
@@ -0,0 +1,110 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from station.archive import archiving
+from station.cache import invalidate
+from station.journeys import connection_index
+from station.models import Bus, Facility, Order, Ticket, Trip
+from station.notifications import send_order_confirmation
+from station.realtime import seat_events
+from station.seat_map import seats_changed
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, **kwargs):
+    current = (instance.trip_id, instance.seat)
+
+    if created:
+        Trip.update_seats(instance.trip_id, taken=[instance.seat])
+    else:
+        loaded_trip_id, loaded_seat = getattr(instance, "_loaded_seat", current)
+        if (loaded_trip_id, loaded_seat) != current:
+            if loaded_trip_id == instance.trip_id:
+                Trip.update_seats(
+                    instance.trip_id, taken=[instance.seat], released=[loaded_seat]
+                )
+            else:
+                Trip.update_seats(loaded_trip_id, released=[loaded_seat])
+                Trip.update_seats(instance.trip_id, taken=[instance.seat])
+
+    instance._loaded_seat = current
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    if archiving.get():
+        return
+    # also fires for tickets removed by an Order or Trip cascade
+    Trip.update_seats(instance.trip_id, released=[instance.seat])
+
+
+# Response cache invalidation, see station.cache.CachedResponseMixin.
+
+@receiver(post_save, sender=Facility)
+@receiver(post_delete, sender=Facility)
+def facility_changed(sender, **kwargs):
+    invalidate("facility")
+
+
+@receiver(post_save, sender=Bus)
+@receiver(post_delete, sender=Bus)
+@receiver(m2m_changed, sender=Bus.facilities.through)
+def bus_changed(sender, **kwargs):
+    invalidate("bus")
+
+
+@receiver(post_save, sender=Trip)
+@receiver(post_delete, sender=Trip)
+def trip_changed(sender, **kwargs):
+    if archiving.get():
+        return
+    invalidate("trip")
+
+
+@receiver(seats_changed)
+def trip_seats_changed(sender, trip_id, **kwargs):
+    # ticket writes reach the cache through here, including bulk bookings
+    invalidate(f"seats:{trip_id}")
+
+
+# Journey planner connection index, see station.journeys.
+
+
+@receiver(post_save, sender=Trip)
+def trip_saved_for_journeys(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and update_fields <= set(Trip.SEAT_FIELDS):
+        # Trip.update_seats, applied by trip_seats_changed_for_journeys
+        return
+    trip_id = instance.pk
+    transaction.on_commit(lambda: connection_index.update_trip(trip_id))
+
+
+@receiver(post_delete, sender=Trip)
+def trip_deleted_for_journeys(sender, instance, **kwargs):
+    if archiving.get():
+        return
+    trip_id = instance.pk
+    transaction.on_commit(lambda: connection_index.remove_trip(trip_id))
+
+
+@receiver(seats_changed)
+def trip_seats_changed_for_journeys(sender, trip_id, taken, released, **kwargs):
+    delta = len(taken) - len(released)
+    transaction.on_commit(lambda: connection_index.seats_changed(trip_id, delta))
+
+
+# Seat availability push, see station.realtime.
+
+@receiver(seats_changed)
+def trip_seats_changed_for_subscribers(sender, trip_id, taken, released, **kwargs):
+    event = {"trip": trip_id, "taken": list(taken), "released": list(released)}
+    transaction.on_commit(lambda: seat_events.publish(trip_id, event))
+
+
+# Order side effects, queued with the order, see station.tasks.
+
+@receiver(post_save, sender=Order)
+def order_created(sender, instance, created, **kwargs):
+    if created:
+        send_order_confirmation.enqueue(order_id=instance.pk)
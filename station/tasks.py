@@ -0,0 +1,160 @@
+"""
+Database backed queue for side effects that should not hold up a
+request, e.g. the confirmation of a new order.
+
+``enqueue`` inserts a ``Task`` row in the caller's transaction: a task
+exists if and only if the writes it follows from were committed (a
+transactional outbox), and workers only see it after the commit.
+
+`manage.py run_workers` starts the workers. Each claims due tasks in
+batches, runs them and deletes them. A task that raises is retried after
+an exponential backoff, until ``max_attempts`` is reached and it is left
+as failed. Tasks of a worker that died stay running and are claimed again
+after ``TASK_LOCK_TIMEOUT``, so a task may run more than once.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from station.models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func=None, *, max_attempts: int | None = None):
+    """
+    Registers ``func`` to be run by the workers, queued with
+    ``func.enqueue(**payload)``. The payload must be JSON serializable.
+    """
+
+    def register(func):
+        func.task_name = f"{func.__module__}.{func.__qualname__}"
+        func.max_attempts = max_attempts
+        func.enqueue = lambda run_at=None, **payload: enqueue(func, run_at, **payload)
+        registry[func.task_name] = func
+        return func
+
+    return register if func is None else register(func)
+
+
+def enqueue(func, run_at=None, **payload) -> Task:
+    """Queues a ``task`` function, with the current transaction if any"""
+    return Task.objects.create(
+        name=func.task_name,
+        payload=payload,
+        max_attempts=func.max_attempts or settings.TASK_MAX_ATTEMPTS,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def backoff(attempts: int) -> timedelta:
+    """Delay before the retry that follows the given number of attempts"""
+    delay = min(
+        settings.TASK_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.TASK_RETRY_BACKOFF_MAX,
+    )
+    # spreads out the retries of tasks that failed together
+    return delay * random.uniform(0.5, 1)
+
+
+class Worker:
+    def __init__(self, name: str | None = None, batch_size: int | None = None):
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size or settings.TASK_BATCH_SIZE
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        """Stops after the task that is running, safe to call from a signal handler"""
+        self._stopping.set()
+
+    def claim(self) -> list[Task]:
+        now = timezone.now()
+        due = Q(status=Task.Status.PENDING, run_at__lte=now) | Q(
+            status=Task.Status.RUNNING, locked_at__lt=now - settings.TASK_LOCK_TIMEOUT
+        )
+        with transaction.atomic():
+            ids = list(
+                Task.objects
+                .select_for_update(skip_locked=True)
+                .filter(due)
+                .order_by("run_at", "id")
+                .values_list("id", flat=True)[:self.batch_size]
+            )
+            # repeats the condition, where rows can't be locked another
+            # worker may have claimed some of them since
+            Task.objects.filter(due, pk__in=ids).update(
+                status=Task.Status.RUNNING,
+                locked_by=self.name,
+                locked_at=now,
+                attempts=F("attempts") + 1,
+            )
+        return list(Task.objects.filter(pk__in=ids, locked_by=self.name, locked_at=now))
+
+    def run(self, task: Task) -> bool:
+        """Runs a claimed task, returns whether it succeeded"""
+        func = registry.get(task.name)
+        try:
+            if func is None:
+                raise LookupError(f"No task is registered as {task.name}")
+            func(**task.payload)
+        except Exception:
+            logger.exception("Task %s (%s) failed", task.pk, task.name)
+            self._failed(task, traceback.format_exc())
+            return False
+
+        Task.objects.filter(pk=task.pk, locked_by=self.name).delete()
+        return True
+
+    def _failed(self, task, error):
+        tasks = Task.objects.filter(pk=task.pk, locked_by=self.name)
+        if task.attempts >= task.max_attempts:
+            tasks.update(status=Task.Status.FAILED, last_error=error)
+        else:
+            tasks.update(
+                status=Task.Status.PENDING,
+                run_at=timezone.now() + backoff(task.attempts),
+                last_error=error,
+            )
+
+    def _release(self, tasks):
+        # claimed but not started, back to the queue as they were
+        Task.objects.filter(pk__in=[task.pk for task in tasks], locked_by=self.name).update(
+            status=Task.Status.PENDING, attempts=F("attempts") - 1
+        )
+
+    def run_pending(self) -> int:
+        """Runs tasks until none is due, returns how many were run"""
+        count = 0
+        while not self._stopping.is_set():
+            tasks = self.claim()
+            if not tasks:
+                break
+            for index, task in enumerate(tasks):
+                if self._stopping.is_set():
+                    self._release(tasks[index:])
+                    break
+                self.run(task)
+                count += 1
+        return count
+
+    def run_forever(self, poll_interval: float | None = None) -> None:
+        if poll_interval is None:
+            poll_interval = settings.TASK_POLL_INTERVAL
+        logger.info("Worker %s started", self.name)
+        while not self._stopping.is_set():
+            # like the request cycle, drops connections past CONN_MAX_AGE
+            close_old_connections()
+            if not self.run_pending():
+                self._stopping.wait(poll_interval)
+        logger.info("Worker %s stopped", self.name)
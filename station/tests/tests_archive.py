@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from station.archive import archive_trips
+from station.models import (
+    ArchivedTicket,
+    ArchivedTrip,
+    Bus,
+    Order,
+    Route,
+    SeatHold,
+    Ticket,
+    Trip,
+)
+
+ORDER_URL = reverse("station:order-list")
+OLD = datetime(2024, 1, 15, 8, 0, tzinfo=timezone.utc)
+CUTOFF = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=10)
+        route = Route.intern("Kyiv", "Lviv")
+        self.old_trips = [
+            Trip.objects.create(route=route, departure=OLD + timedelta(days=days), bus=self.bus)
+            for days in (0, 1, 30)
+        ]
+        self.live_trip = Trip.objects.create(
+            route=route, departure=datetime.now(timezone.utc) + timedelta(days=1), bus=self.bus
+        )
+        self.order = Order.objects.create(user=self.user)
+        for trip in (self.old_trips[0], self.live_trip):
+            Ticket.objects.create(order=self.order, trip=trip, seat=3)
+
+    def test_moves_departed_trips_in_batches(self):
+        SeatHold.objects.create(
+            trip=self.old_trips[1], user=self.user, seat=1, expires_at=OLD
+        )
+
+        batches = list(archive_trips(CUTOFF, batch_size=2))
+
+        self.assertEqual(batches, [(2, 1), (1, 0)])
+        self.assertEqual(list(Trip.objects.all()), [self.live_trip])
+        self.assertEqual(Ticket.objects.get().trip, self.live_trip)
+        self.assertFalse(SeatHold.objects.exists())
+
+        archived = ArchivedTrip.objects.get(pk=self.old_trips[0].pk)
+        self.assertEqual(archived.month, OLD.date().replace(day=1))
+        self.assertEqual(archived.seats_taken, 1)
+        self.assertEqual(ArchivedTrip.objects.filter(month="2024-02-01").count(), 1)
+        ticket = ArchivedTicket.objects.get()
+        self.assertEqual((ticket.trip_id, ticket.seat, ticket.order), (archived.pk, 3, self.order))
+
+    def test_orders_show_archived_tickets(self):
+        archived_ticket_id = self.order.tickets.get(trip=self.old_trips[0]).id
+        list(archive_trips(CUTOFF))
+
+        res = self.client.get(ORDER_URL)
+
+        tickets = res.data["results"][0]["tickets"]
+        self.assertEqual(len(tickets), 2)
+        archived = next(ticket for ticket in tickets if ticket["id"] == archived_ticket_id)
+        self.assertEqual(archived["trip"]["source"], "Kyiv")
+        self.assertEqual(archived["trip"]["tickets_available"], 9)
+
+        res = self.client.get(reverse("station:order-detail", args=[self.order.id]))
+
+        self.assertIn(
+            {"id": archived_ticket_id, "seat": 3, "trip": self.old_trips[0].id},
+            res.data["tickets"],
+        )
+
+    def test_archive_command(self):
+        out = StringIO()
+
+        call_command("archive_trips", "--before", "2024-02-01", "--batch-size", "1", stdout=out)
+
+        self.assertIn("Archived 2 trip(s) and 1 ticket(s)", out.getvalue())
+        self.assertEqual(Trip.objects.count(), 2)
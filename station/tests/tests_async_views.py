@@ -0,0 +1,95 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from station.models import Bus, Order, Route, Ticket, Trip
+
+ASYNC_TRIP_URL = reverse("station:async-trip-list")
+DAY = datetime(2024, 10, 1, tzinfo=timezone.utc)
+
+
+class AsyncTripViewsTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>"
+        )
+        self.async_client = AsyncClient()
+        self.auth = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=10)
+        self.trips = [
+            Trip.objects.create(
+                route=Route.intern("Kyiv", "Lviv" if hours % 2 else "Odesa"),
+                departure=DAY + timedelta(hours=hours),
+                bus=self.bus,
+            )
+            for hours in (5, 1, 3, 2, 4)
+        ]
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, trip=self.trips[0], seat=2)
+
+    def get(self, url, params=None):
+        return self.async_client.get(url, params, headers=self.auth)
+
+    async def test_authentication_required(self):
+        res = await AsyncClient().get(ASYNC_TRIP_URL)
+
+        self.assertEqual(res.status_code, 401)
+
+    async def test_trip_list_pages_by_departure(self):
+        res = await self.get(ASYNC_TRIP_URL, {"page_size": 3})
+        first_page = res.json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(first_page["results"]), 3)
+
+        res = await self.get(
+            ASYNC_TRIP_URL, {"page_size": 3, "after": first_page["next"]}
+        )
+        second_page = res.json()
+
+        self.assertIsNone(second_page["next"])
+        departures = [
+            trip["departure"]
+            for trip in first_page["results"] + second_page["results"]
+        ]
+        self.assertEqual(len(departures), 5)
+        self.assertEqual(departures, sorted(departures))
+
+    async def test_trip_list_search(self):
+        res = await self.get(ASYNC_TRIP_URL, {"from": "Kyiv", "to": "Lviv"})
+
+        results = res.json()["results"]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[-1]["tickets_available"], 9)
+
+    async def test_trip_list_invalid_cursor(self):
+        res = await self.get(ASYNC_TRIP_URL, {"after": "yesterday"})
+
+        self.assertEqual(res.status_code, 400)
+
+    async def test_trip_detail_matches_sync_endpoint(self):
+        trip = self.trips[0]
+
+        res = await self.get(reverse("station:async-trip-detail", args=[trip.id]))
+        sync_res = await self.get(reverse("station:trip-detail", args=[trip.id]))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), sync_res.json())
+
+    async def test_trip_seat_map(self):
+        res = await self.get(
+            reverse("station:async-trip-seat-map", args=[self.trips[0].id])
+        )
+
+        self.assertEqual(res.json()["seats_taken"], 1)
+        self.assertEqual(base64.b64decode(res.json()["seat_map"]), b"\x40\x00")
+
+    async def test_trip_not_found(self):
+        res = await self.get(reverse("station:async-trip-detail", args=[0]))
+
+        self.assertEqual(res.status_code, 404)
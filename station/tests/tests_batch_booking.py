@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.models import Bus, Order, Route, SeatHold, Ticket, Trip
+
+BATCH_URL = reverse("station:order-batch")
+DEPARTURE = datetime(2030, 10, 1, 8, 0, tzinfo=timezone.utc)
+
+
+class BatchBookingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="agency@test.com",
+            password="testpass123",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        bus = Bus.objects.create(info="AA 0000 BB", num_seats=10)
+        route = Route.intern("Kyiv", "Lviv")
+        self.trips = Trip.objects.bulk_create(
+            Trip(route=route, bus=bus, departure=DEPARTURE + timedelta(hours=hour))
+            for hour in range(20)
+        )
+        self.other = get_user_model().objects.create_user(
+            email="other@test.com", password="testpass123"
+        )
+
+    def book(self, bookings, partial=False):
+        return self.client.post(
+            BATCH_URL, {"bookings": bookings, "partial": partial}, format="json"
+        )
+
+    def statuses(self, res):
+        return {(row["trip"], row["seat"]): row["status"] for row in res.data["results"]}
+
+    def test_batch_books_all_seats_in_one_order(self):
+        res = self.book([{"trip": trip.id, "seats": [1, 2]} for trip in self.trips])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(set(self.statuses(res).values()), {"booked"})
+        self.assertEqual(len(res.data["order"]["tickets"]), 40)
+        self.assertEqual(Order.objects.get().tickets.count(), 40)
+        for trip in Trip.objects.all():
+            self.assertEqual(trip.get_seat_map().taken_seats(), [1, 2])
+            self.assertEqual(trip.seats_taken, 2)
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        # trips with their buses, holds, order, its confirmation task,
+        # tickets, seat maps, the response's tickets and archived
+        # tickets, and 4 savepoint statements
+        for trips in (self.trips[:1], self.trips[1:]):
+            bookings = [{"trip": trip.id, "seats": [3, 4, 5]} for trip in trips]
+            with self.subTest(trips=len(trips)), self.assertNumQueries(12):
+                res = self.book(bookings)
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_all_or_nothing_books_nothing_on_conflict(self):
+        Ticket.objects.create(
+            order=Order.objects.create(user=self.other), trip=self.trips[1], seat=2
+        )
+        SeatHold.objects.create(
+            user=self.other,
+            trip=self.trips[2],
+            seat=1,
+            expires_at=datetime.now(timezone.utc) + timedelta(minutes=5),
+        )
+
+        res = self.book([
+            {"trip": self.trips[0].id, "seats": [1]},
+            {"trip": self.trips[1].id, "seats": [2]},
+            {"trip": self.trips[2].id, "seats": [1]},
+            {"trip": self.trips[3].id, "seats": [11]},
+            {"trip": 999, "seats": [1]},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertIsNone(res.data["order"])
+        self.assertEqual(self.statuses(res), {
+            (self.trips[0].id, 1): "available",
+            (self.trips[1].id, 2): "conflict",
+            (self.trips[2].id, 1): "conflict",
+            (self.trips[3].id, 11): "invalid",
+            (999, 1): "invalid",
+        })
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 0)
+        self.assertEqual(Trip.objects.get(pk=self.trips[0].pk).seats_taken, 0)
+
+    def test_partial_books_the_free_seats(self):
+        Ticket.objects.create(
+            order=Order.objects.create(user=self.other), trip=self.trips[0], seat=2
+        )
+
+        res = self.book([{"trip": self.trips[0].id, "seats": [1, 2, 3, 3]}], partial=True)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [row["status"] for row in res.data["results"]],
+            ["booked", "conflict", "booked", "conflict"],
+        )
+        self.assertEqual(
+            sorted(ticket["seat"] for ticket in res.data["order"]["tickets"]), [1, 3]
+        )
+        self.assertEqual(
+            Trip.objects.get(pk=self.trips[0].pk).get_seat_map().taken_seats(), [1, 2, 3]
+        )
+
+    def test_partial_with_no_free_seat(self):
+        Ticket.objects.create(
+            order=Order.objects.create(user=self.other), trip=self.trips[0], seat=1
+        )
+
+        res = self.book([{"trip": self.trips[0].id, "seats": [1]}], partial=True)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 0)
+
+    @override_settings(BATCH_BOOKING_MAX_SEATS=5)
+    def test_batch_size_is_limited(self):
+        res = self.book([{"trip": self.trips[0].id, "seats": [1, 2, 3, 4, 5, 6]}])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("bookings", res.data)
@@ -0,0 +1,57 @@
+import random
+
+from django.test import TestCase
+
+from station.benchmarks import data, load, report
+from station.benchmarks.scenarios import SCENARIOS, Fixture, fixture_users
+from station.models import Order, Ticket, Trip
+
+
+class BenchmarkDataTest(TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.rows = data.populate(200, tickets=300)
+
+    def test_populate(self):
+        self.assertEqual(self.rows["trips"], Trip.objects.count())
+        self.assertEqual(self.rows["tickets"], 300)
+        self.assertEqual(Ticket.objects.count(), 300)
+        self.assertEqual(self.rows["orders"], Order.objects.count())
+        self.assertFalse(Order.objects.filter(tickets__isnull=True).exists())
+
+    def test_seat_maps_match_the_tickets(self):
+        for trip in Trip.objects.filter(tickets__isnull=False).distinct():
+            seats = sorted(trip.tickets.values_list("seat", flat=True))
+            self.assertEqual(trip.get_seat_map().taken_seats(), seats)
+            self.assertEqual(trip.seats_taken, len(seats))
+
+    def test_every_scenario_succeeds(self):
+        fixture = Fixture(*fixture_users())
+
+        with load.benchmark_settings():
+            for scenario in SCENARIOS:
+                with self.subTest(scenario.name):
+                    response = load.send(scenario.build(fixture), scenario.asynchronous)
+                    # random cities may not be connected
+                    expected = (200, 201, 404) if scenario.name == "journey-list" else (200, 201)
+                    self.assertIn(response.status_code, expected)
+
+
+class BenchmarkReportTest(TestCase):
+    def test_compare(self):
+        baseline = {"scenarios": {
+            "trip-list": {"throughput": 100, "p50_ms": 10, "p95_ms": 20, "queries": 2},
+            "removed": {"throughput": 100},
+        }}
+        current = {"scenarios": {
+            "trip-list": {"throughput": 95, "p50_ms": 15, "p95_ms": 20, "queries": 3},
+            "added": {"throughput": 100},
+        }}
+
+        rows, regressions = report.compare(baseline, current, threshold=10)
+
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            [(name, metric) for name, metric, *_ in regressions],
+            [("trip-list", "p50_ms"), ("trip-list", "queries")],
+        )
@@ -0,0 +1,127 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station import images
+from station.images import available_formats
+from station.models import Bus
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_upload(size=(2000, 1000), color="red", name="bus.jpg"):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+def upload_url(bus_id):
+    return reverse("station:bus-upload-image", args=[bus_id])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, BUS_IMAGE_WORKERS=0)
+class BusImagePipelineTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="testpass123"
+        )
+        self.client.force_authenticate(self.admin)
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=50)
+
+    def upload(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                upload_url(self.bus.id),
+                {"image": image_upload(**kwargs)},
+                format="multipart",
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.bus.refresh_from_db()
+        return res
+
+    def test_upload_renders_the_variants(self):
+        self.upload()
+
+        variants = self.bus.image_variants
+        self.assertEqual(list(variants), ["thumbnail", "card", "full"])
+        self.assertEqual(
+            (variants["thumbnail"]["width"], variants["thumbnail"]["height"]), (160, 80)
+        )
+        self.assertEqual(
+            (variants["full"]["width"], variants["full"]["height"]), (1600, 800)
+        )
+        for files in variants.values():
+            for name in available_formats():
+                self.assertTrue(files[name].startswith("upload/buses/"))
+                self.assertTrue(default_storage.exists(files[name]))
+                with default_storage.open(files[name]) as file:
+                    self.assertEqual(Image.open(file).width, files["width"])
+
+    def test_small_images_are_not_upscaled(self):
+        self.upload(size=(300, 200))
+
+        self.assertEqual(self.bus.image_variants["card"]["width"], 300)
+        self.assertEqual(self.bus.image_variants["full"]["width"], 300)
+
+    def test_variants_are_in_the_bus_api(self):
+        self.upload()
+
+        res = self.client.get(reverse("station:bus-list"))
+        urls = res.data[0]["images"]
+        self.assertEqual(
+            urls["card"]["webp"], "/media/" + self.bus.image_variants["card"]["webp"]
+        )
+
+        res = self.client.get(reverse("station:bus-detail", args=[self.bus.id]))
+        self.assertEqual(res.data["images"], urls)
+
+    def test_new_upload_replaces_the_variants(self):
+        self.upload()
+        previous = self.bus.image_variants["thumbnail"]["jpeg"]
+
+        self.upload(color="blue")
+
+        self.assertNotEqual(self.bus.image_variants["thumbnail"]["jpeg"], previous)
+        self.assertFalse(default_storage.exists(previous))
+
+    def test_stale_job_is_dropped(self):
+        self.upload()
+        Bus.objects.filter(pk=self.bus.pk).update(image_variants={})
+        render = images.render_variants
+
+        def replaced_meanwhile(original):
+            variants = render(original)
+            Bus.objects.filter(pk=self.bus.pk).update(image="upload/buses/other.jpg")
+            return variants
+
+        with mock.patch.object(images, "render_variants", replaced_meanwhile):
+            self.assertIsNone(images.process_bus_image(self.bus.pk))
+
+        self.bus.refresh_from_db()
+        self.assertEqual(self.bus.image_variants, {})
+
+    def test_command_renders_missing_variants(self):
+        self.upload()
+        Bus.objects.filter(pk=self.bus.pk).update(image_variants={})
+
+        call_command("process_bus_images", stdout=StringIO())
+
+        self.bus.refresh_from_db()
+        self.assertEqual(list(self.bus.image_variants), ["thumbnail", "card", "full"])
@@ -0,0 +1,84 @@
+import csv
+import json
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.models import Bus, Order, Route, Ticket, Trip
+
+EXPORT_URL = reverse("station:order-export")
+
+
+class TicketExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@station.com",
+            password="<PASSWORD>",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.customer = get_user_model().objects.create_user(
+            email="customer@station.com",
+            password="<PASSWORD>",
+        )
+        trip = Trip.objects.create(
+            route=Route.intern("Kyiv", "Lviv"),
+            departure=datetime(2024, 10, 5, 8, 0, tzinfo=timezone.utc),
+            bus=Bus.objects.create(info="AA 0000 BB", num_seats=50),
+        )
+        for day, seats in ((1, (1, 2)), (2, (3,)), (3, (4,))):
+            order = Order.objects.create(user=self.customer)
+            Order.objects.filter(pk=order.pk).update(
+                created_at=datetime(2024, 10, day, 12, 0, tzinfo=timezone.utc)
+            )
+            for seat in seats:
+                Ticket.objects.create(order=order, trip=trip, seat=seat)
+
+    def export(self, **params):
+        res = self.client.get(EXPORT_URL, params)
+        return res, b"".join(res.streaming_content).decode()
+
+    def test_csv_export(self):
+        res, content = self.export()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual([row["seat"] for row in rows], ["1", "2", "3", "4"])
+        self.assertEqual(rows[0]["user_email"], "customer@station.com")
+        self.assertEqual(rows[0]["source"], "Kyiv")
+        self.assertEqual(rows[0]["departure"], "2024-10-05T08:00:00+00:00")
+
+    def test_ndjson_export_by_date_range(self):
+        res, content = self.export(output="ndjson", **{"from": "2024-10-02", "to": "2024-10-02"})
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["seat"] for row in rows], [3])
+
+    def test_invalid_range(self):
+        res = self.client.get(EXPORT_URL, {"from": "2024-10-03", "to": "2024-10-01"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_requires_admin(self):
+        self.client.force_authenticate(user=self.customer)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_command(self):
+        out = StringIO()
+
+        call_command("export_tickets", "--from", "2024-10-03", "--format", "ndjson", stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row["seat"] for row in rows], [4])
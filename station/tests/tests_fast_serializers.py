@@ -0,0 +1,185 @@
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from station import fast_serializers
+from station.models import Bus, Facility, Route, Ticket, Order, Trip
+from station.renderers import ORJSONParser, ORJSONRenderer
+from station.serializers import (
+    BusListSerializer,
+    TripListSerializer,
+    TripSeatMapSerializer,
+)
+from station.views import _with_availability
+
+
+class ORJSONRendererTest(TestCase):
+    def assertRendersLikeDRF(self, data, media_type="application/json"):
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_same_bytes_as_json_renderer(self):
+        self.assertRendersLikeDRF({
+            "text": "Київ – Львів \u2028 \u2029 \"quoted\"",
+            "numbers": [0, -1, 2 ** 40, True, None],
+            "nested": {"list": [], "dict": {}},
+            "datetime": datetime(2024, 10, 1, 8, 30, tzinfo=dt_timezone.utc),
+            "microseconds": datetime(2024, 10, 1, 8, 30, 0, 5, tzinfo=dt_timezone.utc),
+            "offset": datetime(2024, 10, 1, 8, 30, tzinfo=dt_timezone(timedelta(hours=3))),
+            "date": datetime(2024, 10, 1).date(),
+            "duration": timedelta(hours=2),
+            "decimal": Decimal("1.50"),
+            "lazy": gettext_lazy("lazy"),
+            "error": [ErrorDetail("invalid", code="invalid")],
+            "tuple": (1, 2),
+        })
+
+    def test_falls_back_for_indent_and_big_integers(self):
+        self.assertRendersLikeDRF({"a": [1]}, "application/json; indent=4")
+        self.assertRendersLikeDRF({"big": 2 ** 70})
+
+    def test_parser(self):
+        parser = ORJSONParser()
+
+        self.assertEqual(
+            parser.parse(_Stream(b'{"city": "\xd0\x9a\xd0\xb8\xd1\x97\xd0\xb2"}')),
+            {"city": "Київ"},
+        )
+        with self.assertRaises(ParseError):
+            parser.parse(_Stream(b'{"seat": NaN}'))
+
+
+class _Stream:
+    def __init__(self, content):
+        self.content = content
+
+    def read(self):
+        return self.content
+
+
+class FastSerializersTest(TestCase):
+    def setUp(self):
+        wifi = Facility.objects.create(name="WiFi")
+        wc = Facility.objects.create(name="WC")
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=50)
+        self.bus.facilities.add(wifi, wc)
+        self.small_bus = Bus.objects.create(info=None, num_seats=12)
+        self.small_bus.facilities.add(wc)
+        Bus.objects.create(info="No facilities", num_seats=30)
+
+        departure = datetime(2024, 10, 1, 8, 0, tzinfo=dt_timezone.utc)
+        self.trip = Trip.objects.create(
+            route=Route.intern("Київ", "Львів"),
+            departure=departure,
+            arrival=departure + timedelta(hours=6, microseconds=5),
+            bus=self.bus,
+        )
+        Trip.objects.create(
+            route=Route.intern("Lviv", "Odesa"), departure=departure, bus=self.small_bus
+        )
+        user = get_user_model().objects.create_user(
+            email="user@station.com", password="<PASSWORD>"
+        )
+        order = Order.objects.create(user=user)
+        for seat in (1, 9, 50):
+            Ticket.objects.create(order=order, trip=self.trip, seat=seat)
+
+    def assertSameJSON(self, fast, expected):
+        self.assertEqual(fast, expected)
+        self.assertEqual(ORJSONRenderer().render(fast), JSONRenderer().render(expected))
+
+    def test_trip_list(self):
+        trips = _with_availability(Trip.objects.all()).order_by("departure", "id")
+
+        self.assertSameJSON(
+            fast_serializers.trip_list_data(fast_serializers.trip_list_values(trips)),
+            TripListSerializer(trips, many=True).data,
+        )
+
+    @override_settings(TIME_ZONE="Europe/Kyiv")
+    def test_trip_list_in_another_time_zone(self):
+        trips = _with_availability(Trip.objects.all()).order_by("departure", "id")
+
+        with timezone.override("Europe/Kyiv"):
+            data = fast_serializers.trip_list_data(fast_serializers.trip_list_values(trips))
+            self.assertSameJSON(data, TripListSerializer(trips, many=True).data)
+        self.assertEqual(data[0]["departure"], "2024-10-01T11:00:00+03:00")
+
+    def test_bus_list(self):
+        for queryset in (
+            Bus.objects.all(),
+            Bus.objects.filter(facilities__id__in=Facility.objects.values("id")).distinct(),
+        ):
+            self.assertSameJSON(
+                fast_serializers.bus_list_data(queryset),
+                BusListSerializer(queryset.prefetch_related("facilities"), many=True).data,
+            )
+
+    def test_seat_maps(self):
+        trips = Trip.objects.select_related("bus").order_by("id")
+
+        self.assertSameJSON(
+            [
+                fast_serializers.seat_map_data(row)
+                for row in fast_serializers.seat_map_values(trips)
+            ],
+            TripSeatMapSerializer(trips, many=True).data,
+        )
+
+
+class FastEndpointsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@station.com", password="<PASSWORD>"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=50)
+        self.trip = Trip.objects.create(
+            route=Route.intern("Kyiv", "Lviv"),
+            departure=timezone.now() + timedelta(days=1),
+            bus=self.bus,
+        )
+
+    def test_responses_are_rendered_with_orjson(self):
+        res = self.client.get(reverse("station:trip-list"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(res.accepted_renderer, ORJSONRenderer)
+        self.assertEqual(json.loads(res.content)["results"][0]["id"], self.trip.id)
+
+    def test_seat_map_not_found(self):
+        res = self.client.get(reverse("station:trip-seat-map", args=[self.trip.id + 1]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_json_requests_are_parsed_with_orjson(self):
+        admin = get_user_model().objects.create_user(
+            email="admin@station.com", password="<PASSWORD>", is_staff=True
+        )
+        self.client.force_authenticate(user=admin)
+
+        res = self.client.post(
+            reverse("station:bus-list"),
+            data=b'{"info": "BB 1111 CC", "num_seats": 30, "facilities": []}',
+            content_type="application/json",
+        )
+        malformed = self.client.post(
+            reverse("station:bus-list"), data=b"{", content_type="application/json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(malformed.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(malformed.data["detail"].startswith("JSON parse error"))
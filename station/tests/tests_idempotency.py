@@ -0,0 +1,174 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.idempotency import fingerprint
+from station.models import Bus, IdempotencyKey, Order, Route, SeatHold, Ticket, Trip
+
+ORDER_URL = reverse("station:order-list")
+CHECKOUT_URL = reverse("station:hold-checkout")
+
+
+class IdempotentOrderTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@test.com", password="testpass123", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = Trip.objects.create(
+            route=Route.intern("Kyiv", "Lviv"),
+            departure=timezone.now() + timedelta(days=1),
+            bus=Bus.objects.create(info="AA 0000 BB", num_seats=50),
+        )
+
+    def order(self, seats, key="key-1"):
+        headers = {"Idempotency-Key": key} if key else {}
+        return self.client.post(
+            ORDER_URL,
+            {"tickets": [{"trip": self.trip.id, "seat": seat} for seat in seats]},
+            format="json",
+            headers=headers,
+        )
+
+    def test_retry_returns_the_original_response(self):
+        first = self.order([1, 2])
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(1):
+            retry = self.order([1, 2])
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_requests_without_a_key_are_not_deduplicated(self):
+        self.order([1], key=None)
+        res = self.order([1], key=None)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_key_reused_for_another_request(self):
+        self.order([1])
+
+        res = self.order([2])
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_keys_are_per_user(self):
+        self.order([1])
+        other = get_user_model().objects.create_user(
+            email="other@test.com", password="testpass123", is_staff=True
+        )
+        self.client.force_authenticate(other)
+
+        res = self.order([2])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.filter(user=other).count(), 1)
+
+    def test_request_in_progress(self):
+        IdempotencyKey.objects.create(
+            user=self.user,
+            key="key-1",
+            fingerprint=self.fingerprint([1]),
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+        res = self.order([1])
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Order.objects.exists())
+
+    def test_abandoned_request_is_taken_over(self):
+        stored = IdempotencyKey.objects.create(
+            user=self.user,
+            key="key-1",
+            fingerprint=self.fingerprint([1]),
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        IdempotencyKey.objects.filter(pk=stored.pk).update(
+            created_at=timezone.now() - timedelta(hours=1)
+        )
+
+        res = self.order([1])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+    def test_failed_request_releases_the_key(self):
+        self.order([1], key="key-0")
+
+        res = self.order([1])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.filter(key="key-1").exists())
+
+        Ticket.objects.all().delete()
+        res = self.order([1])
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_response_is_stored_with_the_order(self):
+        save = IdempotencyKey.save
+
+        def store_fails(key, *args, **kwargs):
+            if kwargs.get("update_fields"):
+                raise RuntimeError
+            return save(key, *args, **kwargs)
+
+        with (
+            mock.patch.object(IdempotencyKey, "save", store_fails),
+            self.assertRaises(RuntimeError),
+        ):
+            self.order([1])
+
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_checkout_retry(self):
+        SeatHold.objects.create(
+            user=self.user,
+            trip=self.trip,
+            seat=5,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        headers = {"Idempotency-Key": "checkout-1"}
+
+        first = self.client.post(CHECKOUT_URL, {}, format="json", headers=headers)
+        retry = self.client.post(CHECKOUT_URL, {}, format="json", headers=headers)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_sweep_expired_keys(self):
+        self.order([1])
+        self.order([2], key="key-2")
+        IdempotencyKey.objects.filter(key="key-1").update(expires_at=timezone.now())
+        out = StringIO()
+
+        call_command("sweep_idempotency_keys", stdout=out)
+
+        self.assertIn("Removed 1", out.getvalue())
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["key-2"]
+        )
+
+    def fingerprint(self, seats):
+        request = mock.Mock(
+            method="POST",
+            path=ORDER_URL,
+            data={"tickets": [{"trip": self.trip.id, "seat": seat} for seat in seats]},
+        )
+        return fingerprint(request)
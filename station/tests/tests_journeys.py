@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.journeys import connection_index
+from station.models import Bus, Order, Route, Ticket, Trip
+
+JOURNEY_URL = reverse("station:journey-list")
+BOOK_URL = reverse("station:journey-book")
+# the connection index only holds upcoming trips
+DAY = datetime.now(timezone.utc).replace(
+    hour=0, minute=0, second=0, microsecond=0
+) + timedelta(days=1)
+
+
+def at(hours, minutes=0):
+    return DAY + timedelta(hours=hours, minutes=minutes)
+
+
+class JourneyPlannerTest(TestCase):
+    def setUp(self):
+        connection_index.invalidate()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=2)
+
+        self.kyiv_zhytomyr = self.trip("Kyiv", "Zhytomyr", at(8), at(10))
+        self.too_tight = self.trip("Zhytomyr", "Lviv", at(10, 5), at(11))
+        self.zhytomyr_lviv = self.trip("Zhytomyr", "Lviv", at(10, 30), at(12))
+        self.direct = self.trip("Kyiv", "Lviv", at(9), at(14))
+
+    def trip(self, source, destination, departure, arrival):
+        return Trip.objects.create(
+            route=Route.intern(source, destination),
+            departure=departure,
+            arrival=arrival,
+            bus=self.bus,
+        )
+
+    def plan(self, **params):
+        params = {"from": "Kyiv", "to": "Lviv", "departure": at(7).isoformat(), **params}
+        return self.client.get(JOURNEY_URL, params)
+
+    def test_earliest_arrival_with_transfer(self):
+        res = self.plan()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [leg["id"] for leg in res.data],
+            [self.kyiv_zhytomyr.id, self.zhytomyr_lviv.id],
+        )
+
+    def test_min_transfer(self):
+        res = self.plan(min_transfer=60)
+
+        self.assertEqual([leg["id"] for leg in res.data], [self.direct.id])
+
+    def test_full_trips_are_skipped(self):
+        order = Order.objects.create(user=self.user)
+        for seat in (1, 2):
+            Ticket.objects.create(order=order, trip=self.zhytomyr_lviv, seat=seat)
+        connection_index.invalidate()
+
+        res = self.plan()
+
+        self.assertEqual([leg["id"] for leg in res.data], [self.direct.id])
+
+    def test_no_journey(self):
+        res = self.plan(departure=at(20).isoformat())
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_index_follows_trip_writes(self):
+        self.plan()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            faster = self.trip("Kyiv", "Lviv", at(8, 30), at(11))
+        res = self.plan()
+
+        self.assertEqual([leg["id"] for leg in res.data], [faster.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            faster.delete()
+        res = self.plan()
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_index_free_seats_follow_bookings(self):
+        self.plan()
+        bus = Bus.objects.create(info="AA 0001 BB", num_seats=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            trip = Trip.objects.create(
+                route=Route.intern("Kyiv", "Lviv"),
+                departure=at(9, 30),
+                arrival=at(13),
+                bus=bus,
+            )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(
+                order=Order.objects.create(user=self.user), trip=trip, seat=1
+            )
+
+        trip.refresh_from_db()
+        self.assertEqual(trip.seats_taken, 1)
+        self.assertEqual(
+            connection_index._free_seats[trip.id], bus.num_seats - trip.seats_taken
+        )
+
+    def test_delete_booked_trip_while_index_is_loaded(self):
+        Ticket.objects.create(
+            order=Order.objects.create(user=self.user), trip=self.direct, seat=1
+        )
+        self.plan()
+        trip_id = self.direct.id
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.direct.delete()
+
+        self.assertNotIn(trip_id, connection_index._free_seats)
+        res = self.plan(min_transfer=60)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_book_journey_as_one_order(self):
+        payload = {
+            "tickets": [
+                {"trip": self.kyiv_zhytomyr.id, "seat": 1},
+                {"trip": self.zhytomyr_lviv.id, "seat": 1},
+            ]
+        }
+
+        res = self.client.post(BOOK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(pk=res.data["id"])
+        self.assertEqual(order.tickets.count(), 2)
+
+    def test_book_journey_for_two_passengers(self):
+        res = self.plan(seats=2)
+        legs = [leg["id"] for leg in res.data]
+        self.assertEqual(legs, [self.kyiv_zhytomyr.id, self.zhytomyr_lviv.id])
+
+        res = self.client.post(BOOK_URL, {
+            "tickets": [{"trip": trip, "seat": seat} for trip in legs for seat in (1, 2)]
+        }, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(Ticket.objects.values_list("trip_id", "seat")),
+            [(trip, seat) for trip in legs for seat in (1, 2)],
+        )
+
+    def test_book_uneven_passengers_rejected(self):
+        payload = {
+            "tickets": [
+                {"trip": self.kyiv_zhytomyr.id, "seat": 1},
+                {"trip": self.kyiv_zhytomyr.id, "seat": 2},
+                {"trip": self.zhytomyr_lviv.id, "seat": 1},
+            ]
+        }
+
+        res = self.client.post(BOOK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_book_disconnected_legs_rejected(self):
+        payload = {
+            "tickets": [
+                {"trip": self.kyiv_zhytomyr.id, "seat": 1},
+                {"trip": self.too_tight.id, "seat": 1},
+            ]
+        }
+
+        res = self.client.post(BOOK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
@@ -0,0 +1,301 @@
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.journeys import connection_index
+from station.models import Order, Ticket, Trip
+from station.seat_map import seats_changed
+from station.serializers import TripSerializer
+from station.tests.tests_trip_api import sample_trip
+
+ORDER_URL = reverse("station:order-list")
+TRIP_URL = reverse("station:trip-list")
+
+
+class SeatCounterTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        self.trip = sample_trip()
+
+    def create_order(self, *seats, trip=None):
+        trip = trip or self.trip
+        payload = {
+            "tickets": [{"seat": seat, "trip": trip.id} for seat in seats]
+        }
+        return self.client.post(ORDER_URL, payload, format="json")
+
+    def test_create_order_increments_seats_taken(self):
+        res = self.create_order(1, 2, 3)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.seats_taken, 3)
+
+    def test_trip_update_keeps_seats_booked_meanwhile(self):
+        trip = Trip.objects.get(pk=self.trip.pk)
+        self.create_order(1)
+        departure = datetime(2024, 10, 2, 8, 0, tzinfo=timezone.utc)
+
+        serializer = TripSerializer(trip, data={"departure": departure}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.departure, departure)
+        self.assertEqual(self.trip.get_seat_map().taken_seats(), [1])
+        self.assertEqual(self.trip.seats_taken, 1)
+        # the seat is still taken for the next booking
+        res = self.create_order(1)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_stale_trip_save_keeps_seats_taken(self):
+        trip = Trip.objects.get(pk=self.trip.pk)
+        self.create_order(1, 2)
+
+        trip.arrival = datetime(2024, 10, 1, 14, 0, tzinfo=timezone.utc)
+        trip.save()
+
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.arrival, trip.arrival)
+        self.assertEqual(self.trip.seats_taken, 2)
+
+    def test_delete_order_releases_seats(self):
+        res = self.create_order(1, 2)
+
+        self.client.delete(reverse("station:order-detail", args=[res.data["id"]]))
+
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.seats_taken, 0)
+
+    def test_delete_ticket_releases_seat(self):
+        self.create_order(1, 2)
+
+        Ticket.objects.filter(seat=1).delete()
+
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.seats_taken, 1)
+
+    def test_moving_ticket_to_another_trip_moves_counter(self):
+        other_trip = sample_trip(bus=self.trip.bus)
+        self.create_order(1)
+
+        ticket = Ticket.objects.get()
+        ticket.trip = other_trip
+        ticket.save()
+
+        self.trip.refresh_from_db()
+        other_trip.refresh_from_db()
+        self.assertEqual(self.trip.seats_taken, 0)
+        self.assertEqual(other_trip.seats_taken, 1)
+
+    def test_trip_list_uses_counter(self):
+        self.create_order(1, 2, 3)
+
+        res = self.client.get(TRIP_URL)
+
+        self.assertEqual(res.data["results"][0]["tickets_available"], 47)
+
+    def test_rebuild_seat_counters(self):
+        self.create_order(1, 2)
+        Trip.objects.update(seats_taken=10)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_seat_counters", "--check", stdout=StringIO())
+
+        call_command("rebuild_seat_counters", stdout=StringIO())
+
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.seats_taken, 2)
+        call_command("rebuild_seat_counters", "--check", stdout=StringIO())
+
+    def test_rebuild_seat_counters_notifies_seat_readers(self):
+        self.create_order(1, 2)
+        Trip.objects.update(seat_map=b"\x80", seats_taken=5)
+        url = reverse("station:trip-detail", args=[self.trip.id])
+        self.assertEqual(self.client.get(url).data["taken_seats"], [1])
+        connection_index.load()
+        events = []
+
+        def receiver(sender, trip_id, taken, released, **kwargs):
+            events.append((trip_id, taken, released))
+
+        seats_changed.connect(receiver)
+        self.addCleanup(seats_changed.disconnect, receiver)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("rebuild_seat_counters", stdout=StringIO())
+
+        self.assertEqual(events, [(self.trip.id, [2], [])])
+        self.assertEqual(self.client.get(url).data["taken_seats"], [1, 2])
+        self.assertIsNone(connection_index._loaded_at)
+
+    def test_rebuild_seat_counters_locks_each_batch(self):
+        sample_trip(bus=self.trip.bus)
+        locked = []
+        select_for_update = QuerySet.select_for_update
+
+        def lock(queryset, *args, **kwargs):
+            locked.append((queryset.model, kwargs))
+            return select_for_update(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, "select_for_update", autospec=True, side_effect=lock):
+            call_command("rebuild_seat_counters", "--batch-size", "1", stdout=StringIO())
+
+        # two batches of one trip, then the empty one that ends the run
+        self.assertEqual(locked, [(Trip, {"of": ("self",)})] * 3)
+
+    def test_order_belongs_to_user(self):
+        res = self.create_order(5)
+
+        self.assertEqual(Order.objects.get(pk=res.data["id"]).user, self.user)
+
+
+class BulkBookingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        self.trip = sample_trip()
+
+    def post_order(self, tickets):
+        return self.client.post(ORDER_URL, {"tickets": tickets}, format="json")
+
+    def test_group_booking_inserts_all_seats(self):
+        res = self.post_order(
+            [{"seat": seat, "trip": self.trip.id} for seat in range(1, 46)]
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.filter(trip=self.trip).count(), 45)
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.seats_taken, 45)
+        self.assertEqual(self.trip.get_seat_map().taken_seats(), list(range(1, 46)))
+
+    def test_duplicate_seat_in_one_order_rejected(self):
+        res = self.post_order([
+            {"seat": 3, "trip": self.trip.id},
+            {"seat": 3, "trip": self.trip.id},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_seat_out_of_range_rejected(self):
+        res = self.post_order([{"seat": 51, "trip": self.trip.id}])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_taken_seat_rejected_without_partial_order(self):
+        self.post_order([{"seat": 1, "trip": self.trip.id}])
+        other_trip = sample_trip(bus=self.trip.bus)
+
+        res = self.post_order([
+            {"seat": 1, "trip": other_trip.id},
+            {"seat": 1, "trip": self.trip.id},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Order.objects.count(), 1)
+        other_trip.refresh_from_db()
+        self.assertEqual(other_trip.seats_taken, 0)
+
+    def test_unknown_or_malformed_trip_rejected(self):
+        res = self.post_order([
+            {"seat": 1, "trip": self.trip.id},
+            {"seat": 1, "trip": 999},
+            {"seat": 1, "trip": "abc"},
+            {"seat": 1, "trip": True},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = {
+            index: ticket["trip"][0].code for index, ticket in res.data["tickets"].items()
+        }
+        self.assertEqual(
+            errors, {1: "does_not_exist", 2: "incorrect_type", 3: "incorrect_type"}
+        )
+        self.assertFalse(Order.objects.exists())
+
+    def test_order_query_count_does_not_grow_per_seat(self):
+        def queries_for(seats):
+            trip = sample_trip(bus=self.trip.bus)
+            with CaptureQueriesContext(connection) as ctx:
+                self.post_order([{"seat": seat, "trip": trip.id} for seat in seats])
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries_for(range(1, 3)), queries_for(range(1, 41)))
+
+
+class OrderPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.orders = [Order.objects.create(user=self.user) for _ in range(5)]
+        other = get_user_model().objects.create_user(email="other@test.com")
+        Order.objects.create(user=other)
+
+    def test_orders_are_paged_newest_first(self):
+        # same created_at, ties are broken by id
+        Order.objects.update(created_at=datetime(2024, 10, 1, tzinfo=timezone.utc))
+
+        seen = []
+        url = ORDER_URL + "?page_size=2"
+        while url:
+            res = self.client.get(url)
+            self.assertLessEqual(len(res.data["results"]), 2)
+            seen.extend(order["id"] for order in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(seen, [order.id for order in reversed(self.orders)])
+
+    def test_orders_created_together_are_paged_without_offset(self):
+        Order.objects.update(created_at=datetime(2024, 10, 1, tzinfo=timezone.utc))
+        newest_first = [order.id for order in reversed(self.orders)]
+        res = self.client.get(ORDER_URL, {"page_size": 2})
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(res.data["next"])
+
+        self.assertEqual([order["id"] for order in res.data["results"]], newest_first[2:4])
+        page_query = next(
+            query["sql"] for query in queries if 'FROM "station_order"' in query["sql"]
+        )
+        self.assertNotIn("OFFSET", page_query)
+
+        res = self.client.get(res.data["previous"])
+
+        self.assertEqual([order["id"] for order in res.data["results"]], newest_first[:2])
+        self.assertIsNone(res.data["previous"])
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite query plan")
+    def test_order_list_uses_the_user_index(self):
+        queryset = Order.objects.filter(user=self.user).order_by("-created_at", "-id")
+
+        plan = queryset[:20].explain()
+
+        self.assertIn("station_ord_user_id_6b59a2_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
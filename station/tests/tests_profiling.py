@@ -0,0 +1,157 @@
+import pstats
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import mixins, serializers, status
+from rest_framework.test import APIClient
+
+from station.models import Bus, Route, Trip
+from station.profiling import metrics
+from station.views import TripScheduleViewSet
+
+METRICS_URL = reverse("metrics")
+
+
+def _server_timing(response) -> dict:
+    timings = {}
+    for metric in response["Server-Timing"].split(", "):
+        name, *params = metric.split(";")
+        timings[name] = dict(param.split("=", 1) for param in params)
+    return timings
+
+
+@override_settings(REQUEST_PROFILING=True, REQUEST_PROFILE_SAMPLE_RATE=0)
+class RequestProfilingTest(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@station.com", password="<PASSWORD>"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.trip = Trip.objects.create(
+            route=Route.intern("Kyiv", "Lviv"),
+            departure=timezone.now() + timedelta(days=1),
+            bus=Bus.objects.create(info="AA 0000 BB", num_seats=50),
+        )
+
+    def test_server_timing(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(reverse("station:trip-search"), {"from": "Kyiv"})
+
+        timings = _server_timing(res)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(timings["view"]["desc"], '"TripViewSet.search"')
+        self.assertEqual(timings["db"]["desc"], f'"{len(queries)} queries"')
+        for name in ("db", "serializer", "render"):
+            self.assertGreaterEqual(float(timings[name]["dur"]), 0)
+        self.assertGreater(float(timings["total"]["dur"]), 0)
+
+    def test_serializer_time(self):
+        for url in (
+            reverse("station:trip-detail", args=[self.trip.id]),
+            reverse("station:route-list"),
+        ):
+            with self.subTest(url=url):
+                res = self.client.get(url)
+
+                self.assertGreater(float(_server_timing(res)["serializer"]["dur"]), 0)
+
+        # timed through get_serializer, DRF's classes and actions are left alone
+        self.assertEqual(
+            serializers.Serializer.data.fget.__module__, "rest_framework.serializers"
+        )
+        self.assertIs(TripScheduleViewSet.retrieve, mixins.RetrieveModelMixin.retrieve)
+
+    def test_async_view(self):
+        res = self.client.get(reverse("station:async-trip-list"))
+
+        self.assertEqual(
+            _server_timing(res)["view"]["desc"], '"async_views.trip_list"'
+        )
+
+    @override_settings(DEBUG=True)
+    async def test_middleware_is_not_adapted_under_asgi(self):
+        with mock.patch("django.core.handlers.base.logger") as logger:
+            res = await AsyncClient().get(reverse("station:async-trip-list"))
+
+        self.assertIn("Server-Timing", res)
+        adapted = [
+            call.args[1] for call in logger.debug.call_args_list
+            if "RequestProfilingMiddleware" in str(call.args[1:])
+        ]
+        self.assertEqual(adapted, [])
+
+    def test_cache_hits_and_misses(self):
+        url = reverse("station:trip-detail", args=[self.trip.id])
+
+        first = self.client.get(url)
+        second = self.client.get(url)
+
+        self.assertEqual(_server_timing(first)["cache"]["desc"], '"hits=0 misses=1"')
+        self.assertEqual(_server_timing(second)["cache"]["desc"], '"hits=1 misses=0"')
+
+    def test_metrics(self):
+        self.client.get(reverse("station:trip-detail", args=[self.trip.id]))
+        self.client.get(reverse("station:trip-detail", args=[self.trip.id]))
+        self.client.get(reverse("station:trip-detail", args=[0]))
+        self.client.force_authenticate(user=None)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain; version=0.0.4"))
+        content = res.content.decode()
+        self.assertIn(
+            'station_requests_total{view="TripViewSet.retrieve",method="GET",status="200"} 2',
+            content,
+        )
+        self.assertIn(
+            'station_requests_total{view="TripViewSet.retrieve",method="GET",status="404"} 1',
+            content,
+        )
+        self.assertIn('station_cache_hits_total{view="TripViewSet.retrieve"} 1', content)
+        self.assertIn(
+            'station_request_duration_seconds_count{view="TripViewSet.retrieve"} 3', content
+        )
+
+    def test_metrics_need_an_internal_ip_or_staff(self):
+        client = APIClient(REMOTE_ADDR="10.0.0.1")
+
+        self.assertEqual(client.get(METRICS_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+        client.force_authenticate(user=self.user)
+        self.assertEqual(client.get(METRICS_URL).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_slow_requests_are_profiled(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            REQUEST_PROFILE_SAMPLE_RATE=1,
+            REQUEST_PROFILE_SLOW_MS=0,
+            REQUEST_PROFILE_DIR=directory,
+        ):
+            self.client.get(reverse("station:trip-list"))
+
+            dumps = list(Path(directory).iterdir())
+            self.assertEqual(len(dumps), 1)
+            self.assertIn("TripViewSet.list", dumps[0].name)
+            self.assertTrue(pstats.Stats(str(dumps[0])).total_calls)
+
+
+class ProfilingDisabledTest(TestCase):
+    def test_off_by_default(self):
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(email="user@station.com", password="x")
+        )
+
+        res = client.get(reverse("station:trip-list"))
+
+        self.assertNotIn("Server-Timing", res)
+        self.assertEqual(client.get(METRICS_URL).status_code, status.HTTP_404_NOT_FOUND)
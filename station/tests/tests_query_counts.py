@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.models import Bus, Facility, Order, Route, SeatHold, Ticket, Trip
+from station.seat_map import SeatMap
+
+ROWS = (10, 100, 1000)
+DEPARTURE = datetime(2024, 10, 1, 8, 0, tzinfo=timezone.utc)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class QueryCountTest(TestCase):
+    """
+    Every list/retrieve endpoint must run a fixed number of queries,
+    however many rows it returns.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=1000)
+
+    def assertQueriesConstant(self, expected, make_rows, url):
+        created = 0
+        for rows in ROWS:
+            with self.subTest(rows=rows):
+                make_rows(rows - created)
+                created = rows
+                path = url() if callable(url) else url
+
+                with self.assertNumQueries(expected):
+                    res = self.client.get(path)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def make_facilities(self, count):
+        first = Facility.objects.count()
+        return Facility.objects.bulk_create(
+            Facility(name=f"Facility {first + i}") for i in range(count)
+        )
+
+    def make_buses(self, count):
+        buses = Bus.objects.bulk_create(
+            Bus(info=f"AA {i:04} BB", num_seats=50) for i in range(count)
+        )
+        facilities = self.make_facilities(2)
+        for bus in buses:
+            bus.facilities.add(*facilities)
+
+    def make_trips(self, count):
+        route = Route.intern("Kyiv", "Lviv")
+        Trip.objects.bulk_create(
+            Trip(
+                route=route,
+                departure=DEPARTURE + timedelta(hours=i),
+                bus=self.bus,
+            )
+            for i in range(count)
+        )
+
+    def make_tickets(self, trip, order, count):
+        first = Ticket.objects.filter(trip=trip).count()
+        seats = range(first + 1, first + count + 1)
+        Ticket.objects.bulk_create(
+            Ticket(trip=trip, order=order, seat=seat) for seat in seats
+        )
+        trip.set_seat_map(SeatMap.from_seats(self.bus.num_seats, range(1, seats.stop)))
+        trip.save(update_fields=Trip.SEAT_FIELDS)
+
+    def test_facility_list(self):
+        self.assertQueriesConstant(
+            1, self.make_facilities, reverse("station:facility-list")
+        )
+
+    def test_facility_retrieve(self):
+        facility = Facility.objects.create(name="WiFi")
+        self.assertQueriesConstant(
+            1,
+            self.make_facilities,
+            reverse("station:facility-detail", args=[facility.id]),
+        )
+
+    def test_bus_list(self):
+        self.assertQueriesConstant(2, self.make_buses, reverse("station:bus-list"))
+
+    def test_bus_list_filtered_by_facilities(self):
+        facility = Facility.objects.create(name="WiFi")
+
+        def make_buses(count):
+            self.make_buses(count)
+            facility.buses.add(*Bus.objects.all())
+
+        self.assertQueriesConstant(
+            2, make_buses, reverse("station:bus-list") + f"?facilities={facility.id}"
+        )
+
+    def test_bus_retrieve(self):
+        self.bus.facilities.add(Facility.objects.create(name="WiFi"))
+
+        def add_facilities(count):
+            self.bus.facilities.add(*self.make_facilities(count))
+
+        self.assertQueriesConstant(
+            2, add_facilities, reverse("station:bus-detail", args=[self.bus.id])
+        )
+
+    def test_trip_list(self):
+        self.assertQueriesConstant(1, self.make_trips, reverse("station:trip-list"))
+
+    def test_trip_search(self):
+        self.assertQueriesConstant(
+            1, self.make_trips, reverse("station:trip-search") + "?from=Kyiv&to=Lviv"
+        )
+
+    def test_route_list(self):
+        def make_routes(count):
+            first = Route.objects.count()
+            for i in range(count):
+                Route.intern(f"City {first + i}", "Lviv")
+            self.make_trips(count)
+
+        self.assertQueriesConstant(1, make_routes, reverse("station:route-list"))
+
+    def test_trip_retrieve(self):
+        self.bus.facilities.add(*self.make_facilities(3))
+        self.make_trips(1)
+        trip = Trip.objects.get()
+        order = Order.objects.create(user=self.user)
+
+        self.assertQueriesConstant(
+            2,
+            lambda count: self.make_tickets(trip, order, count),
+            reverse("station:trip-detail", args=[trip.id]),
+        )
+
+    def test_trip_seat_maps(self):
+        self.assertQueriesConstant(
+            1,
+            self.make_trips,
+            lambda: reverse("station:trip-seat-maps") + "?ids=" + ",".join(
+                str(pk) for pk in Trip.objects.values_list("pk", flat=True)[:100]
+            ),
+        )
+
+    def test_order_list(self):
+        self.make_trips(1)
+        trip = Trip.objects.get()
+
+        def make_orders(count):
+            for _ in range(count):
+                self.make_tickets(trip, Order.objects.create(user=self.user), 1)
+
+        # orders, tickets, their trips and archived tickets
+        self.assertQueriesConstant(4, make_orders, reverse("station:order-list"))
+
+        for page_size in (1, 20, 100):
+            with self.subTest(page_size=page_size), self.assertNumQueries(4):
+                res = self.client.get(
+                    reverse("station:order-list"), {"page_size": page_size}
+                )
+            self.assertEqual(len(res.data["results"]), page_size)
+
+    def test_order_retrieve(self):
+        self.make_trips(1)
+        trip = Trip.objects.get()
+        order = Order.objects.create(user=self.user)
+
+        # order, tickets and archived tickets
+        self.assertQueriesConstant(
+            3,
+            lambda count: self.make_tickets(trip, order, count),
+            reverse("station:order-detail", args=[order.id]),
+        )
+
+    def test_hold_list(self):
+        self.make_trips(1)
+        trip = Trip.objects.get()
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=10)
+
+        def make_holds(count):
+            first = SeatHold.objects.count()
+            SeatHold.objects.bulk_create(
+                SeatHold(trip=trip, user=self.user, seat=first + i + 1, expires_at=expires_at)
+                for i in range(count)
+            )
+
+        self.assertQueriesConstant(1, make_holds, reverse("station:hold-list"))
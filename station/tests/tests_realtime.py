@@ -0,0 +1,129 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from station.models import Bus, Order, Route, Ticket, Trip
+from station.realtime import RESYNC, seat_events, websocket_application
+
+
+class SeatEventsTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>"
+        )
+        self.token = str(AccessToken.for_user(self.user))
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=10)
+        self.trip = Trip.objects.create(
+            route=Route.intern("Kyiv", "Lviv"),
+            departure=datetime(2024, 10, 1, 8, 0, tzinfo=timezone.utc),
+            bus=self.bus,
+        )
+        self.url = reverse("station:async-trip-seat-events", args=[self.trip.id])
+
+    async def test_sse_snapshot_then_deltas(self):
+        res = await AsyncClient().get(
+            self.url, headers={"Authorization": f"Bearer {self.token}"}
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        stream = aiter(res.streaming_content)
+
+        chunk = (await anext(stream)).decode()
+        self.assertTrue(chunk.startswith("event: snapshot\n"))
+        self.assertEqual(seat_events.subscriber_count(self.trip.id), 1)
+
+        seat_events.publish(self.trip.id, {"trip": self.trip.id, "taken": [3], "released": []})
+        chunk = (await anext(stream)).decode()
+
+        self.assertTrue(chunk.startswith("event: seats\n"))
+        self.assertEqual(json.loads(chunk.split("data: ")[1])["taken"], [3])
+
+        # the ASGI handler cancels the response task once the client is gone
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertEqual(seat_events.subscriber_count(self.trip.id), 0)
+
+    async def test_sse_unknown_trip(self):
+        res = await AsyncClient().get(
+            reverse("station:async-trip-seat-events", args=[self.trip.id + 1]),
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(seat_events.subscriber_count(self.trip.id + 1), 0)
+
+    def test_ticket_writes_are_published_on_commit(self):
+        order = Order.objects.create(user=self.user)
+        with mock.patch.object(seat_events, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                ticket = Ticket.objects.create(order=order, trip=self.trip, seat=4)
+            publish.assert_called_once_with(
+                self.trip.id, {"trip": self.trip.id, "taken": [4], "released": []}
+            )
+
+            publish.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                ticket.delete()
+            publish.assert_called_once_with(
+                self.trip.id, {"trip": self.trip.id, "taken": [], "released": [4]}
+            )
+
+    @override_settings(SEAT_EVENTS_QUEUE_SIZE=2)
+    async def test_slow_subscriber_gets_a_new_snapshot(self):
+        subscription = seat_events.subscribe(self.trip.id)
+        self.addCleanup(seat_events.unsubscribe, subscription)
+        for seat in (1, 2, 3):
+            seat_events.publish(self.trip.id, {"trip": self.trip.id, "taken": [seat], "released": []})
+
+        self.assertIs(await subscription.get(1), RESYNC)
+        self.assertIsNone(await subscription.get(0.01))
+
+    async def run_websocket(self, query_string):
+        incoming = asyncio.Queue()
+        outgoing = asyncio.Queue()
+        await incoming.put({"type": "websocket.connect"})
+        scope = {
+            "type": "websocket",
+            "path": f"/ws/station/trips/{self.trip.id}/seats/",
+            "query_string": query_string,
+        }
+        task = asyncio.ensure_future(
+            websocket_application(scope, incoming.get, outgoing.put)
+        )
+        return task, incoming, outgoing
+
+    async def test_websocket_requires_token(self):
+        task, _, outgoing = await self.run_websocket(b"")
+        await task
+
+        self.assertEqual(
+            await outgoing.get(), {"type": "websocket.close", "code": 4401}
+        )
+
+    async def test_websocket_snapshot_then_deltas(self):
+        task, incoming, outgoing = await self.run_websocket(
+            f"token={self.token}".encode()
+        )
+
+        self.assertEqual(await outgoing.get(), {"type": "websocket.accept"})
+        snapshot = json.loads((await outgoing.get())["text"])
+        self.assertEqual(snapshot["type"], "snapshot")
+        self.assertEqual(snapshot["num_seats"], 10)
+
+        seat_events.publish(self.trip.id, {"trip": self.trip.id, "taken": [], "released": [5]})
+        delta = json.loads((await outgoing.get())["text"])
+        self.assertEqual(delta, {"type": "seats", "trip": self.trip.id, "taken": [], "released": [5]})
+
+        await incoming.put({"type": "websocket.disconnect", "code": 1000})
+        await task
+        self.assertEqual(seat_events.subscriber_count(self.trip.id), 0)
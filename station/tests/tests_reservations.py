@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.models import SeatHold, Ticket, Trip
+from station.reservations import hold_seats, sweep_expired_holds
+from station.tests.tests_trip_api import sample_bus, sample_trip
+
+HOLD_URL = reverse("station:hold-list")
+CHECKOUT_URL = reverse("station:hold-checkout")
+ORDER_URL = reverse("station:order-list")
+
+
+class SeatHoldApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@station.com",
+            password="<PASSWORD>"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email="other@station.com",
+            password="<PASSWORD>",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        self.trip = sample_trip(bus=sample_bus(num_seats=10))
+
+    def hold(self, *seats):
+        return self.client.post(
+            HOLD_URL, {"trip": self.trip.id, "seats": list(seats)}, format="json"
+        )
+
+    def test_hold_seats(self):
+        res = self.hold(1, 2)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([hold["seat"] for hold in res.data], [1, 2])
+        self.assertEqual(SeatHold.objects.filter(user=self.user).count(), 2)
+
+    def test_seat_held_by_other_user_is_unavailable(self):
+        hold_seats(self.other_user, self.trip.id, [3])
+
+        res = self.hold(3)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rehold_extends_own_hold(self):
+        hold_seats(self.user, self.trip.id, [3], ttl=timedelta(seconds=1))
+
+        res = self.hold(3)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        hold = SeatHold.objects.get()
+        self.assertGreater(
+            hold.expires_at, datetime.now(timezone.utc) + timedelta(minutes=5)
+        )
+
+    def test_expired_hold_can_be_taken_over(self):
+        hold_seats(self.other_user, self.trip.id, [4], ttl=timedelta(seconds=-1))
+
+        res = self.hold(4)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    def test_checkout_turns_holds_into_tickets(self):
+        self.hold(1, 2)
+
+        res = self.client.post(CHECKOUT_URL, {}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            sorted(ticket["seat"] for ticket in res.data["tickets"]), [1, 2]
+        )
+        self.assertFalse(SeatHold.objects.exists())
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.seats_taken, 2)
+
+    def test_checkout_expired_hold_fails(self):
+        hold_seats(self.user, self.trip.id, [1], ttl=timedelta(seconds=-1))
+
+        res = self.client.post(CHECKOUT_URL, {}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_order_cannot_take_seat_held_by_other_user(self):
+        self.hold(5)
+        self.client.force_authenticate(user=self.other_user)
+
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"seat": 5, "trip": self.trip.id}]},
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_release_hold(self):
+        hold_id = self.hold(1).data[0]["id"]
+
+        res = self.client.delete(reverse("station:hold-detail", args=[hold_id]))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_sweep_expired_holds(self):
+        hold_seats(self.user, self.trip.id, [3])
+        hold_seats(self.user, self.trip.id, [1, 2], ttl=timedelta(seconds=-1))
+
+        self.assertEqual(sweep_expired_holds(batch_size=1), 2)
+        self.assertEqual(list(SeatHold.objects.values_list("seat", flat=True)), [3])
+
+        call_command("sweep_seat_holds", stdout=StringIO())
@@ -0,0 +1,123 @@
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.models import Bus, Facility, Order, Route, Ticket, Trip
+
+BUS_URL = reverse("station:bus-list")
+FACILITY_URL = reverse("station:facility-list")
+
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=50)
+
+    def test_second_request_is_served_from_cache(self):
+        self.client.get(BUS_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(BUS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+
+    def test_query_params_are_part_of_the_key(self):
+        facility = Facility.objects.create(name="WiFi")
+        self.client.get(BUS_URL)
+
+        res = self.client.get(BUS_URL, {"facilities": str(facility.id)})
+
+        self.assertEqual(res.data, [])
+
+    def test_bus_save_invalidates(self):
+        self.client.get(BUS_URL)
+
+        Bus.objects.create(info="AA 0001 BB", num_seats=20)
+        res = self.client.get(BUS_URL)
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_facility_m2m_change_invalidates(self):
+        facility = Facility.objects.create(name="WiFi")
+        self.client.get(BUS_URL)
+
+        self.bus.facilities.add(facility)
+        res = self.client.get(BUS_URL)
+
+        self.assertEqual(res.data[0]["facilities"], ["WiFi"])
+
+    def test_facility_rename_invalidates_bus_list(self):
+        facility = Facility.objects.create(name="WiFi")
+        self.bus.facilities.add(facility)
+        self.client.get(BUS_URL)
+
+        facility.name = "Wi-Fi"
+        facility.save()
+        res = self.client.get(BUS_URL)
+
+        self.assertEqual(res.data[0]["facilities"], ["Wi-Fi"])
+
+    def test_etag_not_modified(self):
+        res = self.client.get(FACILITY_URL)
+        etag = res["ETag"]
+
+        res = self.client.get(FACILITY_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b"")
+
+        Facility.objects.create(name="WiFi")
+        res = self.client.get(FACILITY_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_etag_is_matched_whole(self):
+        etag = self.client.get(FACILITY_URL)["ETag"]
+
+        for if_none_match, expected in (
+            (f'"other", {etag}', status.HTTP_304_NOT_MODIFIED),
+            (f"W/{etag}", status.HTTP_304_NOT_MODIFIED),
+            ("*", status.HTTP_304_NOT_MODIFIED),
+            (etag[1:9], status.HTTP_200_OK),
+            (f'"x{etag}"', status.HTTP_200_OK),
+            ('"other"', status.HTTP_200_OK),
+        ):
+            with self.subTest(if_none_match=if_none_match):
+                res = self.client.get(FACILITY_URL, HTTP_IF_NONE_MATCH=if_none_match)
+
+                self.assertEqual(res.status_code, expected)
+
+    def test_ticket_invalidates_trip_retrieve(self):
+        trip = Trip.objects.create(
+            route=Route.intern("Kyiv", "Lviv"),
+            departure=datetime(2024, 10, 1, 8, 0, tzinfo=timezone.utc),
+            bus=self.bus,
+        )
+        url = reverse("station:trip-detail", args=[trip.id])
+        self.client.get(url)
+
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, trip=trip, seat=4)
+        res = self.client.get(url)
+
+        self.assertEqual(res.data["taken_seats"], [4])
+
+    def test_cache_disabled(self):
+        self.client.get(BUS_URL)
+
+        with self.settings(RESPONSE_CACHE_TIMEOUT=0):
+            with self.assertNumQueries(2):
+                self.client.get(BUS_URL)
@@ -0,0 +1,124 @@
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.models import Bus, Route, Trip, TripSchedule
+from station.schedules import materialize_date, roll_horizon
+
+SEARCH_URL = reverse("station:trip-search")
+SCHEDULE_URL = reverse("station:schedule-list")
+MONDAY = 1
+SATURDAY, SUNDAY = 32, 64
+
+
+def next_weekday(weekday: int, weeks: int = 0) -> date:
+    today = timezone.localdate()
+    return today + timedelta(days=(weekday - today.weekday()) % 7 + 7 * weeks)
+
+
+class TripScheduleTest(TestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=50)
+        self.schedule = TripSchedule.objects.create(
+            route=Route.intern("Kyiv", "Lviv"),
+            bus=self.bus,
+            departure_time=time(8, 30),
+            duration=timedelta(hours=6),
+            weekdays=TripSchedule.EVERY_DAY & ~(SATURDAY | SUNDAY),
+            valid_from=timezone.localdate(),
+        )
+
+    def test_runs_on_weekdays_within_validity(self):
+        monday = next_weekday(0)
+        self.schedule.valid_until = monday + timedelta(days=7)
+
+        self.assertTrue(self.schedule.runs_on(monday))
+        self.assertFalse(self.schedule.runs_on(next_weekday(5)))
+        self.assertFalse(self.schedule.runs_on(monday + timedelta(days=14)))
+        self.assertFalse(self.schedule.runs_on(self.schedule.valid_from - timedelta(days=1)))
+        self.assertIn(self.schedule, TripSchedule.objects.running_on(monday))
+        self.assertNotIn(self.schedule, TripSchedule.objects.running_on(next_weekday(6)))
+
+    def test_roll_horizon(self):
+        with self.settings(TRIP_SCHEDULE_HORIZON=timedelta(days=13)):
+            roll_horizon()
+
+        trips = Trip.objects.filter(schedule=self.schedule)
+        self.assertEqual(trips.count(), 10)
+        trip = trips.first()
+        self.assertEqual(trip.departure.time(), time(8, 30))
+        self.assertEqual(trip.arrival - trip.departure, timedelta(hours=6))
+        self.schedule.refresh_from_db()
+        self.assertEqual(
+            self.schedule.materialized_until, timezone.localdate() + timedelta(days=13)
+        )
+
+        with self.settings(TRIP_SCHEDULE_HORIZON=timedelta(days=20)):
+            roll_horizon()
+
+        self.assertEqual(trips.count(), 15)
+
+    def test_materialize_date_once(self):
+        monday = next_weekday(0, weeks=8)
+
+        self.assertEqual(materialize_date(monday), 1)
+        self.assertEqual(materialize_date(monday), 0)
+        self.assertEqual(materialize_date(monday, source="Odesa"), 0)
+        self.assertEqual(materialize_date(next_weekday(6, weeks=8)), 0)
+        self.assertEqual(Trip.objects.get().departure.date(), monday)
+
+    def test_nothing_beyond_lookahead(self):
+        far = timezone.localdate() + timedelta(days=800)
+
+        with self.settings(TRIP_SCHEDULE_LOOKAHEAD=timedelta(days=365)):
+            self.assertEqual(materialize_date(far), 0)
+
+
+class TripScheduleApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=50)
+
+    def test_create_schedule_and_find_its_trips(self):
+        res = self.client.post(SCHEDULE_URL, {
+            "source": "Kyiv",
+            "destination": "Lviv",
+            "bus": self.bus.id,
+            "departure_time": "08:30",
+            "weekdays": MONDAY,
+            "valid_from": timezone.localdate(),
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(Trip.objects.exists())
+
+        monday = next_weekday(0, weeks=10)
+        res = self.client.get(SEARCH_URL, {"from": "Kyiv", "to": "Lviv", "date": monday})
+
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(
+            res.data["results"][0]["departure"],
+            timezone.make_aware(datetime.combine(monday, time(8, 30))).isoformat().replace("+00:00", "Z"),
+        )
+
+    def test_invalid_validity(self):
+        res = self.client.post(SCHEDULE_URL, {
+            "source": "Kyiv",
+            "destination": "Lviv",
+            "bus": self.bus.id,
+            "departure_time": "08:30",
+            "valid_from": "2024-10-10",
+            "valid_until": "2024-10-01",
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
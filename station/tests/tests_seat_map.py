@@ -0,0 +1,46 @@
+from django.test import SimpleTestCase
+
+from station.seat_map import SeatMap
+
+
+class SeatMapTest(SimpleTestCase):
+    def test_empty_map_is_sized_to_num_seats(self):
+        seat_map = SeatMap(60)
+
+        self.assertEqual(seat_map.to_bytes(), bytes(8))
+        self.assertEqual(seat_map.count(), 0)
+        self.assertEqual(seat_map.first_free(), 1)
+
+    def test_take_and_release(self):
+        seat_map = SeatMap(10)
+
+        seat_map.take(1)
+        seat_map.take(9)
+
+        self.assertTrue(seat_map.is_taken(1))
+        self.assertTrue(seat_map.is_taken(9))
+        self.assertFalse(seat_map.is_taken(2))
+        self.assertEqual(seat_map.to_bytes(), b"\x80\x80")
+        self.assertEqual(seat_map.taken_seats(), [1, 9])
+
+        seat_map.release(1)
+
+        self.assertFalse(seat_map.is_taken(1))
+        self.assertEqual(seat_map.count(), 1)
+
+    def test_round_trip_through_bytes(self):
+        seat_map = SeatMap.from_seats(20, [3, 4, 20])
+
+        restored = SeatMap(20, seat_map.to_bytes())
+
+        self.assertEqual(restored, seat_map)
+        self.assertEqual(restored.taken_seats(), [3, 4, 20])
+
+    def test_first_free_when_full(self):
+        seat_map = SeatMap.from_seats(3, [1, 2, 3])
+
+        self.assertIsNone(seat_map.first_free())
+
+    def test_invalid_seat(self):
+        with self.assertRaises(ValueError):
+            SeatMap(10).take(0)
@@ -0,0 +1,173 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.models import Bus, Order, Route, Task, Trip
+from station.notifications import send_order_confirmation
+from station.tasks import Worker, backoff, task
+
+calls = []
+
+
+@task(max_attempts=2)
+def flaky(fail: bool):
+    calls.append(fail)
+    if fail:
+        raise RuntimeError("boom")
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.worker = Worker(name="test")
+
+    def test_successful_task_is_deleted(self):
+        flaky.enqueue(fail=False)
+
+        self.assertEqual(self.worker.run_pending(), 1)
+
+        self.assertEqual(calls, [False])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_task_is_retried_with_backoff(self):
+        queued = flaky.enqueue(fail=True)
+
+        with self.assertLogs("station.tasks", "ERROR"):
+            self.worker.run_pending()
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.Status.PENDING)
+        self.assertEqual(queued.attempts, 1)
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn("RuntimeError: boom", queued.last_error)
+        # not due yet
+        self.assertEqual(self.worker.run_pending(), 0)
+
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs("station.tasks", "ERROR"):
+            self.worker.run_pending()
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.Status.FAILED)
+        self.assertEqual(queued.attempts, 2)
+        self.assertEqual(calls, [True, True])
+
+    @override_settings(
+        TASK_RETRY_BACKOFF=timedelta(seconds=10),
+        TASK_RETRY_BACKOFF_MAX=timedelta(seconds=60),
+    )
+    def test_backoff(self):
+        with mock.patch("station.tasks.random.uniform", return_value=1):
+            self.assertEqual(
+                [backoff(attempts).seconds for attempts in range(1, 6)],
+                [10, 20, 40, 60, 60],
+            )
+
+    def test_tasks_of_a_dead_worker_are_claimed_again(self):
+        queued = flaky.enqueue(fail=False)
+        Task.objects.update(
+            status=Task.Status.RUNNING,
+            locked_by="dead",
+            locked_at=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertEqual([claimed.pk for claimed in self.worker.claim()], [queued.pk])
+
+    def test_running_tasks_are_not_claimed_twice(self):
+        flaky.enqueue(fail=False)
+
+        self.assertEqual(len(self.worker.claim()), 1)
+        self.assertEqual(Worker(name="other").claim(), [])
+
+    def test_stopped_worker_releases_its_claims(self):
+        for _ in range(3):
+            flaky.enqueue(fail=False)
+
+        with mock.patch.object(Worker, "run", side_effect=lambda task: self.worker.stop()):
+            self.assertEqual(self.worker.run_pending(), 1)
+
+        self.assertEqual(
+            list(Task.objects.values_list("status", "attempts")),
+            [(Task.Status.RUNNING, 1)] + [(Task.Status.PENDING, 0)] * 2,
+        )
+
+    def test_unknown_task_fails(self):
+        Task.objects.create(name="station.missing", max_attempts=1)
+
+        with self.assertLogs("station.tasks", "ERROR"):
+            self.worker.run_pending()
+
+        self.assertIn("LookupError", Task.objects.get().last_error)
+
+    def test_command_runs_due_tasks(self):
+        flaky.enqueue(fail=False)
+        out = StringIO()
+
+        call_command("run_workers", once=True, stdout=out)
+
+        self.assertIn("Ran 1 task(s)", out.getvalue())
+        self.assertFalse(Task.objects.exists())
+
+
+class OrderTasksTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@test.com", password="testpass123", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = Trip.objects.create(
+            route=Route.intern("Kyiv", "Lviv"),
+            departure=timezone.now() + timedelta(days=1),
+            bus=Bus.objects.create(info="AA 0000 BB", num_seats=50),
+        )
+
+    def create_order(self, seats):
+        return self.client.post(
+            reverse("station:order-list"),
+            {"tickets": [{"trip": self.trip.id, "seat": seat} for seat in seats]},
+            format="json",
+        )
+
+    def test_order_confirmation_is_queued_and_sent(self):
+        res = self.create_order([1, 2])
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        queued = Task.objects.get()
+        self.assertEqual(queued.name, send_order_confirmation.task_name)
+        self.assertEqual(queued.payload, {"order_id": res.data["id"]})
+        self.assertEqual(len(mail.outbox), 0)
+
+        Worker().run_pending()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["user@test.com"])
+        self.assertIn("Kyiv - Lviv", mail.outbox[0].body)
+        self.assertIn("seat 2", mail.outbox[0].body)
+
+    def test_failed_order_queues_nothing(self):
+        self.create_order([1])
+
+        res = self.create_order([1])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_deleted_order_is_skipped(self):
+        self.create_order([1])
+        Order.objects.all().delete()
+
+        Worker().run_pending()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(Task.objects.exists())
+
@@ -0,0 +1,148 @@
+import json
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.models import Bus, Route, Trip
+from station.timetable import TimetableError, import_timetable, read_json
+
+IMPORT_URL = reverse("station:trip-import-timetable")
+
+CSV = """bus,source,destination,departure,arrival
+AA 0000 BB,Kyiv,Lviv,2024-10-01T08:00:00+00:00,2024-10-01T14:00:00+00:00
+{bus_id},Kyiv,Odesa,2024-10-01T09:00:00+00:00,
+AA 0000 BB,Lviv,Kyiv,2024-10-02T08:00:00+00:00,2024-10-02T07:00:00+00:00
+XX 9999 XX,Lviv,Kyiv,2024-10-02T08:00:00+00:00,
+"""
+
+
+class TimetableImportTest(TestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=50)
+
+    def import_csv(self, content, **options):
+        return import_timetable(StringIO(content), "csv", **options)
+
+    def test_csv_import_reports_row_errors(self):
+        report = self.import_csv(CSV.format(bus_id=self.bus.id), batch_size=2)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual(
+            [(error.row, error.error) for error in report.errors],
+            [(3, "arrival must be after departure"), (4, "unknown bus 'XX 9999 XX'")],
+        )
+        trip = Trip.objects.get(route=Route.intern("Kyiv", "Lviv"))
+        self.assertEqual(trip.bus, self.bus)
+        self.assertEqual(trip.arrival, datetime(2024, 10, 1, 14, 0, tzinfo=timezone.utc))
+
+    def test_existing_trips_are_rejected_or_upserted(self):
+        content = CSV.format(bus_id=self.bus.id)
+        self.import_csv(content)
+
+        report = self.import_csv(content)
+        self.assertEqual(report.created, 0)
+        self.assertEqual(
+            sum("trip already exists" in error.error for error in report.errors), 2
+        )
+
+        content = content.replace("2024-10-01T14:00", "2024-10-01T15:00")
+        report = self.import_csv(content, upsert=True)
+
+        self.assertEqual((report.created, report.updated), (0, 2))
+        self.assertEqual(Trip.objects.count(), 2)
+        trip = Trip.objects.get(route=Route.intern("Kyiv", "Lviv"))
+        self.assertEqual(trip.arrival.hour, 15)
+
+    def test_json_array_is_read_in_chunks(self):
+        trips = [
+            {"vehicle_id": self.bus.id, "origin": "Kyiv", "to": "Lviv",
+             "departure_time": f"2024-10-01T{hour:02}:00:00+00:00"}
+            for hour in range(10)
+        ]
+        content = json.dumps(trips, indent=2)
+
+        self.assertEqual(list(read_json(StringIO(content), chunk_size=16)), trips)
+        report = import_timetable(StringIO(content), "json")
+        self.assertEqual(report.created, 10)
+
+    def test_truncated_json_keeps_previous_rows(self):
+        content = json.dumps([
+            {"bus": self.bus.id, "source": "Kyiv", "destination": "Lviv",
+             "departure": "2024-10-01T08:00:00+00:00"}
+        ])[:-1] + ', {"bus": '
+
+        report = import_timetable(StringIO(content), "json")
+
+        self.assertEqual(report.created, 1)
+        self.assertEqual(report.errors[0].error, "truncated or invalid JSON")
+
+    def test_not_a_json_array(self):
+        with self.assertRaises(TimetableError):
+            list(read_json(StringIO('{"bus": 1}')))
+
+    def test_ndjson_invalid_line(self):
+        content = (
+            f'{{"bus": {self.bus.id}, "source": "Kyiv", "destination": "Lviv", '
+            f'"departure": "2024-10-01T08:00:00+00:00"}}\n'
+            "not json\n"
+        )
+
+        report = import_timetable(StringIO(content), "ndjson")
+
+        self.assertEqual(report.created, 1)
+        self.assertEqual(report.errors[0].row, 2)
+
+    def test_import_command(self):
+        out = StringIO()
+        path = self.enterContext(tempfile.TemporaryDirectory()) + "/timetable.csv"
+        with open(path, "w") as file:
+            file.write(CSV.format(bus_id=self.bus.id))
+
+        call_command("import_timetable", path, stdout=out, stderr=StringIO())
+
+        self.assertIn("Created 2 and updated 0 trip(s), 2 row(s) skipped", out.getvalue())
+
+
+class TimetableImportApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bus = Bus.objects.create(info="AA 0000 BB", num_seats=50)
+
+    def upload(self, name, content, **data):
+        file = SimpleUploadedFile(name, content.encode())
+        return self.client.post(IMPORT_URL, {"file": file, **data}, format="multipart")
+
+    def test_import_csv(self):
+        res = self.upload("timetable.csv", CSV.format(bus_id=self.bus.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["error_count"], 2)
+        self.assertEqual(res.data["errors"][0]["row"], 3)
+
+    def test_unknown_extension(self):
+        res = self.upload("timetable.xml", "<trips/>")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_requires_admin(self):
+        self.user.is_staff = False
+        self.user.save()
+
+        res = self.upload("timetable.csv", CSV.format(bus_id=self.bus.id))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
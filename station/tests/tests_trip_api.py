@@ -0,0 +1,292 @@
+import base64
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from station.models import Bus, Facility, Order, Route, Station, Ticket, Trip
+from station.pagination import TripCursorPagination
+
+TRIP_URL = reverse("station:trip-list")
+SEAT_MAPS_URL = reverse("station:trip-seat-maps")
+SEARCH_URL = reverse("station:trip-search")
+ROUTE_URL = reverse("station:route-list")
+
+
+def detail_url(trip_id):
+    return reverse("station:trip-detail", args=[trip_id])
+
+
+def seat_map_url(trip_id):
+    return reverse("station:trip-seat-map", args=[trip_id])
+
+
+def sample_bus(**params) -> Bus:
+    defaults = {
+        "info": "AA 0000 BB",
+        "num_seats": 50,
+    }
+    defaults.update(params)
+    return Bus.objects.create(**defaults)
+
+
+def sample_trip(**params) -> Trip:
+    defaults = {
+        "departure": datetime(2024, 10, 1, 8, 0, tzinfo=timezone.utc),
+    }
+    defaults.update(params)
+    defaults["route"] = Route.intern(
+        defaults.pop("source", "Kyiv"), defaults.pop("destination", "Lviv")
+    )
+    if "bus" not in defaults:
+        defaults["bus"] = sample_bus()
+    return Trip.objects.create(**defaults)
+
+
+class AuthenticatedTripApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bus = sample_bus()
+
+    def test_trip_list_is_paginated_by_departure(self):
+        start = datetime(2024, 10, 1, 8, 0, tzinfo=timezone.utc)
+        for hours in (3, 1, 2):
+            sample_trip(bus=self.bus, departure=start + timedelta(hours=hours))
+
+        res = self.client.get(TRIP_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNone(res.data["previous"])
+        self.assertIsNotNone(res.data["next"])
+
+        departures = [trip["departure"] for trip in res.data["results"]]
+        self.assertEqual(departures, sorted(departures))
+
+        res = self.client.get(res.data["next"])
+
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertIsNone(res.data["next"])
+
+    def test_trips_with_same_departure_are_not_skipped(self):
+        trips = [sample_trip(bus=self.bus) for _ in range(5)]
+
+        seen = []
+        url = TRIP_URL + "?page_size=2"
+        while url:
+            res = self.client.get(url)
+            seen.extend(trip["id"] for trip in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(seen, [trip.id for trip in trips])
+
+    def test_trip_pages_filter_on_departure_and_id(self):
+        trips = [sample_trip(bus=self.bus) for _ in range(5)]
+        res = self.client.get(TRIP_URL, {"page_size": 2})
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(res.data["next"])
+
+        self.assertEqual(
+            [trip["id"] for trip in res.data["results"]], [trips[2].id, trips[3].id]
+        )
+        self.assertNotIn("OFFSET", queries[-1]["sql"])
+
+        res = self.client.get(res.data["previous"])
+
+        self.assertEqual(
+            [trip["id"] for trip in res.data["results"]], [trips[0].id, trips[1].id]
+        )
+        self.assertIsNone(res.data["previous"])
+
+    def test_invalid_trip_cursor(self):
+        for cursor in ("cD1bIngiLCAiMSJd", "cD1ub3Rqc29u"):
+            res = self.client.get(TRIP_URL, {"cursor": cursor})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_size_is_capped(self):
+        for _ in range(3):
+            sample_trip(bus=self.bus)
+
+        with patch.object(TripCursorPagination, "max_page_size", 2):
+            res = self.client.get(TRIP_URL, {"page_size": 10_000})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def book(self, trip, *seats):
+        order = Order.objects.create(user=self.user)
+        for seat in seats:
+            Ticket.objects.create(order=order, trip=trip, seat=seat)
+        return order
+
+    def test_retrieve_trip_lists_taken_seats(self):
+        trip = sample_trip(bus=self.bus)
+        self.book(trip, 7, 2)
+
+        res = self.client.get(detail_url(trip.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken_seats"], [2, 7])
+
+    def test_seat_map(self):
+        trip = sample_trip(bus=self.bus)
+        order = self.book(trip, 1, 2, 9)
+
+        res = self.client.get(seat_map_url(trip.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["num_seats"], 50)
+        self.assertEqual(res.data["seats_taken"], 3)
+        self.assertEqual(
+            base64.b64decode(res.data["seat_map"]),
+            b"\xc0\x80" + bytes(5),
+        )
+
+        order.delete()
+        res = self.client.get(seat_map_url(trip.id))
+
+        self.assertEqual(res.data["seats_taken"], 0)
+        self.assertEqual(base64.b64decode(res.data["seat_map"]), bytes(7))
+
+    def test_seat_maps_batch(self):
+        trip_1 = sample_trip(bus=self.bus)
+        trip_2 = sample_trip(bus=self.bus)
+        sample_trip(bus=self.bus)
+        self.book(trip_2, 50)
+
+        res = self.client.get(SEAT_MAPS_URL, {"ids": f"{trip_2.id},{trip_1.id}"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in res.data], [trip_1.id, trip_2.id])
+        self.assertEqual(res.data[1]["seats_taken"], 1)
+
+    def test_seat_maps_invalid_ids(self):
+        res = self.client.get(SEAT_MAPS_URL, {"ids": "1,a"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TripSearchApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bus = sample_bus(num_seats=3)
+        self.day = datetime(2024, 10, 1, tzinfo=timezone.utc)
+
+    def search(self, **params):
+        res = self.client.get(SEARCH_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [trip["id"] for trip in res.data["results"]]
+
+    def test_search_by_route_and_date_sorted_by_departure(self):
+        late = sample_trip(bus=self.bus, departure=self.day + timedelta(hours=20))
+        early = sample_trip(bus=self.bus, departure=self.day + timedelta(hours=6))
+        sample_trip(bus=self.bus, departure=self.day + timedelta(days=1, hours=6))
+        sample_trip(bus=self.bus, destination="Odesa", departure=self.day)
+
+        found = self.search(**{"from": "Kyiv", "to": "Lviv", "date": "2024-10-01"})
+
+        self.assertEqual(found, [early.id, late.id])
+
+    def test_search_min_seats(self):
+        full = sample_trip(bus=self.bus)
+        free = sample_trip(bus=self.bus)
+        order = Order.objects.create(user=self.user)
+        for seat in (1, 2):
+            Ticket.objects.create(order=order, trip=full, seat=seat)
+
+        self.assertEqual(self.search(min_seats=2), [free.id])
+        self.assertEqual(self.search(min_seats=1), [full.id, free.id])
+
+    def test_search_facilities(self):
+        wifi = Facility.objects.create(name="WiFi")
+        bus_with_wifi = sample_bus()
+        bus_with_wifi.facilities.add(wifi, Facility.objects.create(name="WC"))
+        trip = sample_trip(bus=bus_with_wifi)
+        sample_trip(bus=self.bus)
+
+        self.assertEqual(self.search(facilities=f"{wifi.id}"), [trip.id])
+
+    def test_search_invalid_params(self):
+        res = self.client.get(SEARCH_URL, {"date": "tomorrow", "min_seats": "0"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("date", res.data)
+        self.assertIn("min_seats", res.data)
+
+
+class TripRouteApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="<EMAIL>",
+            password="<PASSWORD>",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bus = sample_bus()
+
+    def test_create_trip_interns_city_names(self):
+        payload = {
+            "source": "Kyiv",
+            "destination": "Lviv",
+            "departure": "2024-10-01T08:00:00Z",
+            "bus": self.bus.id,
+        }
+
+        self.client.post(TRIP_URL, payload)
+        res = self.client.post(TRIP_URL, {**payload, "source": " Kyiv "})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["source"], "Kyiv")
+        self.assertEqual(Route.objects.count(), 1)
+        self.assertEqual(Station.objects.count(), 2)
+
+    def test_partial_update_keeps_other_end_of_route(self):
+        trip = sample_trip(bus=self.bus)
+
+        res = self.client.patch(detail_url(trip.id), {"destination": "Odesa"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        trip.refresh_from_db()
+        self.assertEqual(str(trip.route), "Kyiv - Odesa")
+
+    def test_route_aggregates(self):
+        day = datetime(2024, 10, 1, tzinfo=timezone.utc)
+        trip = sample_trip(bus=self.bus, departure=day + timedelta(hours=8))
+        sample_trip(bus=self.bus, departure=day + timedelta(hours=18))
+        sample_trip(bus=self.bus, departure=day + timedelta(days=1))
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, trip=trip, seat=1)
+
+        res = self.client.get(ROUTE_URL, {"from": "Kyiv", "date": "2024-10-01"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["departures"], 2)
+        self.assertEqual(res.data[0]["seats_available"], 99)
+
+    def test_routes_are_read_only(self):
+        sample_trip(bus=self.bus)
+
+        res = self.client.post(ROUTE_URL, {"source": "Kyiv", "destination": "Odesa"})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(Route.objects.count(), 1)
@@ -0,0 +1,308 @@
+"""
+Bulk import of trips from timetable files.
+
+Records are read one at a time from CSV, NDJSON or a JSON array, cleaned
+against bus and route lookups loaded once up front, and written with
+``bulk_create`` in batches of ``TIMETABLE_IMPORT_BATCH_SIZE``. A trip is
+identified by (bus, source, destination, departure): in the default mode
+records matching an existing trip are reported as errors, with
+``upsert=True`` they update its arrival instead.
+
+Columns may use GTFS-style names (``vehicle_id``, ``origin``,
+``departure_time`` ...), see ``FIELD_ALIASES``. Times must be full ISO 8601
+datetimes; naive ones are read in the current time zone.
+"""
+import csv
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Iterable, Iterator, TextIO
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from station.cache import invalidate
+from station.journeys import connection_index
+from station.models import Bus, Route, Station, Trip
+
+FORMATS = ("csv", "json", "ndjson")
+
+FIELD_ALIASES = {
+    "bus": ("bus", "bus_id", "vehicle_id"),
+    "source": ("source", "from", "origin"),
+    "destination": ("destination", "to"),
+    "departure": ("departure", "departure_time"),
+    "arrival": ("arrival", "arrival_time"),
+}
+REQUIRED_FIELDS = ("bus", "source", "destination", "departure")
+
+
+class TimetableError(ValueError):
+    pass
+
+
+def format_for(filename: str) -> str:
+    """The import format matching a file name's extension"""
+    suffix = filename.rpartition(".")[2].lower()
+    if suffix not in FORMATS:
+        raise TimetableError(
+            f"Unknown timetable format {suffix!r}, expected one of {', '.join(FORMATS)}"
+        )
+    return suffix
+
+
+def read_csv(file: TextIO) -> Iterator:
+    yield from csv.DictReader(file)
+
+
+def read_ndjson(file: TextIO) -> Iterator:
+    for line in file:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                yield TimetableError(f"invalid JSON: {error}")
+
+
+def read_json(file: TextIO, chunk_size: int = 64 * 1024) -> Iterator:
+    """Yields the items of a top-level JSON array without loading it whole"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+
+    while True:
+        chunk = file.read(chunk_size)
+        buffer = buffer[position:] + chunk
+        position = 0
+
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != "[":
+                    raise TimetableError("expected a JSON array of trips")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if not chunk:
+                    raise TimetableError("truncated or invalid JSON")
+                # the item continues in the next chunk
+                break
+            yield item
+
+        if not chunk:
+            if not started:
+                raise TimetableError("expected a JSON array of trips")
+            raise TimetableError("truncated or invalid JSON")
+
+
+READERS = {
+    "csv": read_csv,
+    "json": read_json,
+    "ndjson": read_ndjson,
+}
+
+
+@dataclass
+class RowError:
+    row: int
+    error: str
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    updated: int = 0
+    error_count: int = 0
+    errors: list[RowError] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class TimetableImporter:
+    def __init__(self, upsert: bool = False, batch_size: int = None, max_errors: int = 1000):
+        self.upsert = upsert
+        self.batch_size = batch_size or settings.TIMETABLE_IMPORT_BATCH_SIZE
+        self.max_errors = max_errors
+        self.report = ImportReport()
+        self._load_lookups()
+
+    def _load_lookups(self) -> None:
+        self._bus_ids = set()
+        self._bus_by_info = {}
+        self._ambiguous_info = set()
+        for bus_id, info in Bus.objects.values_list("id", "info"):
+            self._bus_ids.add(bus_id)
+            if info in self._bus_by_info:
+                self._ambiguous_info.add(info)
+            self._bus_by_info[info] = bus_id
+
+        self._routes = {
+            (source, destination): route_id
+            for route_id, source, destination in Route.objects.values_list(
+                "id", "source__name", "destination__name"
+            )
+        }
+
+    def _error(self, row: int, message: str) -> None:
+        self.report.error_count += 1
+        if len(self.report.errors) < self.max_errors:
+            self.report.errors.append(RowError(row, message))
+
+    def _bus_id(self, reference: str) -> int:
+        if reference.isdigit() and int(reference) in self._bus_ids:
+            return int(reference)
+        if reference in self._ambiguous_info:
+            raise TimetableError(f"several buses are named {reference!r}, use the bus id")
+        if reference in self._bus_by_info:
+            return self._bus_by_info[reference]
+        raise TimetableError(f"unknown bus {reference!r}")
+
+    def _route_id(self, source: str, destination: str) -> int:
+        key = (source, destination)
+        if key not in self._routes:
+            self._routes[key] = Route.intern(source, destination).pk
+        return self._routes[key]
+
+    @staticmethod
+    def _datetime(name: str, value) -> datetime:
+        try:
+            parsed = parse_datetime(str(value).strip())
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise TimetableError(f"{name}: invalid datetime {value!r}")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def _clean(self, record) -> Trip:
+        if isinstance(record, Exception):
+            raise record
+        if not isinstance(record, dict):
+            raise TimetableError("expected an object")
+
+        values = {}
+        for name, aliases in FIELD_ALIASES.items():
+            for alias in aliases:
+                if record.get(alias) not in (None, ""):
+                    values[name] = record[alias]
+                    break
+
+        missing = [name for name in REQUIRED_FIELDS if name not in values]
+        if missing:
+            raise TimetableError(f"missing {', '.join(missing)}")
+
+        source = str(values["source"]).strip()
+        destination = str(values["destination"]).strip()
+        max_length = Station._meta.get_field("name").max_length
+        for name, city in (("source", source), ("destination", destination)):
+            if len(city) > max_length:
+                raise TimetableError(f"{name}: longer than {max_length} characters")
+        if source == destination:
+            raise TimetableError("source and destination are the same")
+
+        bus_id = self._bus_id(str(values["bus"]).strip())
+        departure = self._datetime("departure", values["departure"])
+        arrival = None
+        if "arrival" in values:
+            arrival = self._datetime("arrival", values["arrival"])
+            if arrival <= departure:
+                raise TimetableError("arrival must be after departure")
+
+        return Trip(
+            bus_id=bus_id,
+            route_id=self._route_id(source, destination),
+            departure=departure,
+            arrival=arrival,
+        )
+
+    def _write(self, batch: list[tuple[int, Trip]]) -> None:
+        trips = {}
+        for row, trip in batch:
+            key = (trip.bus_id, trip.route_id, trip.departure)
+            if key in trips and not self.upsert:
+                self._error(row, f"duplicate of row {trips[key][0]}")
+                continue
+            trips[key] = (row, trip)
+
+        existing = {
+            (bus_id, route_id, departure): trip_id
+            for trip_id, bus_id, route_id, departure in Trip.objects.filter(
+                bus_id__in={key[0] for key in trips},
+                route_id__in={key[1] for key in trips},
+                departure__in={key[2] for key in trips},
+            ).values_list("id", "bus_id", "route_id", "departure")
+        }
+
+        to_create = []
+        to_update = []
+        for key, (row, trip) in trips.items():
+            if key not in existing:
+                to_create.append(trip)
+            elif self.upsert:
+                trip.pk = existing[key]
+                to_update.append(trip)
+            else:
+                self._error(row, f"trip already exists (id={existing[key]})")
+
+        with transaction.atomic():
+            Trip.objects.bulk_create(to_create)
+            Trip.objects.bulk_update(to_update, ["arrival"])
+
+        self.report.created += len(to_create)
+        self.report.updated += len(to_update)
+
+    def run(self, records: Iterable) -> ImportReport:
+        records = iter(records)
+        batch = []
+        row = 0
+        try:
+            while True:
+                try:
+                    record = next(records)
+                except StopIteration:
+                    break
+                except TimetableError as error:
+                    # the file can't be read any further
+                    self._error(row + 1, str(error))
+                    break
+
+                row += 1
+                try:
+                    batch.append((row, self._clean(record)))
+                except TimetableError as error:
+                    self._error(row, str(error))
+
+                if len(batch) >= self.batch_size:
+                    self._write(batch)
+                    batch = []
+            if batch:
+                self._write(batch)
+        finally:
+            # bulk writes don't send the signals these rely on
+            if self.report.created or self.report.updated:
+                invalidate("trip")
+                connection_index.invalidate()
+
+        return self.report
+
+
+def import_timetable(file: TextIO, file_format: str, **options) -> ImportReport:
+    """
+    Imports the trips of an open text file, see TimetableImporter for the
+    options. Reading stops at the first error that makes the rest of the
+    file unreadable (e.g. truncated JSON), the rows before it are kept.
+    """
+    return TimetableImporter(**options).run(READERS[file_format](file))
@@ -2,17 +2,43 @@ from django.contrib.admin import action
 from django.urls import path, include
 from rest_framework import routers
 
-from station.views import BusViewSet, TripViewSet, FacilityViewSet, OrderViewSet
+from station import async_views
+from station.views import (
+    BusViewSet,
+    TripViewSet,
+    FacilityViewSet,
+    OrderViewSet,
+    SeatHoldViewSet,
+    RouteViewSet,
+    TripScheduleViewSet,
+    JourneyViewSet,
+)
 
 router = routers.DefaultRouter()
 
 router.register("buses", BusViewSet, basename="bus")
 router.register("trips", TripViewSet, basename="trip")
+router.register("routes", RouteViewSet, basename="route")
+router.register("schedules", TripScheduleViewSet, basename="schedule")
 router.register("facilities", FacilityViewSet, basename="facility")
 router.register("orders", OrderViewSet,  basename="order")
+router.register("holds", SeatHoldViewSet, basename="hold")
+router.register("journeys", JourneyViewSet, basename="journey")
 
 
 urlpatterns = [
+    path("async/trips/", async_views.trip_list, name="async-trip-list"),
+    path("async/trips/<int:pk>/", async_views.trip_detail, name="async-trip-detail"),
+    path(
+        "async/trips/<int:pk>/seat-map/",
+        async_views.trip_seat_map,
+        name="async-trip-seat-map",
+    ),
+    path(
+        "async/trips/<int:pk>/seat-events/",
+        async_views.trip_seat_events,
+        name="async-trip-seat-events",
+    ),
     path("", include(router.urls)),
 ]
 
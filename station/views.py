@@ -1,16 +1,37 @@
-from django.db.models import Count, F
+import io
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Prefetch, Q, Sum
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, status, mixins
+from rest_framework import viewsets, status, mixins, serializers
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAdminUser
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
 from station.models import (
     Bus,
     Trip,
-    Facility, Order
+    Facility, Order, SeatHold, Route, Station, TripSchedule, ArchivedTicket
 )
+from station.journeys import connection_index
+from station import booking, exports, fast_serializers, reservations, schedules, timetable
+from station.cache import CachedResponseMixin
+from station.idempotency import IDEMPOTENCY_KEY_PARAMETER, IdempotentMixin
+from station.images import delete_variants, image_pipeline
+from station.pagination import OrderCursorPagination, TripCursorPagination
+from station.permissions import IsAdminOrInternalIP
+from station.profiling import TimedSerializerMixin, metrics, serialized
+from station.replicas import ReplicaReadMixin
 from station.serializers import (
     BusSerializer,
     TripSerializer,
@@ -19,30 +40,68 @@ from station.serializers import (
     FacilitySerializer,
     BusRetrieveSerializer,
     TripRetrieveSerializer,
+    TripSeatMapSerializer,
+    TripSearchSerializer,
+    TimetableImportSerializer,
+    TimetableImportReportSerializer,
+    TripScheduleSerializer,
     OrderSerializer,
     OrderListSerializer,
-    BusImageSerializer
+    OrderExportSerializer,
+    BusImageSerializer,
+    SeatHoldSerializer,
+    SeatHoldCreateSerializer,
+    CheckoutSerializer,
+    RouteSerializer,
+    JourneySearchSerializer,
+    JourneyOrderSerializer,
+    BatchBookingSerializer,
+    BatchBookingResultSerializer,
 )
 
 
-class FacilityViewSet(viewsets.ModelViewSet):
+class FacilityViewSet(
+    ReplicaReadMixin, CachedResponseMixin, TimedSerializerMixin, viewsets.ModelViewSet
+):
+    cache_namespaces = ("facility",)
     queryset = Facility.objects.all()
     serializer_class = FacilitySerializer
 
 
+def _params_to_ints(query_string):
+    """
+    Converts a query string into a list of integers.
+    """
+    return [int(str_id) for str_id in query_string.split(",")]
+
+
+def _with_availability(trips):
+    """
+    Trips with their bus and the ``tickets_available`` TripListSerializer shows.
+    """
+    return (
+        trips
+        .select_related("bus", "route__source", "route__destination")
+        .annotate(tickets_available=F("bus__num_seats") - F("seats_taken"))
+    )
+
+
+def _day_range(date):
+    day_start = timezone.make_aware(datetime.combine(date, time.min))
+    return day_start, day_start + timedelta(days=1)
+
+
 class BusViewSet(
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    TimedSerializerMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet
 ):
-    @staticmethod
-    def _params_to_ints(query_string):
-        """
-        Converts a query string into a list of integers.
-        """
-        return [int(str_id) for str_id in query_string.split(",")]
+    cache_namespaces = ("bus", "facility")
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -60,13 +119,13 @@ class BusViewSet(
         facilities = self.request.query_params.get("facilities", None)
 
         if facilities:
-            facilities = self._params_to_ints(facilities)
-            queryset = queryset.filter(facilities__id__in=facilities)
+            facilities = _params_to_ints(facilities)
+            queryset = queryset.filter(facilities__id__in=facilities).distinct()
 
-        if self.action == ["list", "retrieve"]:
-            return queryset.prefetch_related("facilities")
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related("facilities")
 
-        return queryset.distinct()
+        return queryset
 
     @action(
         methods=["POST"],
@@ -78,7 +137,11 @@ class BusViewSet(
         bus = self.get_object()
         serializer = self.get_serializer(bus, data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            previous = bus.image_variants
+            # the variants of the new image are rendered off the request
+            serializer.save(image_variants={})
+            transaction.on_commit(lambda: delete_variants(previous))
+            transaction.on_commit(lambda: image_pipeline.submit(bus.pk))
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -93,43 +156,354 @@ class BusViewSet(
         ]
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        return self._cached(self._list, request, *args, **kwargs)
+
+    def _list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(fast_serializers.bus_list_data(queryset))
 
 
+class TripViewSet(
+    ReplicaReadMixin, CachedResponseMixin, TimedSerializerMixin, viewsets.ModelViewSet
+):
+    pagination_class = TripCursorPagination
+    cached_actions = ("retrieve",)
+    max_seat_maps = 100
+
+    def get_cache_namespaces(self):
+        return ("trip", "bus", "facility", f"seats:{self.kwargs['pk']}")
 
-class TripViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "search"):
             return TripListSerializer
         elif self.action == "retrieve":
             return TripRetrieveSerializer
+        elif self.action in ("seat_map", "seat_maps"):
+            return TripSeatMapSerializer
+        elif self.action == "import_timetable":
+            return TimetableImportSerializer
 
         return TripSerializer
 
     def get_queryset(self):
         queryset = Trip.objects.all()
 
-        if self.action == "list":
-            queryset = (
+        if self.action in ("list", "search"):
+            queryset = _with_availability(queryset)
+        elif self.action == "retrieve":
+            return (
                 queryset
-                .select_related()
-                .annotate(tickets_available=F("bus__num_seats") - Count("tickets"))
+                .select_related("bus", "route__source", "route__destination")
+                .prefetch_related("bus__facilities")
             )
-        elif self.action == "retrieve":
-            return queryset.select_related()
+        elif self.action in ("seat_map", "seat_maps"):
+            return queryset
 
         return queryset.order_by("id")
 
+    def _trip_list_response(self, queryset):
+        page = self.paginate_queryset(fast_serializers.trip_list_values(queryset))
+        return self.get_paginated_response(fast_serializers.trip_list_data(page))
+
+    def list(self, request, *args, **kwargs):
+        return self._trip_list_response(self.filter_queryset(self.get_queryset()))
+
+    @staticmethod
+    def _search(queryset, source=None, destination=None, date=None,
+                min_seats=None, facilities=None):
+        """
+        Narrows trips down on the (route, departure) index.
+        """
+        if source or destination:
+            routes = Route.objects.all()
+            if source:
+                routes = routes.filter(source__name=source)
+            if destination:
+                routes = routes.filter(destination__name=destination)
+            queryset = queryset.filter(route__in=routes)
+        if date:
+            day_start, day_end = _day_range(date)
+            queryset = queryset.filter(
+                departure__gte=day_start,
+                departure__lt=day_end,
+            )
+        if min_seats:
+            queryset = queryset.filter(tickets_available__gte=min_seats)
+        if facilities:
+            queryset = queryset.filter(
+                bus__in=Bus.objects.filter(facilities__id__in=facilities)
+            )
+
+        return queryset
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("from", description="Departure city"),
+            OpenApiParameter("to", description="Arrival city"),
+            OpenApiParameter(
+                "date",
+                type={"type": "string", "format": "date"},
+                description="Departure date (ex. ?date=2024-10-01)",
+            ),
+            OpenApiParameter(
+                "min_seats",
+                type={"type": "number"},
+                description="Minimum number of free seats",
+            ),
+            OpenApiParameter(
+                "facilities",
+                type={"type": "array", "items": {"type": "number"}},
+                description="Filter by bus facilities id (ex. ?facilities=2,3)",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False)
+    def search(self, request):
+        """Trips matching a route and date, sorted by departure"""
+        params = {
+            "source": request.query_params.get("from"),
+            "destination": request.query_params.get("to"),
+            "date": request.query_params.get("date"),
+            "min_seats": request.query_params.get("min_seats"),
+            "facilities": request.query_params.get("facilities"),
+        }
+        params = {key: value for key, value in params.items() if value}
+        if "facilities" in params:
+            params["facilities"] = params["facilities"].split(",")
+
+        search = TripSearchSerializer(data=params)
+        search.is_valid(raise_exception=True)
+
+        if "date" in search.validated_data:
+            schedules.materialize_date(
+                search.validated_data["date"],
+                search.validated_data.get("source"),
+                search.validated_data.get("destination"),
+            )
+        return self._trip_list_response(
+            self._search(self.get_queryset(), **search.validated_data)
+        )
+
+    @extend_schema(responses=TimetableImportReportSerializer)
+    @action(
+        methods=["POST"],
+        detail=False,
+        permission_classes=[IsAdminUser],
+        parser_classes=[MultiPartParser],
+        url_path="import",
+    )
+    def import_timetable(self, request):
+        """Bulk-creates trips from a CSV, JSON or NDJSON timetable file"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+
+        try:
+            file_format = (
+                serializer.validated_data.get("file_format")
+                or timetable.format_for(upload.name)
+            )
+        except timetable.TimetableError as error:
+            raise ValidationError({"file_format": str(error)})
+
+        report = timetable.import_timetable(
+            io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""),
+            file_format,
+            upsert=serializer.validated_data["upsert"],
+        )
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+    @action(methods=["GET"], detail=True, url_path="seat-map")
+    def seat_map(self, request, pk=None):
+        """Seat occupancy of a trip as a base64-encoded bitset"""
+        row = get_object_or_404(
+            fast_serializers.seat_map_values(self.get_queryset()), pk=pk
+        )
+        return Response(fast_serializers.seat_map_data(row))
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "ids",
+                type={"type": "array", "items": {"type": "number"}},
+                description="Trip ids to fetch seat maps for (ex. ?ids=2,3)",
+                required=True,
+            )
+        ]
+    )
+    @action(methods=["GET"], detail=False, url_path="seat-maps")
+    def seat_maps(self, request):
+        """Seat maps of several trips in one request"""
+        try:
+            ids = _params_to_ints(request.query_params.get("ids", ""))
+        except ValueError:
+            raise ValidationError({"ids": "Expected a comma separated list of trip ids"})
+
+        if len(ids) > self.max_seat_maps:
+            raise ValidationError(
+                {"ids": f"At most {self.max_seat_maps} trips can be requested at once"}
+            )
+
+        queryset = self.get_queryset().filter(pk__in=ids).order_by("id")
+        return Response([
+            fast_serializers.seat_map_data(row)
+            for row in fast_serializers.seat_map_values(queryset)
+        ])
+
+
+class TripScheduleViewSet(TimedSerializerMixin, viewsets.ModelViewSet):
+    """Recurring departures, their trips are created ahead of time or on lookup"""
+    serializer_class = TripScheduleSerializer
+    queryset = TripSchedule.objects.select_related("route__source", "route__destination")
+
 
-class OrderViewSet(viewsets.ModelViewSet):
+class RouteViewSet(TimedSerializerMixin, viewsets.ReadOnlyModelViewSet):
+    """Routes between two stations with their departures on a given day"""
+    serializer_class = RouteSerializer
+
+    def get_queryset(self):
+        queryset = Route.objects.select_related("source", "destination")
+
+        source = self.request.query_params.get("from")
+        destination = self.request.query_params.get("to")
+        if source:
+            queryset = queryset.filter(source__name=source)
+        if destination:
+            queryset = queryset.filter(destination__name=destination)
+
+        if self.request.query_params.get("date"):
+            date = serializers.DateField().run_validation(
+                self.request.query_params["date"]
+            )
+            schedules.materialize_date(date, source, destination)
+        else:
+            date = timezone.localdate()
+        day_start, day_end = _day_range(date)
+        on_date = Q(trips__departure__gte=day_start, trips__departure__lt=day_end)
+
+        return queryset.annotate(
+            departures=Count("trips", filter=on_date),
+            seats_available=Sum(
+                F("trips__bus__num_seats") - F("trips__seats_taken"),
+                filter=on_date,
+                default=0,
+            ),
+            next_departure=Min(
+                "trips__departure", filter=Q(trips__departure__gte=timezone.now())
+            ),
+        ).order_by("source__name", "destination__name")
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("from", description="Departure city"),
+            OpenApiParameter("to", description="Arrival city"),
+            OpenApiParameter(
+                "date",
+                type={"type": "string", "format": "date"},
+                description="Day the departures are counted for, today by default",
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+
+class JourneyViewSet(IdempotentMixin, GenericViewSet):
+    """Earliest-arrival journeys, including ones with transfers"""
+    permission_classes = [IsAuthenticated]
+
+    def get_serializer_class(self):
+        if self.action == "book":
+            return JourneyOrderSerializer
+
+        return JourneySearchSerializer
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("from", description="Departure city", required=True),
+            OpenApiParameter("to", description="Arrival city", required=True),
+            OpenApiParameter(
+                "departure",
+                type={"type": "string", "format": "date-time"},
+                description="Earliest departure, now by default",
+            ),
+            OpenApiParameter(
+                "min_transfer",
+                type={"type": "number"},
+                description="Minimum transfer time in minutes",
+            ),
+            OpenApiParameter(
+                "seats",
+                type={"type": "number"},
+                description="Number of free seats needed on every leg",
+            ),
+        ],
+        responses=TripListSerializer(many=True),
+    )
+    def list(self, request):
+        params = {
+            "source": request.query_params.get("from"),
+            "destination": request.query_params.get("to"),
+            "departure": request.query_params.get("departure"),
+            "min_transfer": request.query_params.get("min_transfer"),
+            "seats": request.query_params.get("seats"),
+        }
+        search = self.get_serializer(
+            data={key: value for key, value in params.items() if value}
+        )
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        stations = dict(
+            Station.objects
+            .filter(name__in=[params["source"], params["destination"]])
+            .values_list("name", "id")
+        )
+        if params["source"] not in stations or params["destination"] not in stations:
+            return Response({"detail": "Unknown station"}, status=status.HTTP_404_NOT_FOUND)
+
+        min_transfer = settings.JOURNEY_MIN_TRANSFER
+        if "min_transfer" in params:
+            min_transfer = timedelta(minutes=params["min_transfer"])
+
+        legs = connection_index.earliest_arrival(
+            stations[params["source"]],
+            stations[params["destination"]],
+            params.get("departure") or timezone.now(),
+            min_transfer,
+            seats=params["seats"],
+        )
+        if legs is None:
+            return Response({"detail": "No journey found"}, status=status.HTTP_404_NOT_FOUND)
+
+        trips = _with_availability(Trip.objects.filter(pk__in=legs)).order_by("departure")
+        return Response(serialized(TripListSerializer(trips, many=True)))
+
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    @action(methods=["POST"], detail=False)
+    def book(self, request):
+        """Books one order with a ticket on each leg of a journey"""
+        return self._idempotent(self._book, request)
+
+    def _book(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+        return Response(serialized(serializer), status=status.HTTP_201_CREATED)
+
+
+class OrderViewSet(IdempotentMixin, TimedSerializerMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_class = OrderCursorPagination
 
     def get_serializer_class(self):
         serializer = self.serializer_class
 
         if self.action == "list":
             serializer = OrderListSerializer
+        elif self.action == "batch":
+            serializer = BatchBookingSerializer
 
         return serializer
 
@@ -137,9 +511,165 @@ class OrderViewSet(viewsets.ModelViewSet):
         queryset = self.queryset.filter(user=self.request.user)
 
         if self.action == "list":
-            queryset = queryset.prefetch_related("tickets_trip_bus")
+            queryset = queryset.prefetch_related(
+                "tickets",
+                Prefetch("tickets__trip", queryset=_with_availability(Trip.objects.all())),
+                Prefetch(
+                    "archived_tickets",
+                    queryset=ArchivedTicket.objects.select_related(
+                        "trip__bus", "trip__route__source", "trip__route__destination"
+                    ),
+                ),
+            )
+        elif self.action == "retrieve":
+            queryset = queryset.prefetch_related("tickets", "archived_tickets")
 
         return queryset
 
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    def create(self, request, *args, **kwargs):
+        return self._idempotent(super().create, request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    @extend_schema(
+        responses={
+            201: BatchBookingResultSerializer,
+            409: BatchBookingResultSerializer,
+        },
+        parameters=[IDEMPOTENCY_KEY_PARAMETER],
+    )
+    @action(methods=["POST"], detail=False)
+    def batch(self, request):
+        """
+        Books seats on many trips in one order, with the outcome of every
+        seat. 409 when no seat was booked.
+        """
+        return self._idempotent(self._batch, request)
+
+    def _batch(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order, results = booking.book_batch(
+            request.user,
+            serializer.validated_data["bookings"],
+            partial=serializer.validated_data["partial"],
+        )
+        data = {
+            "order": serialized(OrderSerializer(order)) if order else None,
+            "results": results,
+        }
+        return Response(
+            data,
+            status=status.HTTP_201_CREATED if order else status.HTTP_409_CONFLICT,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.DATE,
+                description="First order date (ex. ?from=2024-10-01)",
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.DATE,
+                description="Last order date, inclusive (ex. ?to=2024-10-31)",
+            ),
+            OpenApiParameter(
+                "output",
+                enum=list(exports.FORMATS),
+                description="csv (default) or ndjson",
+            ),
+        ],
+        responses={
+            (200, content_type): OpenApiTypes.STR
+            for content_type in exports.FORMATS.values()
+        },
+    )
+    @action(methods=["GET"], detail=False, permission_classes=[IsAdminUser])
+    def export(self, request):
+        """Tickets of all users' orders, streamed as CSV or NDJSON"""
+        params = {
+            "date_from": request.query_params.get("from"),
+            "date_to": request.query_params.get("to"),
+            "file_format": request.query_params.get("output"),
+        }
+        params = {key: value for key, value in params.items() if value}
+        serializer = OrderExportSerializer(data=params)
+        serializer.is_valid(raise_exception=True)
+
+        file_format = serializer.validated_data.pop("file_format")
+        rows = exports.ticket_rows(**serializer.validated_data)
+        response = StreamingHttpResponse(
+            exports.export(file_format, rows),
+            content_type=exports.FORMATS[file_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="tickets.{file_format}"'
+        return response
+
+
+class SeatHoldViewSet(
+    IdempotentMixin,
+    TimedSerializerMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet
+):
+    """Temporary seat reservations of the current user"""
+    permission_classes = [IsAuthenticated]
+
+    def get_serializer_class(self):
+        if self.action == "create":
+            return SeatHoldCreateSerializer
+        elif self.action == "checkout":
+            return CheckoutSerializer
+
+        return SeatHoldSerializer
+
+    def get_queryset(self):
+        return SeatHold.objects.filter(user=self.request.user)
+
+    @extend_schema(responses=SeatHoldSerializer(many=True))
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        holds = reservations.hold_seats(
+            request.user,
+            serializer.validated_data["trip"].pk,
+            serializer.validated_data["seats"],
+        )
+        return Response(
+            serialized(SeatHoldSerializer(holds, many=True)),
+            status=status.HTTP_201_CREATED
+        )
+
+    @extend_schema(responses=OrderSerializer, parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    @action(methods=["POST"], detail=False)
+    def checkout(self, request):
+        return self._idempotent(self._checkout, request)
+
+    def _checkout(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order = reservations.checkout(
+            request.user, serializer.validated_data.get("holds")
+        )
+        return Response(serialized(OrderSerializer(order)), status=status.HTTP_201_CREATED)
+
+
+class MetricsView(APIView):
+    """Request metrics in the Prometheus text format, see station.profiling"""
+    permission_classes = [IsAdminOrInternalIP]
+    # scraped every few seconds
+    throttle_classes = []
+
+    @extend_schema(exclude=True)
+    def get(self, request):
+        if not settings.REQUEST_PROFILING:
+            raise Http404
+        return HttpResponse(
+            metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )